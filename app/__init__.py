@@ -6,6 +6,7 @@ from config import Config
 from flask_migrate import Migrate
 from flask_apscheduler import APScheduler
 from datetime import datetime
+import os
 
 
 db = SQLAlchemy()
@@ -30,9 +31,30 @@ def create_app(config_class=Config):
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
 
-    #Initializing Scheduler
+    #Shared market data cache
+    from app.services import cache_service, http_client, rate_limiter, price_archive, quote_refresher, response_cache, \
+        symbol_index, quote_stream
+    cache_service.init_app(app)
+    http_client.init_app(app)
+    rate_limiter.init_app(app)
+    price_archive.init_app(app)
+    quote_refresher.init_app(app)
+    response_cache.init_app(app)
+    symbol_index.init_app(app)
+    quote_stream.init_app(app)
+
+    #Buffered metrics writer
+    from app.monitoring import metrics, prometheus, tracing
+    metrics.init_app(app)
+    prometheus.init_app(app)
+    tracing.init_app(app)
+
+    #Initializing Scheduler, in one worker only so jobs don't run once per worker
+    from app.services.scheduler_lock import scheduler_lock
     scheduler.init_app(app)
-    if config_class != 'testing':
+    run_jobs = config_class != 'testing' and app.config.get('SCHEDULER_ENABLED', True) and \
+        scheduler_lock.acquire(app.config['SCHEDULER_LOCK_PATH'])
+    if run_jobs:
         scheduler.start()
 
     #User Loader
@@ -45,6 +67,7 @@ def create_app(config_class=Config):
         #Importing Models
         from app.models import User, Portfolio, Holding
         from app.models.notification import Notification
+        from app.models.market_data import DailyPrice, PriceSeriesStatus, CompanyProfile, SymbolView
 
 
         #Registering my Blueprints
@@ -76,11 +99,28 @@ def create_app(config_class=Config):
         # app.register_blueprint(bp)
         app.register_blueprint(report_bp, url_prefix='/reports')
 
-        # Only scheduling jobs in production, not in testing
-        if config_class != 'testing':
-            from app.tasks import record_portfolio_values
+        # Only scheduling jobs in production, not in testing, and in the worker holding the scheduler lock
+        if run_jobs:
+            from app.tasks import record_portfolio_values, refresh_hot_quotes, warm_market_caches, \
+                refresh_symbol_listing, rollup_metrics, decay_symbol_views
+            from app.services.market_calendar import MARKET_TZ
             scheduler.add_job(id='record_portfolio_values', func=record_portfolio_values,
                               trigger='cron', hour=0, minute=0)
+            scheduler.add_job(id='refresh_hot_quotes', func=refresh_hot_quotes,
+                              trigger='interval', seconds=app.config['HOT_SYMBOLS_REFRESH_INTERVAL'])
+            scheduler.add_job(id='decay_symbol_views', func=decay_symbol_views,
+                              trigger='interval', seconds=app.config['HOT_SYMBOLS_DECAY_INTERVAL'])
+            scheduler.add_job(id='warm_market_caches', func=warm_market_caches,
+                              trigger='cron', day_of_week='mon-fri', timezone=MARKET_TZ,
+                              hour=app.config['WARMUP_HOUR'], minute=app.config['WARMUP_MINUTE'])
+            scheduler.add_job(id='refresh_symbol_listing', func=refresh_symbol_listing,
+                              trigger='cron', day_of_week='mon-fri', timezone=MARKET_TZ,
+                              hour=app.config['SYMBOL_LISTING_REFRESH_HOUR'], minute=0)
+            scheduler.add_job(id='rollup_metrics', func=rollup_metrics,
+                              trigger='interval', seconds=app.config['METRICS_ROLLUP_INTERVAL'])
+            # First start: building the search index now rather than waiting for the morning run
+            if not os.path.exists(app.config['SYMBOL_LISTING_PATH']):
+                scheduler.add_job(id='initial_symbol_listing', func=refresh_symbol_listing, trigger='date')
 
         # #Scheduling Daily portfolio value recording
         # scheduler.add_job(id='record_portfolio_values', func=record_portfolio_values, trigger='cron', hour=0, minute=0)
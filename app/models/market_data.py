@@ -0,0 +1,76 @@
+from app import db
+from datetime import datetime
+
+
+#Daily OHLCV bar stored locally so history is fetched from Alpha Vantage once
+class DailyPrice(db.Model):
+    __tablename__ = 'daily_price'
+    __table_args__ = (db.UniqueConstraint('symbol', 'date', name='uq_daily_price_symbol_date'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(10), nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False)
+    open = db.Column(db.Float)
+    high = db.Column(db.Float)
+    low = db.Column(db.Float)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.Float)
+
+    def __repr__(self):
+        return f'<DailyPrice {self.symbol} {self.date}>'
+
+
+#Tracking how far each symbol's local price history has been filled
+class PriceSeriesStatus(db.Model):
+    __tablename__ = 'price_series_status'
+
+    symbol = db.Column(db.String(10), primary_key=True)
+    backfilled_at = db.Column(db.DateTime)  # Last full-history download
+    refreshed_on = db.Column(db.Date)  # Last day the series was topped up
+    latest_date = db.Column(db.Date)  # Most recent bar stored
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PriceSeriesStatus {self.symbol} {self.latest_date}>'
+
+
+#Company metadata kept locally so sector lookups don't need an OVERVIEW call each time
+class CompanyProfile(db.Model):
+    __tablename__ = 'company_profile'
+
+    symbol = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(200))
+    sector = db.Column(db.String(100), index=True)
+    industry = db.Column(db.String(200))
+    market_cap = db.Column(db.BigInteger)
+    dividend_yield = db.Column(db.Float)  # Fraction, e.g. 0.025 for 2.5%
+    exchange = db.Column(db.String(20))
+    source = db.Column(db.String(20), default='overview')  # 'overview', or 'seed' for sector-only entries
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'name': self.name,
+            'sector': self.sector,
+            'industry': self.industry,
+            'market_cap': self.market_cap,
+            'dividend_yield': self.dividend_yield,
+            'exchange': self.exchange
+        }
+
+    def __repr__(self):
+        return f'<CompanyProfile {self.symbol} {self.sector}>'
+
+
+#A symbol's views towards the hot symbols; each view adds a row, and the decay job folds them into one
+class SymbolView(db.Model):
+    __tablename__ = 'symbol_view'
+
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(10), nullable=False, index=True)
+    weight = db.Column(db.Float, nullable=False, default=1.0)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SymbolView {self.symbol} {self.weight}>'
@@ -0,0 +1,477 @@
+"""Local stand-in for the Alpha Vantage query endpoint.
+
+Serves recorded fixtures, or deterministic synthetic data, for the functions the
+app uses, with configurable latency, error rate and rate-limit responses, so
+benchmarks and load tests run without the live API.
+
+Run it on its own and point the app at it:
+
+    python -m app.monitoring.alpha_vantage_stub --port 5055 --latency-ms 150 --error-rate 0.02
+    ALPHA_VANTAGE_BASE_URL=http://127.0.0.1:5055/query flask run
+
+or start it in-process with StubServer (see benchmarks and tests).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+
+import requests
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+SECTORS = {
+    'TECHNOLOGY': 'SERVICES-PREPACKAGED SOFTWARE',
+    'HEALTHCARE': 'PHARMACEUTICAL PREPARATIONS',
+    'FINANCIAL SERVICES': 'NATIONAL COMMERCIAL BANKS',
+    'ENERGY': 'PETROLEUM REFINING',
+    'CONSUMER CYCLICAL': 'RETAIL-CATALOG & MAIL-ORDER HOUSES',
+    'INDUSTRIALS': 'AIRCRAFT ENGINES & ENGINE PARTS',
+}
+SENTIMENT_LABELS = [
+    (-0.35, 'Bearish'), (-0.15, 'Somewhat-Bearish'), (0.15, 'Neutral'), (0.35, 'Somewhat-Bullish'), (1.0, 'Bullish')
+]
+MOVER_TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'AMD', 'INTC', 'NFLX',
+                 'JPM', 'BAC', 'PFE', 'XOM', 'KO', 'DIS', 'WMT', 'CSCO', 'ORCL', 'BA']
+# Listed alongside the synthetic companies; the index tiles quote these
+INDEX_ETFS = {'SPY': 'SPDR S&P 500 ETF Trust', 'QQQ': 'Invesco QQQ Trust', 'DIA': 'SPDR Dow Jones Industrial Average ETF'}
+INTRADAY_INTERVALS = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '60min': 60}
+# Functions answered with CSV rather than JSON
+CSV_FUNCTIONS = {'LISTING_STATUS'}
+RATE_LIMIT_MESSAGE = ('Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. '
+                      'Please subscribe to any of the premium plans to instantly remove all daily rate limits.')
+
+
+class StubSettings:
+    """Behaviour knobs for the stand-in server; every value can be changed while it runs."""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, calls_per_minute=0,
+                 rate_limit_status=200, fixtures_dir=None, record_url=None, seed=0, full_history_days=1260):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls_per_minute = calls_per_minute  # 0 disables rate limiting
+        self.rate_limit_status = rate_limit_status  # Alpha Vantage itself answers 200 with an 'Information' note
+        self.fixtures_dir = fixtures_dir
+        self.record_url = record_url  # Upstream to fetch and save fixtures from when none is recorded
+        self.seed = seed
+        self.full_history_days = full_history_days
+
+
+def _rng(seed, *parts):
+    digest = hashlib.sha256(':'.join(str(p) for p in (seed,) + parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def _trading_days(count, end=None):
+    day = end or date.today()
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days  # Newest first, like Alpha Vantage
+
+
+def _daily_bars(seed, symbol, count):
+    """Generating a deterministic random walk; the newest bar is the same for compact and full."""
+    rng = _rng(seed, 'daily', symbol)
+    price = rng.uniform(20, 500)
+    bars = []
+    for day in _trading_days(count):
+        change = rng.gauss(0, 0.018)
+        close = price
+        open_ = close / (1 + change)
+        high = max(open_, close) * (1 + abs(rng.gauss(0, 0.006)))
+        low = min(open_, close) * (1 - abs(rng.gauss(0, 0.006)))
+        bars.append((day, open_, high, low, close, int(rng.uniform(1e6, 5e7))))
+        price = open_
+    return bars
+
+
+def _intraday_bars(seed, symbol, minutes, count):
+    """Generating extended-hours bars (04:00-20:00), newest first, each day closing at its daily close."""
+    per_day = 16 * 60 // minutes
+    bars = []
+    for day, _, _, _, close, volume in _daily_bars(seed, symbol, -(-count // per_day)):
+        rng = _rng(seed, 'intraday', symbol, minutes, day)
+        price = close
+        moment = datetime.combine(day, datetime.min.time()).replace(hour=20)
+        for _ in range(per_day):
+            moment -= timedelta(minutes=minutes)
+            open_ = price / (1 + rng.gauss(0, 0.002 * (minutes / 60) ** 0.5))
+            high = max(open_, price) * (1 + abs(rng.gauss(0, 0.001)))
+            low = min(open_, price) * (1 - abs(rng.gauss(0, 0.001)))
+            bars.append((moment, open_, high, low, price, int(volume / per_day * rng.uniform(0.3, 1.7))))
+            price = open_
+    return bars[:count]
+
+
+def _company_name(symbol):
+    return INDEX_ETFS.get(symbol, f'{symbol} Holdings Inc')
+
+
+def _listing(seed):
+    """Getting the listed (symbol, name, exchange, asset type) the stand-in knows about."""
+    listing = []
+    for symbol in sorted(set(MOVER_TICKERS) | set(INDEX_ETFS)):
+        exchange = 'NYSE ARCA' if symbol in INDEX_ETFS else _rng(seed, 'overview', symbol).choice(['NYSE', 'NASDAQ'])
+        listing.append((symbol, _company_name(symbol), exchange, 'ETF' if symbol in INDEX_ETFS else 'Stock'))
+    return listing
+
+
+def _sentiment_label(score):
+    for limit, label in SENTIMENT_LABELS:
+        if score <= limit:
+            return label
+    return 'Bullish'
+
+
+def build_response(function, args, settings):
+    """Building a synthetic Alpha Vantage payload for a query."""
+    symbol = args.get('symbol', '').upper()
+    seed = settings.seed
+
+    if function in ('GLOBAL_QUOTE', 'TIME_SERIES_DAILY', 'TIME_SERIES_INTRADAY', 'OVERVIEW',
+                    'INCOME_STATEMENT') and not symbol:
+        return {'Error Message': f'Invalid API call. Please retry or visit the documentation for {function}.'}
+
+    if function == 'GLOBAL_QUOTE':
+        (day, open_, high, low, close, volume), (_, _, _, _, previous, _) = _daily_bars(seed, symbol, 2)
+        change = close - previous
+        return {'Global Quote': {
+            '01. symbol': symbol,
+            '02. open': f'{open_:.4f}',
+            '03. high': f'{high:.4f}',
+            '04. low': f'{low:.4f}',
+            '05. price': f'{close:.4f}',
+            '06. volume': str(volume),
+            '07. latest trading day': day.isoformat(),
+            '08. previous close': f'{previous:.4f}',
+            '09. change': f'{change:.4f}',
+            '10. change percent': f'{change / previous * 100:.4f}%'
+        }}
+
+    if function == 'TIME_SERIES_DAILY':
+        count = settings.full_history_days if args.get('outputsize') == 'full' else 100
+        return {
+            'Meta Data': {
+                '1. Information': 'Daily Prices (open, high, low, close) and Volumes',
+                '2. Symbol': symbol,
+                '3. Last Refreshed': _trading_days(1)[0].isoformat(),
+                '4. Output Size': 'Full size' if count > 100 else 'Compact',
+                '5. Time Zone': 'US/Eastern'
+            },
+            'Time Series (Daily)': {
+                day.isoformat(): {
+                    '1. open': f'{o:.4f}', '2. high': f'{h:.4f}', '3. low': f'{l:.4f}',
+                    '4. close': f'{c:.4f}', '5. volume': str(v)
+                } for day, o, h, l, c, v in _daily_bars(seed, symbol, count)
+            }
+        }
+
+    if function == 'TIME_SERIES_INTRADAY':
+        interval = args.get('interval', '')
+        if interval not in INTRADAY_INTERVALS:
+            return {'Error Message': 'Invalid API call. Please retry or visit the documentation for '
+                                     'TIME_SERIES_INTRADAY.'}
+        bars = _intraday_bars(seed, symbol, INTRADAY_INTERVALS[interval],
+                              30 * 16 * 60 // INTRADAY_INTERVALS[interval] if args.get('outputsize') == 'full' else 100)
+        return {
+            'Meta Data': {
+                '1. Information': f'Intraday ({interval}) open, high, low, close prices and volume',
+                '2. Symbol': symbol,
+                '3. Last Refreshed': bars[0][0].strftime('%Y-%m-%d %H:%M:%S'),
+                '4. Interval': interval,
+                '5. Output Size': 'Full size' if args.get('outputsize') == 'full' else 'Compact',
+                '6. Time Zone': 'US/Eastern'
+            },
+            f'Time Series ({interval})': {
+                moment.strftime('%Y-%m-%d %H:%M:%S'): {
+                    '1. open': f'{o:.4f}', '2. high': f'{h:.4f}', '3. low': f'{l:.4f}',
+                    '4. close': f'{c:.4f}', '5. volume': str(v)
+                } for moment, o, h, l, c, v in bars
+            }
+        }
+
+    if function == 'LISTING_STATUS':
+        rows = ['symbol,name,exchange,assetType,ipoDate,delistingDate,status']
+        for listed, name, exchange, asset_type in _listing(seed):
+            ipo = date(1980, 1, 2) + timedelta(days=_rng(seed, 'ipo', listed).randrange(15000))
+            rows.append(f'{listed},{name},{exchange},{asset_type},{ipo.isoformat()},null,Active')
+        return '\r\n'.join(rows) + '\r\n'
+
+    if function == 'SYMBOL_SEARCH':
+        keywords = args.get('keywords', '').strip().lower()
+        if not keywords:
+            return {'Error Message': 'Invalid API call. Please retry or visit the documentation for SYMBOL_SEARCH.'}
+        matches = []
+        for listed, name, _, asset_type in _listing(seed):
+            if listed.lower().startswith(keywords):
+                score = len(keywords) / len(listed)
+            elif keywords in name.lower():
+                score = len(keywords) / len(name)
+            else:
+                continue
+            matches.append({
+                '1. symbol': listed, '2. name': name, '3. type': 'Equity' if asset_type == 'Stock' else asset_type,
+                '4. region': 'United States', '5. marketOpen': '09:30', '6. marketClose': '16:00',
+                '7. timezone': 'UTC-04', '8. currency': 'USD', '9. matchScore': f'{score:.4f}'
+            })
+        matches.sort(key=lambda match: match['9. matchScore'], reverse=True)
+        return {'bestMatches': matches[:10]}
+
+    if function == 'OVERVIEW':
+        rng = _rng(seed, 'overview', symbol)
+        sector = rng.choice(sorted(SECTORS))
+        close = _daily_bars(seed, symbol, 1)[0][4]
+        eps = close / rng.uniform(8, 45)
+        return {
+            'Symbol': symbol,
+            'AssetType': 'Common Stock',
+            'Name': _company_name(symbol),
+            'Description': f'{symbol} Holdings Inc is a synthetic company served by the Alpha Vantage stand-in.',
+            'Exchange': rng.choice(['NYSE', 'NASDAQ']),
+            'Currency': 'USD',
+            'Sector': sector,
+            'Industry': SECTORS[sector],
+            'MarketCapitalization': str(int(close * rng.uniform(1e8, 1e10))),
+            'PERatio': f'{close / eps:.2f}',
+            'PEGRatio': f'{rng.uniform(0.5, 3):.2f}',
+            'EPS': f'{eps:.2f}',
+            'Beta': f'{rng.uniform(0.4, 1.9):.3f}',
+            'DividendYield': f'{rng.choice([0, rng.uniform(0.002, 0.05)]):.4f}',
+            'ProfitMargin': f'{rng.uniform(0.02, 0.35):.3f}',
+            'AnalystTargetPrice': f'{close * rng.uniform(0.9, 1.3):.2f}',
+            '52WeekHigh': f'{close * rng.uniform(1.02, 1.4):.2f}',
+            '52WeekLow': f'{close * rng.uniform(0.6, 0.98):.2f}'
+        }
+
+    if function == 'INCOME_STATEMENT':
+        rng = _rng(seed, 'income', symbol)
+        revenue = rng.uniform(1e9, 4e11)
+        reports = []
+        for year in range(date.today().year - 1, date.today().year - 6, -1):
+            net_income = revenue * rng.uniform(0.03, 0.3)
+            reports.append({
+                'fiscalDateEnding': f'{year}-12-31',
+                'reportedCurrency': 'USD',
+                'totalRevenue': str(int(revenue)),
+                'grossProfit': str(int(revenue * rng.uniform(0.3, 0.7))),
+                'netIncome': str(int(net_income)),
+                'reportedEPS': f'{net_income / rng.uniform(1e8, 1e10):.2f}'
+            })
+            revenue /= 1 + rng.uniform(-0.05, 0.2)
+        return {'symbol': symbol, 'annualReports': reports, 'quarterlyReports': []}
+
+    if function == 'NEWS_SENTIMENT':
+        tickers = [t for t in args.get('tickers', '').upper().split(',') if t]
+        limit = min(int(args.get('limit', 50) or 50), 1000)
+        rng = _rng(seed, 'news', ','.join(tickers), date.today())
+        now = datetime.now().replace(microsecond=0)
+        feed = []
+        for i in range(min(limit, 20)):
+            score = rng.uniform(-0.5, 0.5)
+            key = hashlib.sha1(f"{','.join(tickers)}:{i}".encode()).hexdigest()[:12]
+            feed.append({
+                'title': f"{', '.join(tickers) or 'Markets'} update #{i + 1}",
+                'url': f'https://news.example.com/{key}',
+                'time_published': (now - timedelta(minutes=37 * i)).strftime('%Y%m%dT%H%M%S'),
+                'summary': 'Synthetic article served by the Alpha Vantage stand-in.',
+                'source': rng.choice(['Reuters', 'Bloomberg', 'Benzinga', 'Motley Fool']),
+                'overall_sentiment_score': round(score, 6),
+                'overall_sentiment_label': _sentiment_label(score),
+                'ticker_sentiment': [{
+                    'ticker': ticker,
+                    'relevance_score': f'{rng.uniform(0.1, 1):.6f}',
+                    'ticker_sentiment_score': f'{score + rng.uniform(-0.1, 0.1):.6f}',
+                    'ticker_sentiment_label': _sentiment_label(score)
+                } for ticker in tickers]
+            })
+        return {'items': str(len(feed)), 'sentiment_score_definition': '', 'feed': feed}
+
+    if function == 'TOP_GAINERS_LOSERS':
+        rng = _rng(seed, 'movers', date.today())
+
+        def mover(ticker, low, high):
+            price = rng.uniform(5, 400)
+            percent = rng.uniform(low, high)
+            return {
+                'ticker': ticker,
+                'price': f'{price:.2f}',
+                'change_amount': f'{price * percent / 100:.2f}',
+                'change_percentage': f'{percent:.4f}%',
+                'volume': str(int(rng.uniform(1e6, 9e7)))
+            }
+
+        tickers = MOVER_TICKERS[:]
+        rng.shuffle(tickers)
+        return {
+            'metadata': 'Top gainers, losers, and most actively traded US tickers',
+            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S US/Eastern'),
+            'top_gainers': [mover(t, 2, 25) for t in tickers[:7]],
+            'top_losers': [mover(t, -25, -2) for t in tickers[7:14]],
+            'most_actively_traded': [mover(t, -5, 5) for t in tickers[14:]]
+        }
+
+    return {'Error Message': f'This API function ({function}) does not exist.'}
+
+
+def create_stub_app(settings=None):
+    """Creating the stand-in Flask app serving /query."""
+    settings = settings or StubSettings()
+    app = Flask(__name__)
+    app.config['STUB_SETTINGS'] = settings
+    app.json.sort_keys = False  # Time series are newest first, like Alpha Vantage
+
+    lock = threading.Lock()
+    calls = Counter()
+    window = deque()  # Call times within the last minute
+    error_rng = random.Random(settings.seed)
+
+    def fixture_path(function, symbol):
+        extension = 'csv' if function in CSV_FUNCTIONS else 'json'
+        name = f"{function}_{symbol}.{extension}" if symbol else f"{function}.{extension}"
+        return os.path.join(settings.fixtures_dir, name)
+
+    def load_fixture(function, symbol):
+        if not settings.fixtures_dir:
+            return None
+        for path in (fixture_path(function, symbol), fixture_path(function, None)):
+            if os.path.exists(path):
+                with open(path) as f:
+                    return f.read() if function in CSV_FUNCTIONS else json.load(f)
+
+        if settings.record_url:
+            # Recording the real response once, so later runs are hermetic
+            params = request.args.to_dict()
+            params['apikey'] = os.getenv('ALPHA_VANTAGE_API_KEY', params.get('apikey', ''))
+            response = requests.get(settings.record_url, params=params, timeout=(3.05, 30))
+            data = response.text if function in CSV_FUNCTIONS else response.json()
+            os.makedirs(settings.fixtures_dir, exist_ok=True)
+            with open(fixture_path(function, symbol), 'w') as f:
+                if function in CSV_FUNCTIONS:
+                    f.write(data)
+                else:
+                    json.dump(data, f)
+            return data
+        return None
+
+    @app.route('/query')
+    def query():
+        function = request.args.get('function', '').upper()
+        # News is requested per ticker list rather than per symbol
+        symbol = (request.args.get('symbol') or request.args.get('tickers', '')).upper()
+
+        with lock:
+            calls[function] += 1
+            now = time.monotonic()
+            while window and window[0] <= now - 60:
+                window.popleft()
+            limited = bool(settings.calls_per_minute) and len(window) >= settings.calls_per_minute
+            if not limited:
+                window.append(now)
+            failed = error_rng.random() < settings.error_rate
+
+        delay = settings.latency_ms + (random.uniform(0, settings.jitter_ms) if settings.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if limited:
+            with lock:
+                calls['rate_limited'] += 1
+            return jsonify({'Information': RATE_LIMIT_MESSAGE}), settings.rate_limit_status
+        if failed:
+            with lock:
+                calls['errors'] += 1
+            return jsonify({'error': 'Service temporarily unavailable'}), 503
+
+        data = load_fixture(function, symbol)
+        if data is None:
+            data = build_response(function, request.args, settings)
+        if isinstance(data, str):
+            return Response(data, mimetype='text/csv')
+        return jsonify(data)
+
+    @app.route('/stats')
+    def stats():
+        with lock:
+            return jsonify(dict(calls))
+
+    @app.route('/reset', methods=['POST'])
+    def reset():
+        with lock:
+            calls.clear()
+            window.clear()
+        return jsonify({'status': 'ok'})
+
+    return app
+
+
+class StubServer:
+    """Running the stand-in on a background thread, e.g. for the duration of a benchmark.
+
+        with StubServer(StubSettings(latency_ms=120)) as stub:
+            market_service.base_url = stub.url
+    """
+
+    def __init__(self, settings=None, host='127.0.0.1', port=0):
+        self.settings = settings or StubSettings()
+        self.app = create_stub_app(self.settings)
+        self._server = make_server(host, port, self.app, threaded=True)
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self._server.host}:{self._server.port}/query"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._thread.join()
+
+    def get_stats(self):
+        return requests.get(self.url.replace('/query', '/stats'), timeout=5).json()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Alpha Vantage API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Fixed delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Extra random delay, uniform in [0, jitter]')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 503')
+    parser.add_argument('--calls-per-minute', type=int, default=0, help='Answer with a rate-limit note above this')
+    parser.add_argument('--rate-limit-status', type=int, default=200, help='HTTP status for rate-limit responses')
+    parser.add_argument('--fixtures-dir', help='Directory of recorded FUNCTION_SYMBOL.json responses')
+    parser.add_argument('--record-from', help='Upstream URL to record missing fixtures from')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    settings = StubSettings(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        calls_per_minute=args.calls_per_minute, rate_limit_status=args.rate_limit_status,
+        fixtures_dir=args.fixtures_dir, record_url=args.record_from, seed=args.seed
+    )
+    print(f"Alpha Vantage stand-in listening on http://{args.host}:{args.port}/query")
+    server = make_server(args.host, args.port, create_stub_app(settings), threaded=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
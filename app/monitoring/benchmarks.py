@@ -1,6 +1,17 @@
+"""Timing the heavy portfolio features.
+
+The admin page runs them against the configured API. To run them hermetically
+against the local Alpha Vantage stand-in, with an isolated database and caches:
+
+    python -m app.monitoring.benchmarks --holdings 20 --latency-ms 150 --runs 2
+"""
+import argparse
+import os
+import shutil
+import tempfile
 import time
 from datetime import datetime
-from app import db
+from app import db, create_app
 from app.models.portfolio import Portfolio, Holding
 from app.models.user import User
 from app.services.market_service import MarketService
@@ -9,6 +20,9 @@ from app.services.risk_service import RiskService
 from app.services.performance_service import PerformanceService
 from app.services.enhanced_recommendation_service import EnhancedRecommendationService
 from app.monitoring.metrics import FeatureMetric
+from app.monitoring.alpha_vantage_stub import StubServer, StubSettings, MOVER_TICKERS
+from app.services.http_client import http_client
+from config import Config
 
 from app.routes.portfolio_routes import ml_service
 
@@ -74,13 +88,10 @@ def benchmark_recommendation_generation(portfolio_id, user_id):
     return duration
 
 
-def benchmark_historical_performance(portfolio_id, timeframe='1m'):
+def benchmark_historical_performance(portfolio_id):
     """Benchmark historical performance calculation."""
     start_time = time.time()
-    performance_service.calculate_historical_performance(
-        Portfolio.query.get(portfolio_id),
-        timeframe
-    )
+    performance_service.calculate_portfolio_performance(Portfolio.query.get(portfolio_id))
     duration = time.time() - start_time
 
     metric = FeatureMetric(
@@ -91,4 +102,90 @@ def benchmark_historical_performance(portfolio_id, timeframe='1m'):
     )
     db.session.add(metric)
     db.session.commit()
-    return duration
\ No newline at end of file
+    return duration
+
+
+def run_benchmarks(portfolio_id, user_id):
+    """Running every benchmark once. Returns seconds per feature."""
+    return {
+        'portfolio_valuation': benchmark_portfolio_valuation(portfolio_id),
+        'risk_analysis': benchmark_risk_analysis(portfolio_id),
+        'recommendation_generation': benchmark_recommendation_generation(portfolio_id, user_id),
+        'historical_performance': benchmark_historical_performance(portfolio_id)
+    }
+
+
+def run_hermetic_benchmarks(portfolio_id, user_id, settings=None, runs=1):
+    """Running the benchmarks with every Alpha Vantage call answered by a local stand-in.
+
+    Returns the seconds per feature for each run (the first one cold, the rest
+    served from warm caches) and the stand-in's call counts. Stand-in data ends
+    up in the caches and price store, so only use this on an isolated app.
+    """
+    with StubServer(settings) as stub, http_client.redirect(Config.ALPHA_VANTAGE_BASE_URL, stub.url):
+        results = [run_benchmarks(portfolio_id, user_id) for _ in range(runs)]
+        return results, stub.get_stats()
+
+
+def _seed_portfolio(holdings):
+    user = User(username='benchmark', email='benchmark@example.com')
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.commit()
+
+    portfolio = Portfolio(user_id=user.id, name='Benchmark')
+    db.session.add(portfolio)
+    db.session.commit()
+    for i in range(holdings):
+        symbol = MOVER_TICKERS[i % len(MOVER_TICKERS)]
+        db.session.add(Holding(portfolio_id=portfolio.id, symbol=symbol, quantity=10 + i, purchase_price=100))
+    db.session.commit()
+    return portfolio.id, user.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark portfolio features against the Alpha Vantage stand-in')
+    parser.add_argument('--holdings', type=int, default=10, help='Holdings in the benchmark portfolio')
+    parser.add_argument('--runs', type=int, default=2, help='Runs per benchmark; the first one starts cold')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Fixed delay added to every stand-in response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Extra random delay, uniform in [0, jitter]')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with HTTP 503')
+    parser.add_argument('--calls-per-minute', type=int, default=0, help='Answer with a rate-limit note above this')
+    parser.add_argument('--fixtures-dir', help='Directory of recorded FUNCTION_SYMBOL.json responses')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Nothing is shared with a running app: own database, memory caches, archive and listing
+    workdir = tempfile.mkdtemp(prefix='financial_assistant_benchmark_')
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'benchmark.sqlite3')}"
+        SCHEDULER_ENABLED = False
+        MARKET_CACHE_BACKEND = 'memory'
+        ALPHA_VANTAGE_CALLS_PER_MINUTE = 0  # The stand-in applies --calls-per-minute itself
+        PRICE_ARCHIVE_DIR = os.path.join(workdir, 'price_archive')
+        SYMBOL_LISTING_PATH = os.path.join(workdir, 'listing_status.csv')
+        METRICS_EXPORT_DIR = None
+        METRICS_FLUSH_INTERVAL = 0  # Written before the database is removed
+
+    settings = StubSettings(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        calls_per_minute=args.calls_per_minute, fixtures_dir=args.fixtures_dir, seed=args.seed
+    )
+    try:
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            portfolio_id, user_id = _seed_portfolio(args.holdings)
+            results, calls = run_hermetic_benchmarks(portfolio_id, user_id, settings, runs=args.runs)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for run, durations in enumerate(results, start=1):
+        print(f"Run {run} ({'cold' if run == 1 else 'warm'} caches):")
+        for feature, duration in durations.items():
+            print(f"  {feature:<28} {duration * 1000:10.1f} ms")
+    print(f"Stand-in calls: {dict(sorted(calls.items()))}")
+
+
+if __name__ == '__main__':
+    main()
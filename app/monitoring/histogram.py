@@ -0,0 +1,62 @@
+import json
+import math
+
+
+class LogHistogram:
+    """Mergeable latency histogram with logarithmically spaced buckets.
+
+    Bucket i covers [MIN_VALUE * GROWTH**i, MIN_VALUE * GROWTH**(i+1)) and is
+    reported by its geometric middle, so any quantile above MIN_VALUE is within
+    sqrt(GROWTH) - 1, about (GROWTH - 1)/2 or 2%, relative error no matter how
+    many values were added. Histograms for the same series simply add up, which is
+    what lets per-minute sketches from several workers be combined at query time.
+    """
+
+    GROWTH = 1.04
+    MIN_VALUE = 1e-5  # 10 microseconds; anything faster lands in bucket 0
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self, counts=None, count=0, total=0.0, maximum=0.0):
+        self.counts = counts or {}
+        self.count = count
+        self.total = total
+        self.maximum = maximum
+
+    def add(self, value):
+        index = int(math.log(value / self.MIN_VALUE) / self._LOG_GROWTH) if value > self.MIN_VALUE else 0
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def quantile(self, q):
+        """Getting the value at quantile q (0-1), or 0 for an empty histogram."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Geometric middle of the bucket, capped by the largest value actually seen
+                return min(self.MIN_VALUE * self.GROWTH ** (index + 0.5), self.maximum)
+        return self.maximum
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def to_json(self):
+        return json.dumps(self.counts, separators=(',', ':'))
+
+    @classmethod
+    def from_row(cls, counts_json, count, total, maximum):
+        counts = {int(index): n for index, n in json.loads(counts_json).items()}
+        return cls(counts, count, total, maximum)
@@ -5,6 +5,7 @@ from app.monitoring.metrics import (
     track_response_with_cache_status,
     get_average_response_time,
     get_percentile_response_time,
+    get_response_time_percentiles,
     get_api_success_rate,
     get_cache_hit_rate,
     get_average_response_by_cache_status
@@ -1,5 +1,11 @@
 from datetime import datetime, timedelta
 from app import db
+from app.monitoring.histogram import LogHistogram
+from app.monitoring.prometheus import registry
+from config import Config
+import atexit
+import json
+import threading
 import time
 
 
@@ -8,7 +14,7 @@ class ResponseMetric(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     route = db.Column(db.String(100))
     response_time = db.Column(db.Float)  # in seconds
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
 class FeatureMetric(db.Model):
@@ -24,14 +30,14 @@ class APIMetric(db.Model):
     provider = db.Column(db.String(100))
     endpoint = db.Column(db.String(100))
     success = db.Column(db.Boolean)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
 class CacheMetric(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     cache_key = db.Column(db.String(255))
     hit = db.Column(db.Boolean)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
 class CachedResponseMetric(db.Model):
@@ -39,118 +45,356 @@ class CachedResponseMetric(db.Model):
     route = db.Column(db.String(100))
     response_time = db.Column(db.Float)
     cached = db.Column(db.Boolean)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class JobMetric(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(100))
+    item_count = db.Column(db.Integer)  # e.g. symbols considered
+    fetched_count = db.Column(db.Integer)  # e.g. symbols fetched from upstream
+    duration = db.Column(db.Float)  # in seconds
+    success = db.Column(db.Boolean)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class LatencySketch(db.Model):
+    """Latency histogram for one series over one time bucket, written by one worker."""
+    id = db.Column(db.Integer, primary_key=True)
+    series = db.Column(db.String(150), index=True)  # e.g. 'route:portfolio.get_holdings', 'cache:get_stock_data:hit'
+    bucket_start = db.Column(db.DateTime, index=True)
+    bucket_seconds = db.Column(db.Integer)
+    count = db.Column(db.Integer)
+    total = db.Column(db.Float)  # sum of all values, in seconds
+    maximum = db.Column(db.Float)
+    counts = db.Column(db.Text)  # LogHistogram bucket counts as JSON
+
+
+class RequestTiming(db.Model):
+    """Where the time of one slow request went, in seconds per span."""
+    id = db.Column(db.Integer, primary_key=True)
+    route = db.Column(db.String(100), index=True)
+    duration = db.Column(db.Float)  # in seconds
+    spans = db.Column(db.Text)  # JSON: span name ('upstream', 'db', 'risk', ..., 'other') -> seconds
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class MetricRollup(db.Model):
+    """API call or cache access counts for one provider or cache key over one minute or one hour."""
+    # A second rollup run over the same minutes fails instead of counting them twice
+    __table_args__ = (db.UniqueConstraint('kind', 'name', 'bucket_start', 'bucket_seconds',
+                                          name='uq_metric_rollup_bucket'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), index=True)  # 'api' or 'cache'
+    name = db.Column(db.String(255))  # provider for 'api', cache key for 'cache'
+    bucket_start = db.Column(db.DateTime, index=True)
+    bucket_seconds = db.Column(db.Integer)
+    count = db.Column(db.Integer)
+    hits = db.Column(db.Integer)  # successful calls or cache hits
+
+
+class MetricsWriter:
+    """Buffered writer for metric rows, so recording a metric never commits on the request's session.
+
+    Rows are appended to an in-memory buffer and a background thread
+    bulk-inserts them on its own connection every flush_interval seconds, or
+    sooner once flush_batch rows are waiting. When max_buffer rows are already
+    queued, new rows are dropped and counted instead of growing memory or
+    blocking the caller. A flush_interval of 0 writes each row immediately.
+
+    Latencies are also folded into per-series LogHistograms for each
+    sketch_seconds bucket, written once the bucket has closed, so percentile
+    queries read a handful of sketches instead of every request.
+    """
+
+    def __init__(self, flush_interval=2.0, flush_batch=500, max_buffer=10000):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._buffer = []
+        self._sketches = {}  # (series, bucket_start) -> LogHistogram
+        self._thread = None
+        self._app = None
+        self.sketch_seconds = 60
+        self.configure(None, flush_interval, flush_batch, max_buffer)
+
+    def configure(self, app, flush_interval=2.0, flush_batch=500, max_buffer=10000, sketch_seconds=60):
+        self.flush(close_sketches=True)
+        with self._lock:
+            self._app = app
+            self.flush_interval = flush_interval
+            self.flush_batch = flush_batch
+            self.max_buffer = max_buffer
+            self.sketch_seconds = sketch_seconds
+            self._buffer = []
+            self._sketches = {}
+            self._written = 0
+            self._dropped = 0
+            self._flushes = 0
+
+    def record(self, model, **values):
+        """Queueing one row for model's table; the timestamp is taken now, not at flush time."""
+        values.setdefault('timestamp', datetime.now())
+
+        if not self.flush_interval:
+            db.session.execute(model.__table__.insert(), [values])
+            db.session.commit()
+            return
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self._dropped += 1
+                return
+            self._buffer.append((model.__table__, values))
+            full = len(self._buffer) >= self.flush_batch
+            self._ensure_flusher()
+        if full:
+            self._wake.set()
+
+    def observe(self, series, value):
+        """Adding a latency (seconds) to the series' sketch for the current bucket."""
+        bucket_start = datetime.fromtimestamp(time.time() // self.sketch_seconds * self.sketch_seconds)
+
+        if not self.flush_interval:
+            sketch = LogHistogram()
+            sketch.add(value)
+            db.session.execute(LatencySketch.__table__.insert(), [self._sketch_row(series, bucket_start, sketch)])
+            db.session.commit()
+            return
+
+        with self._lock:
+            key = (series, bucket_start)
+            if key not in self._sketches:
+                self._sketches[key] = LogHistogram()
+            self._sketches[key].add(value)
+            self._ensure_flusher()
+
+    def flush(self, close_sketches=False):
+        """Writing everything queued so far in one transaction. Returns the number of rows written.
+
+        Sketches are only written once their bucket is over, unless close_sketches is set.
+        """
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            closed_before = datetime.now() - timedelta(seconds=self.sketch_seconds)
+            for key in [key for key in self._sketches if close_sketches or key[1] <= closed_before]:
+                batch.append((LatencySketch.__table__, self._sketch_row(*key, self._sketches.pop(key))))
+            app = self._app
+        if not batch or app is None:
+            return 0
+
+        rows_by_table = {}
+        for table, values in batch:
+            rows_by_table.setdefault(table, []).append(values)
+
+        try:
+            with app.app_context(), db.engine.begin() as connection:
+                for table, rows in rows_by_table.items():
+                    connection.execute(table.insert(), rows)
+        except Exception as e:
+            print(f"Error writing {len(batch)} metrics: {e}")
+            with self._lock:
+                self._dropped += len(batch)
+            return 0
+
+        with self._lock:
+            self._written += len(batch)
+            self._flushes += 1
+        return len(batch)
+
+    def open_sketch(self, series):
+        """Getting a copy of this process's not yet written sketches for series, merged."""
+        sketch = LogHistogram()
+        with self._lock:
+            for (key_series, _), open_sketch in self._sketches.items():
+                if key_series == series:
+                    sketch.merge(open_sketch)
+        return sketch
+
+    def _sketch_row(self, series, bucket_start, sketch):
+        return {
+            'series': series,
+            'bucket_start': bucket_start,
+            'bucket_seconds': self.sketch_seconds,
+            'count': sketch.count,
+            'total': sketch.total,
+            'maximum': sketch.maximum,
+            'counts': sketch.to_json()
+        }
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'queued': len(self._buffer),
+                'open_sketches': len(self._sketches),
+                'max_buffer': self.max_buffer,
+                'written': self._written,
+                'dropped': self._dropped,
+                'flushes': self._flushes
+            }
+
+    def _ensure_flusher(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval or None)
+            self._wake.clear()
+            self.flush()
+
+
+# One writer per process; rows still queued at exit are flushed
+metrics_writer = MetricsWriter(Config.METRICS_FLUSH_INTERVAL, Config.METRICS_FLUSH_BATCH, Config.METRICS_MAX_BUFFER)
+atexit.register(metrics_writer.flush, close_sketches=True)
+
+
+def init_app(app):
+    """Binding the metrics writer to the app and applying its buffer settings."""
+    metrics_writer.configure(
+        app,
+        flush_interval=app.config.get('METRICS_FLUSH_INTERVAL', Config.METRICS_FLUSH_INTERVAL),
+        flush_batch=app.config.get('METRICS_FLUSH_BATCH', Config.METRICS_FLUSH_BATCH),
+        max_buffer=app.config.get('METRICS_MAX_BUFFER', Config.METRICS_MAX_BUFFER),
+        sketch_seconds=app.config.get('LATENCY_SKETCH_SECONDS', Config.LATENCY_SKETCH_SECONDS)
+    )
+
+
 # Metric Recording Functions
 def measure_response_time(route_name, start_time):
     """Record response time for a specific route."""
     duration = time.time() - start_time
-    metric = ResponseMetric(
-        route=route_name,
-        response_time=duration,
-        timestamp=datetime.now()
-    )
-    db.session.add(metric)
-    db.session.commit()
+    metrics_writer.record(ResponseMetric, route=route_name, response_time=duration)
+    metrics_writer.observe(f"route:{route_name}", duration)
     return duration
 
 
 def track_api_call(provider, endpoint, success):
     """Tracking API call success/failure."""
-    metric = APIMetric(
-        provider=provider,
-        endpoint=endpoint,
-        success=success,
-        timestamp=datetime.now()
-    )
-    db.session.add(metric)
-    db.session.commit()
+    metrics_writer.record(APIMetric, provider=provider, endpoint=endpoint, success=success)
+    registry.inc('upstream_calls_total', provider=provider, endpoint=endpoint,
+                 outcome='success' if success else 'failure')
 
 
 def track_cache_access(cache_key, hit):
     """Tracking cache hit/miss."""
-    metric = CacheMetric(
-        cache_key=cache_key,
-        hit=hit,
-        timestamp=datetime.now()
-    )
-    db.session.add(metric)
-    db.session.commit()
+    metrics_writer.record(CacheMetric, cache_key=cache_key, hit=hit)
 
 
 def track_response_with_cache_status(route_name, duration, cached):
     """Tracking response time with cache status."""
-    metric = CachedResponseMetric(
-        route=route_name,
-        response_time=duration,
-        cached=cached,
-        timestamp=datetime.now()
-    )
-    db.session.add(metric)
-    db.session.commit()
+    metrics_writer.record(CachedResponseMetric, route=route_name, response_time=duration, cached=cached)
+    metrics_writer.observe(f"cache:{route_name}:{'hit' if cached else 'miss'}", duration)
 
 
-def track_response_with_cache_status(route_name, duration, cached):
-    """Tracking response time with cache status."""
-    # Adding logging to debug the values
-    # print(f"Cache status: {'HIT' if cached else 'MISS'}, Route: {route_name}, Duration: {duration}ms")
-
-    metric = CachedResponseMetric(
-        route=route_name,
-        response_time=duration,
-        cached=cached,
-        timestamp=datetime.now()
-    )
-    db.session.add(metric)
-    db.session.commit()
+def track_job_run(job, item_count, fetched_count, duration, success=True):
+    """Tracking a scheduled job run."""
+    metrics_writer.record(JobMetric, job=job, item_count=item_count, fetched_count=fetched_count,
+                          duration=duration, success=success)
+    registry.observe('job_duration_seconds', duration, job=job, outcome='success' if success else 'failure')
+
+
+def track_request_trace(trace, slow_seconds):
+    """Tracking where a request's time went; slow requests are stored with their breakdown."""
+    breakdown = trace.breakdown()
+    for name, seconds in breakdown.items():
+        registry.inc('http_request_span_seconds_total', seconds, endpoint=trace.endpoint, span=name)
+    if trace.duration >= slow_seconds:
+        metrics_writer.record(RequestTiming, route=trace.endpoint, duration=trace.duration,
+                              spans=json.dumps(breakdown))
 
 
 # Metric Reporting Functions
+def get_latency_sketch(series, time_window=24):
+    """Merging a series' latency sketches over time window (hours), or None if nothing was recorded."""
+    cutoff_time = datetime.now() - timedelta(hours=time_window)
+    rows = db.session.query(
+        LatencySketch.counts, LatencySketch.count, LatencySketch.total, LatencySketch.maximum
+    ).filter(
+        LatencySketch.series == series,
+        LatencySketch.bucket_start >= cutoff_time
+    ).all()
+
+    # This worker's current bucket hasn't been written yet
+    sketch = metrics_writer.open_sketch(series)
+    for row in rows:
+        sketch.merge(LogHistogram.from_row(*row))
+    return sketch if sketch.count else None
+
+
 def get_average_response_time(route_name, time_window=24):
     """Get average response time for a route over time window (hours)."""
+    sketch = get_latency_sketch(f"route:{route_name}", time_window)
+    if sketch is not None:
+        return sketch.mean()
+
+    # Falling back to raw rows recorded before sketches existed
     cutoff_time = datetime.now() - timedelta(hours=time_window)
-    metrics = ResponseMetric.query.filter(
+    average = db.session.query(db.func.avg(ResponseMetric.response_time)).filter(
         ResponseMetric.route == route_name,
         ResponseMetric.timestamp >= cutoff_time
-    ).all()
+    ).scalar()
+    return average or 0
+
 
-    if not metrics:
-        return 0
+def get_percentile_response_time(route_name, percentile=95, time_window=24):
+    """Get the given percentile response time for a route over time window (hours)."""
+    return get_response_time_percentiles(route_name, (percentile,), time_window)[percentile]
 
-    total_time = sum([m.response_time for m in metrics])
-    return total_time / len(metrics)
 
+def get_response_time_percentiles(route_name, percentiles=(50, 95, 99), time_window=24):
+    """Get several percentile response times for a route at once, as percentile -> seconds."""
+    sketch = get_latency_sketch(f"route:{route_name}", time_window)
+    if sketch is not None:
+        return {p: sketch.quantile(p / 100) for p in percentiles}
 
-def get_percentile_response_time(route_name, percentile=95, time_window=24):
-    """Get the 95th percentile response time for a route over the last 24 hours."""
+    # Falling back to raw rows, letting the database pick each rank instead of loading them all
     cutoff_time = datetime.now() - timedelta(hours=time_window)
-    metrics = ResponseMetric.query.filter(
+    query = db.session.query(ResponseMetric.response_time).filter(
         ResponseMetric.route == route_name,
         ResponseMetric.timestamp >= cutoff_time
-    ).all()
+    )
+    total = query.count()
+    if not total:
+        return {p: 0 for p in percentiles}
 
-    if not metrics:
-        return 0
+    ordered = query.order_by(ResponseMetric.response_time)
+    return {p: ordered.offset(min(int(total * (p / 100)), total - 1)).limit(1).scalar() for p in percentiles}
 
-    response_times = sorted([m.response_time for m in metrics])
-    index = int(len(response_times) * (percentile / 100))
-    return response_times[min(index, len(response_times) - 1)]
 
+def rolled_up_until(kind):
+    """Getting the time up to which a kind's raw events are covered by rollups, or None."""
+    latest = db.session.query(MetricRollup.bucket_start, MetricRollup.bucket_seconds).filter(
+        MetricRollup.kind == kind
+    ).order_by(MetricRollup.bucket_start.desc()).first()
+    return latest.bucket_start + timedelta(seconds=latest.bucket_seconds) if latest else None
 
-def get_api_success_rate(provider, time_window=24):
-    """Get API success rate over time window (hours)."""
+
+def _count_events(kind, time_window, rollup_filter, raw_model, raw_filter, raw_hit):
+    """Counting (events, hits) over time window (hours) from the rollups plus raw rows not rolled up yet."""
     cutoff_time = datetime.now() - timedelta(hours=time_window)
-    total_calls = APIMetric.query.filter(
-        APIMetric.provider == provider,
-        APIMetric.timestamp >= cutoff_time
-    ).count()
+    rolled = db.session.query(db.func.sum(MetricRollup.count), db.func.sum(MetricRollup.hits)).filter(
+        MetricRollup.kind == kind,
+        rollup_filter,
+        MetricRollup.bucket_start >= cutoff_time
+    ).one()
+
+    raw_since = max(cutoff_time, rolled_up_until(kind) or cutoff_time)
+    raw = db.session.query(db.func.count(raw_model.id), db.func.sum(db.case((raw_hit, 1), else_=0))).filter(
+        raw_filter,
+        raw_model.timestamp >= raw_since
+    ).one()
 
-    successful_calls = APIMetric.query.filter(
-        APIMetric.provider == provider,
-        APIMetric.success == True,
-        APIMetric.timestamp >= cutoff_time
-    ).count()
+    return (rolled[0] or 0) + (raw[0] or 0), (rolled[1] or 0) + (raw[1] or 0)
+
+
+def get_api_success_rate(provider, time_window=24):
+    """Get API success rate over time window (hours)."""
+    total_calls, successful_calls = _count_events(
+        'api', time_window, MetricRollup.name == provider,
+        APIMetric, APIMetric.provider == provider, APIMetric.success == True
+    )
 
     if total_calls == 0:
         return 100.0
@@ -159,16 +403,11 @@ def get_api_success_rate(provider, time_window=24):
 
 
 def get_cache_hit_rate(time_window=24):
-    """Get cache hit rate over time window (hours)."""
-    cutoff_time = datetime.now() - timedelta(hours=time_window)
-    total_access = CacheMetric.query.filter(
-        CacheMetric.timestamp >= cutoff_time
-    ).count()
-
-    hits = CacheMetric.query.filter(
-        CacheMetric.hit == True,
-        CacheMetric.timestamp >= cutoff_time
-    ).count()
+    """Get cache hit rate over time window (hours), excluding negative cache lookups."""
+    total_access, hits = _count_events(
+        'cache', time_window, ~MetricRollup.name.startswith('negative_'),
+        CacheMetric, ~CacheMetric.cache_key.startswith('negative_'), CacheMetric.hit == True
+    )
 
     if total_access == 0:
         return 0.0
@@ -176,17 +415,78 @@ def get_cache_hit_rate(time_window=24):
     return (hits / total_access) * 100
 
 
+def get_negative_cache_hits(time_window=24):
+    """Get the number of upstream calls saved by the negative cache over time window (hours)."""
+    _, hits = _count_events(
+        'cache', time_window, MetricRollup.name.startswith('negative_'),
+        CacheMetric, CacheMetric.cache_key.startswith('negative_'), CacheMetric.hit == True
+    )
+    return hits
+
+
 def get_average_response_by_cache_status(route_name, cached=True, time_window=24):
     """Get average response time based on cache status."""
+    sketch = get_latency_sketch(f"cache:{route_name}:{'hit' if cached else 'miss'}", time_window)
+    if sketch is not None:
+        return sketch.mean()
+
     cutoff_time = datetime.now() - timedelta(hours=time_window)
-    metrics = CachedResponseMetric.query.filter(
+    average = db.session.query(db.func.avg(CachedResponseMetric.response_time)).filter(
         CachedResponseMetric.route == route_name,
         CachedResponseMetric.cached == cached,
         CachedResponseMetric.timestamp >= cutoff_time
-    ).all()
+    ).scalar()
+    return average or 0
 
-    if not metrics:
-        return 0
 
-    total_time = sum([m.response_time for m in metrics])
-    return total_time / len(metrics)
\ No newline at end of file
+def get_request_time_breakdown(time_window=24):
+    """Get the average time per span of slow requests, per route, routes with the most slow time first."""
+    cutoff_time = datetime.now() - timedelta(hours=time_window)
+    rows = db.session.query(RequestTiming.route, RequestTiming.duration, RequestTiming.spans).filter(
+        RequestTiming.timestamp >= cutoff_time
+    ).all()
+
+    routes = {}
+    for route, duration, spans in rows:
+        summary = routes.setdefault(route, {'route': route, 'count': 0, 'total': 0.0, 'max': 0.0, 'spans': {}})
+        summary['count'] += 1
+        summary['total'] += duration
+        summary['max'] = max(summary['max'], duration)
+        for name, seconds in json.loads(spans).items():
+            summary['spans'][name] = summary['spans'].get(name, 0.0) + seconds
+
+    breakdown = []
+    for summary in sorted(routes.values(), key=lambda s: s['total'], reverse=True):
+        spans = sorted(summary['spans'].items(), key=lambda item: item[1], reverse=True)
+        breakdown.append({
+            'route': summary['route'],
+            'count': summary['count'],
+            'average': summary['total'] / summary['count'],
+            'max': summary['max'],
+            'spans': [{'name': name, 'average': seconds / summary['count'],
+                       'share': seconds / summary['total'] * 100 if summary['total'] else 0}
+                      for name, seconds in spans]
+        })
+    return breakdown
+
+
+def get_slowest_requests(time_window=24, limit=20):
+    """Get the slowest recorded requests with their breakdown, slowest first."""
+    cutoff_time = datetime.now() - timedelta(hours=time_window)
+    rows = RequestTiming.query.filter(
+        RequestTiming.timestamp >= cutoff_time
+    ).order_by(RequestTiming.duration.desc()).limit(limit).all()
+
+    return [{
+        'route': row.route,
+        'duration': row.duration,
+        'timestamp': row.timestamp,
+        'spans': sorted(json.loads(row.spans).items(), key=lambda item: item[1], reverse=True)
+    } for row in rows]
+
+
+def get_recent_job_runs(job, limit=5):
+    """Get the most recent runs of a scheduled job."""
+    return JobMetric.query.filter(
+        JobMetric.job == job
+    ).order_by(JobMetric.timestamp.desc()).limit(limit).all()
@@ -0,0 +1,302 @@
+import json
+import math
+import os
+import threading
+import time
+
+from config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 300, 900)
+
+# name -> (type, help, label names, histogram buckets)
+METRICS = {
+    'http_request_duration_seconds': (
+        'histogram', 'Time spent handling requests.', ('endpoint', 'status'), LATENCY_BUCKETS),
+    'http_request_span_seconds_total': (
+        'counter', 'Request time by span: upstream, db, named compute sections and other.', ('endpoint', 'span'),
+        None),
+    'upstream_request_duration_seconds': (
+        'histogram', 'Time spent on each HTTP attempt to a market data provider.', ('function', 'outcome'),
+        LATENCY_BUCKETS),
+    'upstream_calls_total': (
+        'counter', 'Market data provider calls by outcome.', ('provider', 'endpoint', 'outcome'), None),
+    'cache_hits_total': ('counter', 'Cache lookups served from the cache.', ('cache',), None),
+    'cache_misses_total': ('counter', 'Cache lookups that had to be computed or fetched.', ('cache',), None),
+    'cache_evictions_total': ('counter', 'Entries evicted to stay within the cache limits.', ('cache',), None),
+    'cache_entries': ('gauge', 'Entries held in worker memory.', ('cache',), None),
+    'cache_bytes': ('gauge', 'Approximate size of the entries held in worker memory.', ('cache',), None),
+    'job_duration_seconds': ('histogram', 'Scheduled job run time.', ('job', 'outcome'), JOB_BUCKETS),
+    'db_pool_size': ('gauge', 'Connections the database pool keeps open.', (), None),
+    'db_pool_checked_out': ('gauge', 'Database connections currently in use.', (), None),
+    'db_pool_overflow': ('gauge', 'Database connections open beyond the pool size.', (), None),
+    'metrics_writer_queued': ('gauge', 'Metric rows waiting to be written to the database.', (), None),
+    'metrics_writer_dropped_total': ('counter', 'Metric rows dropped because the buffer was full.', (), None),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, **extra):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra.items()]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_bound(bound):
+    return '+Inf' if math.isinf(bound) else repr(float(bound))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms rendered in the Prometheus text format.
+
+    Recording only touches memory. When a directory is set, every worker
+    writes a snapshot of its values there every export_interval seconds and
+    a scrape on any worker adds up all of them: counters and histograms
+    from every worker that ever wrote, gauges only from workers still alive.
+    Values read from other objects (cache sizes, pool stats) come from
+    collectors, run at most once per export_interval.
+    """
+
+    def __init__(self, directory=None, export_interval=5):
+        self._lock = threading.Lock()
+        self._values = {}  # (name, label values) -> number
+        self._histograms = {}  # (name, label values) -> [bucket counts with +Inf last, sum]
+        self._collectors = []
+        self._collected_at = 0
+        self._thread = None
+        self._app = None
+        self.configure(None, directory, export_interval)
+
+    def configure(self, app, directory=None, export_interval=5):
+        with self._lock:
+            self._app = app
+            self.directory = directory
+            self.export_interval = export_interval
+            self.pid = os.getpid()
+            self._collected_at = 0
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._ensure_exporter()
+
+    def set(self, name, value, **labels):
+        """Setting a gauge, or a counter kept by another object, to its current value."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        buckets = METRICS[name][3]
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            histogram[0][index] += 1
+            histogram[1] += value
+            self._ensure_exporter()
+
+    def add_collector(self, collector):
+        """Registering a function called with the registry to set values it reads from elsewhere."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Getting every worker's values, added up, in the Prometheus text exposition format."""
+        self._collect()
+        values, histograms = self._snapshot()
+
+        if self.directory:
+            self._write(values, histograms)
+            for pid, other_values, other_histograms in self._read_others():
+                alive = _pid_alive(pid)
+                for key, value in other_values.items():
+                    if METRICS[key[0]][0] == 'gauge' and not alive:
+                        continue
+                    values[key] = values.get(key, 0) + value
+                for key, (counts, total) in other_histograms.items():
+                    if key in histograms:
+                        histograms[key] = [[a + b for a, b in zip(histograms[key][0], counts)],
+                                           histograms[key][1] + total]
+                    else:
+                        histograms[key] = [counts, total]
+
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'histogram':
+                series = sorted((key[1], value) for key, value in histograms.items() if key[0] == name)
+                for label_values, (counts, total) in series:
+                    cumulative = 0
+                    for bound, count in zip(buckets + (math.inf,), counts):
+                        cumulative += count
+                        labels = _format_labels(label_names, label_values, le=_format_bound(bound))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(label_names, label_values)
+                    lines.append(f"{name}_sum{labels} {total}")
+                    lines.append(f"{name}_count{labels} {cumulative}")
+            else:
+                series = sorted((key[1], value) for key, value in values.items() if key[0] == name)
+                for label_values, value in series:
+                    lines.append(f"{name}{_format_labels(label_names, label_values)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Running the collectors and writing this worker's snapshot for the others to read."""
+        if not self.directory:
+            return
+        self._collect()
+        self._write(*self._snapshot())
+
+    def _key(self, name, labels):
+        return name, tuple(str(labels.get(label, '')) for label in METRICS[name][2])
+
+    def _snapshot(self):
+        with self._lock:
+            return dict(self._values), {key: [list(counts), total] for key, (counts, total) in
+                                        self._histograms.items()}
+
+    def _collect(self):
+        if time.time() - self._collected_at < self.export_interval:
+            return
+        self._collected_at = time.time()
+        for collector in self._collectors:
+            try:
+                if self._app is not None:
+                    with self._app.app_context():
+                        collector(self)
+                else:
+                    collector(self)
+            except Exception as e:
+                print(f"Error collecting metrics from {collector.__name__}: {e}")
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _write(self, values, histograms):
+        snapshot = {
+            'values': [[name, list(labels), value] for (name, labels), value in values.items()],
+            'histograms': [[name, list(labels), counts, total] for (name, labels), (counts, total) in
+                           histograms.items()]
+        }
+        tmp_path = f"{self._path(self.pid)}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(tmp_path, self._path(self.pid))
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def _read_others(self):
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return
+        for filename in filenames:
+            pid = filename[:-len('.json')]
+            if not filename.endswith('.json') or not pid.isdigit() or int(pid) == self.pid:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            values = {(name, tuple(labels)): value for name, labels, value in snapshot['values']
+                      if name in METRICS}
+            histograms = {(name, tuple(labels)): [counts, total] for name, labels, counts, total in
+                          snapshot['histograms'] if name in METRICS}
+            yield int(pid), values, histograms
+
+    def _ensure_exporter(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self.directory and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.export_interval)
+            self.export()
+
+
+# One registry per worker; workers see each other through METRICS_EXPORT_DIR
+registry = MetricsRegistry(Config.METRICS_EXPORT_DIR, Config.METRICS_EXPORT_INTERVAL)
+
+
+def _collect_caches(registry):
+    from app.services.cache_service import quote_cache
+    from app.services.response_cache import response_cache
+
+    quote = quote_cache.get_stats()
+    registry.set('cache_hits_total', quote['hits'], cache='quote')
+    registry.set('cache_misses_total', quote['misses'], cache='quote')
+    registry.set('cache_evictions_total', quote['evictions'], cache='quote')
+    if quote['backend'].startswith('memory'):
+        registry.set('cache_entries', quote['entries'], cache='quote')
+        registry.set('cache_bytes', quote['bytes'], cache='quote')
+
+    responses = response_cache.get_stats()
+    registry.set('cache_hits_total', sum(e['hits'] for e in responses['endpoints'].values()), cache='response')
+    registry.set('cache_misses_total', sum(e['misses'] for e in responses['endpoints'].values()), cache='response')
+    registry.set('cache_evictions_total', responses['evictions'], cache='response')
+    registry.set('cache_entries', responses['entries'], cache='response')
+    registry.set('cache_bytes', responses['bytes'], cache='response')
+
+
+def _collect_database(registry):
+    from app import db
+    from app.monitoring.metrics import metrics_writer
+
+    pool = db.engine.pool
+    # SQLite's pools don't track checkouts
+    if hasattr(pool, 'checkedout'):
+        registry.set('db_pool_size', pool.size())
+        registry.set('db_pool_checked_out', pool.checkedout())
+        registry.set('db_pool_overflow', max(pool.overflow(), 0))
+
+    writer = metrics_writer.get_stats()
+    registry.set('metrics_writer_queued', writer['queued'])
+    registry.set('metrics_writer_dropped_total', writer['dropped'])
+
+
+def init_app(app):
+    """Binding the registry to the app, timing every request and registering the collectors."""
+    from flask import g, request
+
+    registry.configure(
+        app,
+        directory=app.config.get('METRICS_EXPORT_DIR', Config.METRICS_EXPORT_DIR),
+        export_interval=app.config.get('METRICS_EXPORT_INTERVAL', Config.METRICS_EXPORT_INTERVAL)
+    )
+    registry.add_collector(_collect_caches)
+    registry.add_collector(_collect_database)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def observe_request_duration(response):
+        started_at = g.pop('request_started_at', None)
+        if started_at is not None:
+            registry.observe('http_request_duration_seconds', time.perf_counter() - started_at,
+                             endpoint=request.endpoint or 'unmatched', status=response.status_code)
+        return response
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.monitoring.histogram import LogHistogram
+from app.monitoring.metrics import (
+    APIMetric, CacheMetric, CachedResponseMetric, LatencySketch, MetricRollup, RequestTiming, ResponseMetric,
+    rolled_up_until
+)
+from config import Config
+
+MINUTE = 60
+HOUR = 3600
+DELETE_BATCH = 10000
+
+# Raw tables rolled up into counters: kind -> (model, column naming the series, condition counted as a hit)
+COUNTED_EVENTS = {
+    'api': (APIMetric, APIMetric.provider, APIMetric.success),
+    'cache': (CacheMetric, CacheMetric.cache_key, CacheMetric.hit),
+}
+
+
+def _floor(moment, seconds):
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(seconds=(moment - midnight).total_seconds() // seconds * seconds)
+
+
+def rollup_events(now=None):
+    """Counting raw API calls and cache accesses into per-minute rollups. Returns the number of events rolled up."""
+    now = now or datetime.now()
+    # Buffered rows carry the time they were recorded, so the newest minutes are left until they have landed
+    end = _floor(now - timedelta(seconds=Config.METRICS_ROLLUP_LAG), MINUTE)
+    rolled = 0
+
+    for kind, (model, name_column, hit_column) in COUNTED_EVENTS.items():
+        start = rolled_up_until(kind)
+        if start is None:
+            first = db.session.query(db.func.min(model.timestamp)).scalar()
+            if first is None:
+                continue
+            start = _floor(first, MINUTE)
+        if start >= end:
+            continue
+
+        counters = {}
+        rows = db.session.query(model.timestamp, name_column, hit_column).filter(
+            model.timestamp >= start,
+            model.timestamp < end
+        ).yield_per(5000)
+        for timestamp, name, hit in rows:
+            counter = counters.setdefault((name, _floor(timestamp, MINUTE)), [0, 0])
+            counter[0] += 1
+            counter[1] += bool(hit)
+
+        if counters:
+            try:
+                db.session.execute(MetricRollup.__table__.insert(), [
+                    {'kind': kind, 'name': name, 'bucket_start': bucket_start, 'bucket_seconds': MINUTE,
+                     'count': count, 'hits': hits}
+                    for (name, bucket_start), (count, hits) in counters.items()
+                ])
+                db.session.commit()
+            except IntegrityError:
+                # Another run rolled these minutes up first
+                db.session.rollback()
+                continue
+            rolled += sum(count for count, _ in counters.values())
+        db.session.commit()
+
+    return rolled
+
+
+def compact_rollups(now=None):
+    """Merging minute rollups and latency sketches older than the minute retention into hourly rows."""
+    now = now or datetime.now()
+    cutoff = _floor(now - timedelta(hours=Config.METRICS_MINUTE_RETENTION_HOURS), HOUR)
+    try:
+        compacted = _compact_before(cutoff)
+        db.session.commit()
+    except IntegrityError:
+        # Another run compacted the same hours first; its hourly rows stand
+        db.session.rollback()
+        return 0
+    return compacted
+
+
+def _compact_before(cutoff):
+    counters = {}
+    for row in MetricRollup.query.filter(MetricRollup.bucket_seconds < HOUR, MetricRollup.bucket_start < cutoff):
+        counter = counters.setdefault((row.kind, row.name, _floor(row.bucket_start, HOUR)), [0, 0])
+        counter[0] += row.count
+        counter[1] += row.hits
+    MetricRollup.query.filter(
+        MetricRollup.bucket_seconds < HOUR,
+        MetricRollup.bucket_start < cutoff
+    ).delete(synchronize_session=False)
+    if counters:
+        db.session.execute(MetricRollup.__table__.insert(), [
+            {'kind': kind, 'name': name, 'bucket_start': bucket_start, 'bucket_seconds': HOUR,
+             'count': count, 'hits': hits}
+            for (kind, name, bucket_start), (count, hits) in counters.items()
+        ])
+
+    # Every worker writes its own sketch per minute; an hour of them becomes one sketch per series
+    sketches = {}
+    for row in LatencySketch.query.filter(LatencySketch.bucket_seconds < HOUR, LatencySketch.bucket_start < cutoff):
+        key = (row.series, _floor(row.bucket_start, HOUR))
+        sketches.setdefault(key, LogHistogram()).merge(
+            LogHistogram.from_row(row.counts, row.count, row.total, row.maximum))
+    LatencySketch.query.filter(
+        LatencySketch.bucket_seconds < HOUR,
+        LatencySketch.bucket_start < cutoff
+    ).delete(synchronize_session=False)
+    if sketches:
+        db.session.execute(LatencySketch.__table__.insert(), [
+            {'series': series, 'bucket_start': bucket_start, 'bucket_seconds': HOUR, 'count': sketch.count,
+             'total': sketch.total, 'maximum': sketch.maximum, 'counts': sketch.to_json()}
+            for (series, bucket_start), sketch in sketches.items()
+        ])
+
+    return len(counters) + len(sketches)
+
+
+def prune_metrics(now=None):
+    """Deleting raw metric rows and rollups past their retention. Returns the number of rows deleted."""
+    now = now or datetime.now()
+    raw_cutoff = now - timedelta(days=Config.METRICS_RAW_RETENTION_DAYS)
+    deleted = 0
+
+    for model in (ResponseMetric, CachedResponseMetric, RequestTiming):
+        deleted += _delete_before(model, model.timestamp, raw_cutoff)
+
+    # Counted events are only dropped once they are part of a rollup
+    for kind, (model, _, _) in COUNTED_EVENTS.items():
+        rolled_until = rolled_up_until(kind)
+        if rolled_until is not None:
+            deleted += _delete_before(model, model.timestamp, min(raw_cutoff, rolled_until))
+
+    rollup_cutoff = now - timedelta(days=Config.METRICS_ROLLUP_RETENTION_DAYS)
+    deleted += _delete_before(MetricRollup, MetricRollup.bucket_start, rollup_cutoff)
+    deleted += _delete_before(LatencySketch, LatencySketch.bucket_start, rollup_cutoff)
+    return deleted
+
+
+def _delete_before(model, column, cutoff):
+    # Deleting in batches so months of backlog don't hold one huge transaction
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.session.query(model.id).filter(column < cutoff).limit(DELETE_BATCH)]
+        if not ids:
+            return deleted
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
@@ -0,0 +1,149 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config import Config
+
+# (trace, innermost open span) for the request being handled in this context
+_current = ContextVar('request_trace', default=None)
+
+
+class RequestTrace:
+    """Where one request's time went: upstream HTTP, database, named compute sections and the rest.
+
+    Each span keeps only its own time: a section that waits on the database
+    is charged for the time outside those queries. Whatever no span covers
+    is reported as 'other'. Spans from worker threads add up, so with
+    concurrent fetches 'upstream' can exceed the request's wall time.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started_at = time.perf_counter()
+        self.duration = None
+        self.spans = {}  # name -> seconds
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, parent=None, elapsed=None):
+        """Adding seconds to a span and charging elapsed (by default the same) to the enclosing span."""
+        with self._lock:
+            if self.duration is not None:
+                return  # e.g. a background refresh outliving the request
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+            if parent is not None:
+                parent.nested += seconds if elapsed is None else elapsed
+
+    def finish(self):
+        with self._lock:
+            self.duration = time.perf_counter() - self.started_at
+            self.spans['other'] = max(self.duration - sum(self.spans.values()), 0.0)
+        return self
+
+    def breakdown(self):
+        """Getting seconds per span name."""
+        with self._lock:
+            return dict(self.spans)
+
+
+class _OpenSpan:
+    def __init__(self):
+        self.nested = 0.0  # inclusive time of the spans opened inside this one
+
+
+def current_trace():
+    state = _current.get()
+    return state[0] if state else None
+
+
+def start_trace(endpoint):
+    """Starting a trace for the current request. Returns the token end_trace needs."""
+    return _current.set((RequestTrace(endpoint), None))
+
+
+def end_trace(token):
+    """Finishing the current request's trace and detaching it. Returns the trace."""
+    trace = current_trace()
+    try:
+        _current.reset(token)
+    except ValueError:
+        _current.set(None)  # the token came from another context
+    return trace.finish() if trace else None
+
+
+@contextmanager
+def attach(trace):
+    """Recording spans from another thread into trace, e.g. a worker fetching for the request."""
+    if trace is None:
+        yield
+        return
+    token = _current.set((trace, None))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Timing a block, or a decorated function, as part of the current request's trace.
+
+    Outside a traced request this does nothing, so services can be
+    instrumented without caring who calls them.
+    """
+    state = _current.get()
+    if state is None:
+        yield
+        return
+
+    trace, parent = state
+    opened = _OpenSpan()
+    token = _current.set((trace, opened))
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started_at
+        _current.reset(token)
+        trace.add(name, max(duration - opened.nested, 0.0), parent, elapsed=duration)
+
+
+def record(name, seconds):
+    """Adding an already measured leaf span (e.g. one SQL statement) to the current trace."""
+    state = _current.get()
+    if state is not None:
+        state[0].add(name, seconds, state[1])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started_at')
+    if started:
+        record('db', time.perf_counter() - started.pop())
+
+
+def init_app(app):
+    """Tracing every request and recording the slow ones with their breakdown."""
+    from flask import g, request
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app.monitoring.metrics import track_request_trace
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_trace():
+        g.trace_token = start_trace(request.endpoint or 'unmatched')
+
+    @app.teardown_request
+    def end_request_trace(exc=None):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            track_request_trace(end_trace(token),
+                                app.config.get('TRACE_SLOW_REQUEST_SECONDS', Config.TRACE_SLOW_REQUEST_SECONDS))
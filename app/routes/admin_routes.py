@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, current_app
 from flask_login import login_required, current_user
 # from app.utils.decorators import admin_required
 from app.models.user import User
@@ -10,22 +10,24 @@ from sqlalchemy import func
 from werkzeug.security import generate_password_hash
 from app.models.portfolio import Holding
 from app.routes.portfolio_routes import market_service
+from app.services.cache_service import quote_cache
+from app.services.response_cache import response_cache
 from app.models.recommendation import RecommendationFeedback
 
 from app.monitoring.metrics import (
+    metrics_writer,
     get_average_response_time,
-    get_percentile_response_time,
+    get_response_time_percentiles,
     get_api_success_rate,
     get_cache_hit_rate,
-    get_average_response_by_cache_status
+    get_negative_cache_hits,
+    get_average_response_by_cache_status,
+    get_recent_job_runs,
+    get_request_time_breakdown,
+    get_slowest_requests
 )
 
-from app.monitoring.benchmarks import (
-    benchmark_portfolio_valuation,
-    benchmark_risk_analysis,
-    benchmark_recommendation_generation,
-    benchmark_historical_performance
-)
+from app.monitoring.benchmarks import run_benchmarks as run_feature_benchmarks
 
 
 bp = Blueprint('admin', __name__)
@@ -354,32 +356,54 @@ def performance_metrics():
             'historical_performance': get_average_response_time('portfolio.get_historical_performance')
         },
         'percentile_response_times': {
-            'portfolio_value': get_percentile_response_time('portfolio.get_holdings'),
-            'risk_analysis': get_percentile_response_time('portfolio.get_risk_analysis'),
-            'recommendations': get_percentile_response_time('portfolio.get_enhanced_recommendations'),
-            'historical_performance': get_percentile_response_time('portfolio.get_historical_performance')
+            'portfolio_value': get_response_time_percentiles('portfolio.get_holdings'),
+            'risk_analysis': get_response_time_percentiles('portfolio.get_risk_analysis'),
+            'recommendations': get_response_time_percentiles('portfolio.get_enhanced_recommendations'),
+            'historical_performance': get_response_time_percentiles('portfolio.get_historical_performance')
         },
         'system_efficiency': {
             'api_success_rate': get_api_success_rate('alpha_vantage'),
             'cache_hit_rate': get_cache_hit_rate(),
+            'negative_cache_hits': get_negative_cache_hits(),
             'cached_response_time': get_average_response_by_cache_status('get_stock_data', True),
             'fresh_response_time': get_average_response_by_cache_status('get_stock_data', False)
-        }
+        },
+        'quote_cache': quote_cache.get_stats(),
+        'response_cache': response_cache.get_stats(),
+        'metrics_writer': metrics_writer.get_stats(),
+        'warmup_runs': get_recent_job_runs('warm_market_caches')
     }
 
     return render_template('admin/performance_metrics.html', metrics=metrics)
 
 
+@bp.route('/response-cache/clear', methods=['POST'])
+@login_required
+@admin_required
+def clear_response_cache():
+    endpoint = request.form.get('endpoint') or None
+    response_cache.invalidate(endpoint)
+    flash(f"Cleared cached responses for {endpoint or 'all market endpoints'}")
+    return redirect(url_for('admin.performance_metrics'))
+
+
+@bp.route('/request-timings')
+@login_required
+@admin_required
+def request_timings():
+    hours = request.args.get('hours', 24, type=int)
+    return render_template('admin/request_timings.html',
+                           hours=hours,
+                           routes=get_request_time_breakdown(hours),
+                           slowest=get_slowest_requests(hours),
+                           slow_seconds=current_app.config['TRACE_SLOW_REQUEST_SECONDS'])
+
+
 @bp.route('/run-benchmarks/<int:portfolio_id>/<int:user_id>')
 @login_required
 @admin_required
 def run_benchmarks(portfolio_id, user_id):
-    results = {
-        'portfolio_valuation': benchmark_portfolio_valuation(portfolio_id),
-        'risk_analysis': benchmark_risk_analysis(portfolio_id),
-        'recommendation_generation': benchmark_recommendation_generation(portfolio_id, user_id),
-        'historical_performance': benchmark_historical_performance(portfolio_id)
-    }
+    results = run_feature_benchmarks(portfolio_id, user_id)
 
     return render_template('admin/benchmark_results.html', results=results)
 
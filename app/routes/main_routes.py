@@ -1,7 +1,20 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, current_app, abort, Response
+
+from app.monitoring.prometheus import registry
 
 bp = Blueprint('main', __name__)
 
 @bp.route('/')
 def home():
-    return render_template('home.html')
\ No newline at end of file
+    return render_template('home.html')
+
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Serving every worker's counters and histograms for Prometheus; never queries the database."""
+    token = current_app.config.get('METRICS_SCRAPE_TOKEN')
+    if not token and current_app.config.get('METRICS_REQUIRE_TOKEN'):
+        abort(403)  # Misconfigured: the token is required but none was set
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        abort(401)
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
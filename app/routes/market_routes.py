@@ -1,16 +1,25 @@
 # app/routes/market_routes.py
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, Response
 from flask_login import login_required, current_user
 from app.services.market_service import MarketService
-import requests
 import time
 from datetime import datetime, timedelta
 import os
-from functools import lru_cache
+import json
 import logging
+import numpy as np
 
 from app.services.news_service import NewsService
+from app.services.http_client import http_client
+from app.services.price_store import PriceStore, CLOSE
+from app.services.downsampling import downsample
+from app.services.async_market_client import AsyncMarketClient
+from app.services.company_index import CompanyIndex
+from app.services.response_cache import response_cache, no_store
+from app.services.symbol_index import symbol_index
+from app.services.quote_stream import quote_stream, QUOTE_FIELDS
 from app.routes import track_request_time
+from config import Config
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,9 +28,9 @@ logger = logging.getLogger(__name__)
 bp = Blueprint('market', __name__)
 market_service = MarketService()
 news_service = NewsService(market_service)
-
-# Cache configuration
-CACHE_TIMEOUT = 300  # 5 minutes
+price_store = PriceStore(market_service)
+async_client = AsyncMarketClient(market_service, news_service)
+company_index = CompanyIndex(market_service)
 
 
 @bp.route('/overview')
@@ -72,7 +81,7 @@ def get_stock_financials(symbol):
             'apikey': market_service.api_key
         }
 
-        response = requests.get(market_service.base_url, params=params)
+        response = http_client.get(market_service.base_url, params=params)
         data = response.json()
 
         # Processing the data into a Simplified Format
@@ -97,14 +106,7 @@ def get_stock_financials(symbol):
 @login_required
 def get_stock_analysis(symbol):
     try:
-        params = {
-            'function': 'OVERVIEW',
-            'symbol': symbol,
-            'apikey': market_service.api_key
-        }
-
-        response = requests.get(market_service.base_url, params=params)
-        data = response.json()
+        data = market_service.get_company_overview(symbol)
 
         # Extracting relevant metrics and data
         analysis = {
@@ -127,14 +129,12 @@ def get_stock_analysis(symbol):
 @login_required
 def get_similar_stocks(symbol):
     try:
-        #Getting the company info to determine sector/industry
-        company_info = get_company_info(symbol)
+        #Getting the sector from the local company index
+        sector = company_index.get_sectors([symbol])[symbol]
 
-        if not company_info or 'sector' not in company_info:
+        if sector == 'Unknown':
             return jsonify([])
 
-        sector = company_info.get('sector')
-
         # Predefined similar stocks for common sectors
         sector_stocks = {
             'Technology': ['AAPL', 'MSFT', 'GOOGL', 'META', 'NVDA'],
@@ -148,9 +148,12 @@ def get_similar_stocks(symbol):
         similar_stocks = sector_stocks.get(sector, [])
         similar_stocks = [s for s in similar_stocks if s != symbol][:4]  # Limitting it to 4
 
+        # Fetching the quotes concurrently
+        quotes = async_client.map(async_client.quote, similar_stocks)
+
         result = []
         for similar_symbol in similar_stocks:
-            stock_data = market_service.get_stock_data(similar_symbol)
+            stock_data = quotes.get(similar_symbol)
             if stock_data:
                 result.append({
                     'symbol': similar_symbol,
@@ -169,29 +172,15 @@ def get_similar_stocks(symbol):
 @login_required
 def get_stock_forecast(symbol):
     try:
-        #Getting historical data to calculate simple forecast
-        params = {
-            'function': 'TIME_SERIES_DAILY',
-            'symbol': symbol,
-            'apikey': market_service.api_key,
-            'outputsize': 'compact'
-        }
+        #Getting the latest 30 days of data to calculate simple forecast
+        bars = price_store.get_daily_bars(symbol, limit=30)
 
-        response = requests.get(market_service.base_url, params=params)
-        data = response.json()
-
-        if 'Time Series (Daily)' not in data:
+        if len(bars) < 2:
             return jsonify({'error': 'No data available for forecast'}), 404
 
-        # Extracting closing prices
-        time_series = data['Time Series (Daily)']
-        dates = list(time_series.keys())
-        dates.sort()  # Sorting the data in chronological order
-
-        # Getting the latest 30 days of data
-        latest_prices = []
-        for date in dates[-30:]:
-            latest_prices.append(float(time_series[date]['4. close']))
+        # Extracting closing prices (already in chronological order)
+        dates = bars['date'].dt.strftime('%Y-%m-%d').tolist()
+        latest_prices = bars['close'].tolist()
 
         # Calculating a simple linear forecast for next 30 days
         current_price = latest_prices[-1]
@@ -228,7 +217,7 @@ def get_stock_forecast(symbol):
 
 @bp.route('/indices')
 @login_required
-@lru_cache(maxsize=1)
+@response_cache.cached(Config.INDICES_RESPONSE_TTL)
 def get_indices():
     """Getting  current values for major market indices"""
     try:
@@ -236,25 +225,16 @@ def get_indices():
         # Using ETFs that track the major indices
         symbols = ['SPY', 'QQQ', 'DIA']  # S&P 500, NASDAQ, Dow Jones
 
-        for symbol in symbols:
-            params = {
-                'function': 'GLOBAL_QUOTE',
-                'symbol': symbol,
-                'apikey': market_service.api_key
-            }
-
-            response = requests.get(market_service.base_url, params=params)
-            data = response.json()
-
-            if 'Global Quote' in data and data['Global Quote']:
-                quote = data['Global Quote']
-                price = float(quote.get('05. price', 0))
-                change = float(quote.get('09. change', 0))
+        # Quotes are shared with the rest of the app and cached with market-hours-aware expiry
+        quotes = async_client.map(async_client.quote, symbols)
 
+        for symbol in symbols:
+            quote = quotes.get(symbol)
+            if quote:
                 index_data = {
-                    'price': format_price(price),
-                    'change': format_price(change),
-                    'changePercent': quote.get('10. change percent', '0%').rstrip('%')
+                    'price': format_price(quote['current_price']),
+                    'change': format_price(quote['daily_change']),
+                    'changePercent': f"{quote['daily_change_percent']:.2f}"
                 }
 
                 if symbol == 'SPY':
@@ -264,10 +244,8 @@ def get_indices():
                 elif symbol == 'DIA':
                     indices['dow'] = index_data
 
-            # Add delay to avoid API rate limiting
-            time.sleep(1)
-
         # If any index is missing, add placeholder
+        complete = len(indices) == 3
         if 'sp500' not in indices:
             indices['sp500'] = {'price': 'N/A', 'change': '0', 'changePercent': '0'}
         if 'nasdaq' not in indices:
@@ -275,18 +253,19 @@ def get_indices():
         if 'dow' not in indices:
             indices['dow'] = {'price': 'N/A', 'change': '0', 'changePercent': '0'}
 
-        return jsonify(indices)
+        return jsonify(indices) if complete else no_store(jsonify(indices))
     except Exception as e:
         logger.error(f"Error fetching indices: {e}")
-        return jsonify({
+        return no_store(jsonify({
             'sp500': {'price': 'N/A', 'change': 'N/A', 'changePercent': 'N/A'},
             'nasdaq': {'price': 'N/A', 'change': 'N/A', 'changePercent': 'N/A'},
             'dow': {'price': 'N/A', 'change': 'N/A', 'changePercent': 'N/A'}
-        })
+        }))
 
 
 @bp.route('/movers')
 @login_required
+@response_cache.cached(Config.MARKET_MOVERS_TTL)
 def get_market_movers():
     """Get top gainers, losers, and most active stocks"""
     try:
@@ -294,13 +273,7 @@ def get_market_movers():
         # This would typically require a premium API or calculation from a larger dataset
         # Here we're using the TOP_GAINERS_LOSERS endpoint which is available in some plans
 
-        params = {
-            'function': 'TOP_GAINERS_LOSERS',
-            'apikey': market_service.api_key
-        }
-
-        response = requests.get(market_service.base_url, params=params)
-        data = response.json()
+        data = market_service.get_market_movers() or {}
 
         gainers = []
         losers = []
@@ -338,6 +311,7 @@ def get_market_movers():
 
         # If any list is empty (e.g., if the endpoint is not available in your plan),
         # fill with placeholder data for demonstration
+        complete = bool(gainers and losers and most_active)
         if not gainers:
             # Use top stocks as placeholders
             top_stocks = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA']
@@ -353,11 +327,12 @@ def get_market_movers():
             active_stocks = ['TSLA', 'AAPL', 'AMD', 'INTC', 'PFE']
             most_active = generate_placeholder_stocks(active_stocks, is_gainer=None)
 
-        return jsonify({
+        response = jsonify({
             'gainers': gainers,
             'losers': losers,
             'mostActive': most_active
         })
+        return response if complete else no_store(response)
     except Exception as e:
         logger.error(f"Error fetching market movers: {e}")
         return jsonify({'error': 'Failed to fetch market movers'}), 500
@@ -365,6 +340,7 @@ def get_market_movers():
 
 @bp.route('/news')
 @login_required
+@response_cache.cached(Config.MARKET_NEWS_RESPONSE_TTL, market_hours=False)
 def get_market_news():
     """Getting latest market news"""
     try:
@@ -382,7 +358,7 @@ def get_market_news():
         if symbol:
             params['tickers'] = symbol
 
-        response = requests.get(market_service.base_url, params=params)
+        response = http_client.get(market_service.base_url, params=params)
         data = response.json()
 
         news_items = []
@@ -405,7 +381,9 @@ def get_market_news():
                     'sentiment': item.get('overall_sentiment_label', 'neutral')
                 })
 
-        return jsonify({'news': news_items})
+        # No feed means a rate limit or error note, which shouldn't be kept as an empty list
+        response = jsonify({'news': news_items})
+        return response if 'feed' in data else no_store(response)
     except Exception as e:
         logger.error(f"Error fetching market news: {e}")
         return jsonify({'error': 'Failed to fetch market news'}), 500
@@ -421,22 +399,30 @@ def search_stock():
         return jsonify({'error': 'No symbol provided'})
 
     try:
-        # First, try to get current data for the symbol
+        # Checking what was typed against the local listing, so unknown input costs no API call.
+        # Only an exact symbol is quoted; close matches are offered, never swapped in.
+        listing = None
+        if symbol_index.is_loaded():
+            listing = symbol_index.get(symbol)
+            if listing is None:
+                suggestions = symbol_index.search(symbol, limit=5)
+                error = f'Could not find data for {symbol}'
+                if suggestions:
+                    error += f". Did you mean {', '.join(match['symbol'] for match in suggestions)}?"
+                return jsonify({'error': error, 'suggestions': suggestions})
+
+        # Then getting current data for the symbol
         stock_data = market_service.get_stock_data(symbol)
 
+        if not stock_data and listing:
+            return jsonify({'error': f'No price data available for {symbol}'})
+
         if not stock_data:
             # If not found, try symbol search endpoint to see if it exists
-            params = {
-                'function': 'SYMBOL_SEARCH',
-                'keywords': symbol,
-                'apikey': market_service.api_key
-            }
-
-            response = requests.get(market_service.base_url, params=params)
-            search_data = response.json()
+            matches = market_service.search_symbol(symbol)
 
-            if 'bestMatches' in search_data and search_data['bestMatches']:
-                best_match = search_data['bestMatches'][0]
+            if matches:
+                best_match = matches[0]
                 return jsonify({
                     'symbol': best_match.get('1. symbol', symbol),
                     'name': best_match.get('2. name', 'Unknown Company'),
@@ -450,7 +436,7 @@ def search_stock():
 
         return jsonify({
             'symbol': symbol,
-            'name': stock_data.get('company_name', 'Unknown Company'),
+            'name': listing['name'] if listing else stock_data.get('company_name', 'Unknown Company'),
             'price': format_price(stock_data['current_price']),
             'change': format_price(stock_data.get('daily_change', 0)),
             'changePercent': format_percent(stock_data.get('daily_change_percent', 0)),
@@ -461,63 +447,131 @@ def search_stock():
         return jsonify({'error': f'Error searching for {symbol}'}), 500
 
 
-@bp.route('/stock_history/<symbol>')
+@bp.route('/stream')
 @login_required
-def get_stock_history(symbol):
-    """Get historical price data for a stock"""
-    try:
-        period = request.args.get('period', '1m')
-
-        # Map period to appropriate Alpha Vantage function and outputsize
-        if period in ['1d', '5d']:
-            function = 'TIME_SERIES_INTRADAY'
-            interval = '60min'
-            outputsize = 'full'
-        elif period in ['1m', '6m']:
-            function = 'TIME_SERIES_DAILY'
-            outputsize = 'compact'
-        else:  # 1y, 5y
-            function = 'TIME_SERIES_DAILY'
-            outputsize = 'full'
+def stream_quotes():
+    """Streaming quote changes for ?symbols=AAPL,MSFT as server-sent events"""
+    symbols = _quote_symbols()
+    if not symbols:
+        return jsonify({'error': 'No symbols provided'}), 400
+
+    # Every stream holds a worker thread, so past the cap clients are told to poll /quotes instead
+    subscription = quote_stream.subscribe(symbols)
+    if subscription is None:
+        return jsonify({'error': 'Too many open quote streams'}), 503, {'Retry-After': str(Config.QUOTE_STREAM_INTERVAL)}
+
+    # Opening the stream is the view; the poller's refreshes aren't counted
+    for symbol in symbols:
+        market_service.refresher.record_view(symbol)
+
+    def events():
+        try:
+            # Closing after a while lets EventSource reconnect, so one client never holds a thread forever
+            deadline = time.time() + Config.QUOTE_STREAM_MAX_SECONDS
+            yield 'retry: 3000\n\n'
+            while time.time() < deadline:
+                quotes = quote_stream.updates(subscription, timeout=Config.QUOTE_STREAM_HEARTBEAT)
+                if quotes:
+                    yield f"event: quotes\ndata: {json.dumps(quotes)}\n\n"
+                else:
+                    yield ': keep-alive\n\n'
+        finally:
+            quote_stream.unsubscribe(subscription)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/quotes')
+@login_required
+def get_quotes():
+    """Getting current quotes for ?symbols=AAPL,MSFT; the polling fallback when streams are full"""
+    symbols = _quote_symbols()
+    if not symbols:
+        return jsonify({'error': 'No symbols provided'}), 400
 
-        params = {
-            'function': function,
-            'symbol': symbol,
-            'apikey': market_service.api_key,
-            'outputsize': outputsize
-        }
+    # Same shape as a stream event; repeated polls aren't views any more than the poller's are
+    quotes = market_service.get_stock_data_bulk(symbols, record_views=False)
+    return jsonify({symbol: {field: data.get(field) for field in QUOTE_FIELDS}
+                    for symbol, data in quotes.items() if data})
 
-        if function == 'TIME_SERIES_INTRADAY':
-            params['interval'] = interval
 
-        response = requests.get(market_service.base_url, params=params)
-        data = response.json()
+def _quote_symbols():
+    symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    return list(dict.fromkeys(symbols))[:Config.QUOTE_STREAM_MAX_SYMBOLS]
 
+
+@bp.route('/search/suggest')
+@login_required
+def suggest_symbols():
+    """Suggesting symbols for partial input from the local listing, without calling the API"""
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', 8, type=int), 25)
+    return jsonify({'matches': symbol_index.search(query, limit=limit)})
+
+
+@bp.route('/stock_history/<symbol>')
+@login_required
+def get_stock_history(symbol):
+    """Get historical price data for a stock, downsampled to at most ?points= points"""
+    period = request.args.get('period', '1m')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    try:
+        for day in (start, end):
+            if day:
+                datetime.strptime(day, '%Y-%m-%d')
+        if start and end and start > end:
+            raise ValueError('start is after end')
+        points = min(max(int(request.args.get('points', Config.HISTORY_CHART_POINTS)), 3), Config.HISTORY_MAX_POINTS)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date range: {e}'}), 400
+
+    try:
         # Process historical data
         dates = []
         prices = []
 
-        if function == 'TIME_SERIES_INTRADAY' and 'Time Series (60min)' in data:
-            time_series = data['Time Series (60min)']
-            # Limit data points based on period
-            limit = 24 if period == '1d' else 120  # 24 hours or 5 days
+        if period in ['1d', '5d'] and not (start or end):
+            # Intraday bars aren't stored locally
+            params = {
+                'function': 'TIME_SERIES_INTRADAY',
+                'symbol': symbol,
+                'apikey': market_service.api_key,
+                'outputsize': 'full',
+                'interval': '60min'
+            }
 
-            for date_str, values in list(time_series.items())[:limit]:
-                dates.append(date_str)
-                prices.append(float(values['4. close']))
+            response = http_client.get(market_service.base_url, params=params)
+            data = response.json()
 
-        elif function == 'TIME_SERIES_DAILY' and 'Time Series (Daily)' in data:
-            time_series = data['Time Series (Daily)']
-            # Limit data points based on period
-            limit = 30 if period == '1m' else 180 if period == '6m' else 365 if period == '1y' else 1825  # 1m, 6m, 1y, 5y
+            if 'Time Series (60min)' in data:
+                time_series = data['Time Series (60min)']
+                # Limit data points based on period
+                limit = 24 if period == '1d' else 120  # 24 hours or 5 days
 
-            for date_str, values in list(time_series.items())[:limit]:
-                dates.append(date_str)
-                prices.append(float(values['4. close']))
+                for date_str, values in list(time_series.items())[:limit]:
+                    dates.append(date_str)
+                    prices.append(float(values['4. close']))
 
-        # Reverse to get chronological order
-        dates.reverse()
-        prices.reverse()
+            # Reverse to get chronological order
+            dates.reverse()
+            prices.reverse()
+
+            # Same 'YYYY-MM-DD HH:MM:SS' labels whether or not the series was downsampled
+            times, prices = downsample(np.array(dates, dtype='datetime64[s]'), prices, points)
+            dates = [moment.replace('T', ' ') for moment in np.datetime_as_string(times, unit='s')]
+            prices = [float(p) for p in prices]
+        else:
+            # An explicit start/end range wins over the period's bar count
+            limit = None if (start or end) else \
+                30 if period == '1m' else 180 if period == '6m' else 365 if period == '1y' else 1825  # 1m, 6m, 1y, 5y
+
+            # Daily bars are sliced from the local price store, already in chronological order
+            bar_dates, ohlcv = price_store.get_columns(symbol, start=start, end=end, limit=limit)
+            bar_dates, closes = downsample(bar_dates, ohlcv[CLOSE], points)
+            dates = np.datetime_as_string(bar_dates, unit='D').tolist()
+            prices = closes.tolist()
 
         return jsonify({
             'dates': dates,
@@ -531,14 +585,7 @@ def get_stock_history(symbol):
 def get_company_info(symbol):
     """Get detailed company information"""
     try:
-        params = {
-            'function': 'OVERVIEW',
-            'symbol': symbol,
-            'apikey': market_service.api_key
-        }
-
-        response = requests.get(market_service.base_url, params=params)
-        data = response.json()
+        data = market_service.get_company_overview(symbol)
 
         if not data or 'Symbol' not in data:
             logger.warning(f"No company info found for {symbol}")
@@ -13,6 +13,7 @@ from app.services.news_service import NewsService
 from app.services.history_service import HistoryService
 from app.services.ml_service import MLService
 from app.services.enhanced_recommendation_service import EnhancedRecommendationService
+from app.services.async_market_client import AsyncMarketClient
 from datetime import datetime, timedelta
 from app import db
 from app.models.recommendation import RecommendationFeedback
@@ -34,6 +35,7 @@ recommendation_service = RecommendationService(market_service, risk_service)
 news_service = NewsService(market_service)
 ml_service = MLService(market_service)
 enhanced_recommendation_service = EnhancedRecommendationService(market_service, risk_service, ml_service)
+async_client = AsyncMarketClient(market_service, news_service)
 
 
 @bp.route('/dashboard')
@@ -55,8 +57,11 @@ def get_holdings():
     total_value = 0
     total_change = 0
 
-    for holding in current_user.portfolios.first().holdings.all():
-        stock_data = market_service.get_stock_data(holding.symbol)
+    user_holdings = current_user.portfolios.first().holdings.all()
+    quotes = market_service.get_stock_data_bulk([holding.symbol for holding in user_holdings])
+
+    for holding in user_holdings:
+        stock_data = quotes.get(holding.symbol)
         if stock_data:
             current_price = stock_data['current_price']
             value = current_price * holding.quantity
@@ -324,11 +329,14 @@ def get_forecasts():
     holdings = list(portfolio.holdings)
     symbols = [holding.symbol for holding in holdings]
 
+    # Loading every symbol's history concurrently
+    history = async_client.map(lambda symbol: async_client.call(ml_service._get_historical_data, symbol), symbols)
+
     forecasts = {}
     for symbol in symbols:
         try:
             # Getting Historical Data
-            historical_data = ml_service._get_historical_data(symbol)
+            historical_data = history.get(symbol)
 
             if historical_data is None or len(historical_data) < 30:
                 print(f"Insufficient historical data for {symbol}, skipping")
@@ -0,0 +1,76 @@
+import asyncio
+from contextvars import ContextVar
+
+from flask import current_app, has_app_context
+
+from app.services.market_service import copy_app_context
+from config import Config
+
+# Per-batch concurrency limit; a context variable because one client serves every request thread
+_batch_limit = ContextVar('market_batch_limit', default=None)
+
+
+class AsyncMarketClient:
+    """Asyncio front end to MarketService for views that fan out to several lookups.
+
+    Each operation runs the existing blocking call on a worker thread, so the
+    shared cache, single-flight, negative cache and rate limiter still apply,
+    and a batch costs max(call) instead of sum(call). Sync views use run():
+
+        quote, overview = async_client.run(async_client.quote('AAPL'), async_client.overview('AAPL'))
+    """
+
+    def __init__(self, market_service, news_service=None, concurrency=None):
+        self.market_service = market_service
+        self.news_service = news_service
+        self.concurrency = concurrency
+
+    async def call(self, func, *args, **kwargs):
+        """Running a blocking call on a worker thread inside its own app context."""
+        func = copy_app_context(func)
+        limit = _batch_limit.get()
+        if limit is None:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        async with limit:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def quote(self, symbol):
+        return await self.call(self.market_service.get_stock_data, symbol)
+
+    async def daily_series(self, symbol, outputsize='compact'):
+        return await self.call(self.market_service.get_historical_data, symbol, outputsize=outputsize)
+
+    async def overview(self, symbol):
+        return await self.call(self.market_service.get_company_overview, symbol)
+
+    async def news(self, symbol):
+        return await self.call(self.news_service.get_company_news, symbol)
+
+    async def movers(self):
+        return await self.call(self.market_service.get_market_movers)
+
+    def run(self, *coroutines):
+        """Running coroutines concurrently from sync code. Failed calls come back as None."""
+        return asyncio.run(self._gather(coroutines))
+
+    def map(self, operation, symbols):
+        """Running one operation for every symbol concurrently. Returns a dict of symbol -> result."""
+        symbols = list(dict.fromkeys(symbols))
+        return dict(zip(symbols, self.run(*(operation(symbol) for symbol in symbols))))
+
+    async def _gather(self, coroutines):
+        _batch_limit.set(asyncio.Semaphore(self._concurrency()))
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                print(f"Market data call failed: {result}")
+                results[i] = None
+        return results
+
+    def _concurrency(self):
+        if self.concurrency:
+            return self.concurrency
+        if has_app_context():
+            return current_app.config.get('ASYNC_MARKET_CONCURRENCY', Config.ASYNC_MARKET_CONCURRENCY)
+        return Config.ASYNC_MARKET_CONCURRENCY
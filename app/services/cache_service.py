@@ -0,0 +1,417 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+class MemoryCache:
+    """Thread-safe in-process cache with TTL expiry, LRU eviction and a size budget.
+
+    Entries are evicted least-recently-used first once either max_entries or
+    max_bytes (estimated from the pickled size of each value) is exceeded.
+    Expired entries are kept for stale_ttl seconds so they can still be served
+    stale while a fresh value is fetched.
+    """
+
+    def __init__(self, default_ttl=300, max_entries=1000, max_bytes=None, stale_ttl=0):
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.configure(default_ttl, max_entries, max_bytes, stale_ttl)
+
+    def configure(self, default_ttl=300, max_entries=1000, max_bytes=None, stale_ttl=0):
+        with self._lock:
+            self.default_ttl = default_ttl
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self.stale_ttl = stale_ttl
+            self.clear()
+
+    def get(self, key):
+        """Getting a fresh value, or None on a miss. Updates hit/miss statistics."""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key, allow_stale=False):
+        """Getting (value, expires_at) for a fresh entry, or None on a miss.
+
+        With allow_stale, entries expired less than stale_ttl ago are returned too;
+        callers tell them apart by expires_at.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires_at, size = entry
+            now = time.time()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    self._remove(key)
+                    self._expirations += 1
+                    self._misses += 1
+                    return None
+                if not allow_stale:
+                    self._misses += 1
+                    return None
+                self._stale_hits += 1
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value, expires_at
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        size = self._estimate_size(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # Values bigger than the whole budget would only evict everything else
+            if self.max_bytes and size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, time.time() + ttl, size)
+            self._bytes += size
+            self._evict()
+
+    def contains(self, key):
+        """Checking for a fresh entry without touching statistics or LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.time()
+
+    def peek_expiry(self, key):
+        """Getting an entry's expiry time (even if stale) without touching statistics, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry else None
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._expirations = 0
+            self._stale_hits = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': (self._hits / lookups * 100) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'stale_hits': self._stale_hits
+            }
+
+    def _evict(self):
+        while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries) or
+                (self.max_bytes and self._bytes > self.max_bytes)):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    @staticmethod
+    def _estimate_size(value):
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 0
+
+
+class SQLiteCache:
+    """Cache stored in a local SQLite file, shared by every worker on the host.
+
+    Entries keep an absolute expiry time, so TTLs carry over across process
+    restarts. Expired rows are skipped on read (unless stale reads are allowed)
+    and purged periodically once they are past the stale window.
+    """
+
+    PURGE_EVERY = 500  # writes between purges of expired rows
+
+    def __init__(self, path, default_ttl=300, stale_ttl=0):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._stale_hits = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        # One connection per thread, reopened after gunicorn forks a worker
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key, allow_stale=False):
+        try:
+            row = self._connect().execute(
+                'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache read error for {key}: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            now = time.time()
+            if row[1] <= now:
+                if not allow_stale or row[1] + self.stale_ttl <= now:
+                    self._expirations += 1
+                    self._misses += 1
+                    return None
+                self._stale_hits += 1
+            self._hits += 1
+
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl)
+            )
+            with self._lock:
+                self._writes += 1
+                purge = self._writes % self.PURGE_EVERY == 0
+            if purge:
+                conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time() - self.stale_ttl,))
+        except sqlite3.Error as e:
+            print(f"Cache write error for {key}: {e}")
+
+    def contains(self, key):
+        try:
+            row = self._connect().execute(
+                'SELECT 1 FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+            return row is not None
+        except sqlite3.Error:
+            return False
+
+    def peek_expiry(self, key):
+        try:
+            row = self._connect().execute(
+                'SELECT expires_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    def delete(self, key):
+        try:
+            self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            print(f"Cache delete error for {key}: {e}")
+
+    def clear(self):
+        try:
+            self._connect().execute('DELETE FROM cache')
+        except sqlite3.Error as e:
+            print(f"Cache clear error: {e}")
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._expirations = 0
+            self._stale_hits = 0
+
+    def get_stats(self):
+        try:
+            entries, size = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache WHERE expires_at > ?',
+                (time.time(),)
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': 'sqlite',
+                'entries': entries,
+                'bytes': size,
+                'max_entries': None,
+                'max_bytes': None,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': (self._hits / lookups * 100) if lookups else 0.0,
+                'evictions': 0,
+                'expirations': self._expirations,
+                'stale_hits': self._stale_hits
+            }
+
+
+class TieredCache:
+    """In-memory cache in front of a shared cache.
+
+    Reads are served from local memory when possible; shared hits are copied
+    into memory with their remaining TTL, so both tiers expire together.
+    """
+
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key, allow_stale=False):
+        local_entry = self.local.get_entry(key, allow_stale)
+        if local_entry is not None and local_entry[1] > time.time():
+            return local_entry
+
+        entry = self.shared.get_entry(key, allow_stale)
+        if entry is None:
+            return local_entry
+
+        value, expires_at = entry
+        if expires_at > time.time():
+            # Another worker may have refreshed an entry that is stale here
+            self.local.set(key, value, ttl=expires_at - time.time())
+            return entry
+        return max(entry, local_entry, key=lambda e: e[1]) if local_entry else entry
+
+    def set(self, key, value, ttl=None):
+        self.local.set(key, value, ttl)
+        self.shared.set(key, value, ttl)
+
+    def contains(self, key):
+        return self.local.contains(key) or self.shared.contains(key)
+
+    def peek_expiry(self, key):
+        return self.shared.peek_expiry(key)
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def get_stats(self):
+        stats = self.local.get_stats()
+        stats['backend'] = f"memory+{self.shared.get_stats()['backend']}"
+        stats['shared'] = self.shared.get_stats()
+        return stats
+
+
+class MarketDataCache:
+    """Process-wide handle on the configured cache backend.
+
+    Modules import the shared instance once; init_app swaps the backend
+    underneath it according to MARKET_CACHE_BACKEND.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def get_entry(self, key, allow_stale=False):
+        return self.backend.get_entry(key, allow_stale)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def contains(self, key):
+        return self.backend.contains(key)
+
+    def peek_expiry(self, key):
+        return self.backend.peek_expiry(key)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_stats(self):
+        return self.backend.get_stats()
+
+
+def build_cache(config):
+    """Creating the cache backend described by a config mapping."""
+    local = MemoryCache(
+        default_ttl=config.get('QUOTE_CACHE_TTL', Config.QUOTE_CACHE_TTL),
+        max_entries=config.get('QUOTE_CACHE_MAX_ENTRIES', Config.QUOTE_CACHE_MAX_ENTRIES),
+        max_bytes=config.get('QUOTE_CACHE_MAX_BYTES', Config.QUOTE_CACHE_MAX_BYTES),
+        stale_ttl=config.get('QUOTE_STALE_TTL', Config.QUOTE_STALE_TTL)
+    )
+
+    backend = config.get('MARKET_CACHE_BACKEND', Config.MARKET_CACHE_BACKEND)
+    if backend == 'memory':
+        return local
+    if backend == 'sqlite':
+        shared = SQLiteCache(
+            config.get('MARKET_CACHE_PATH', Config.MARKET_CACHE_PATH),
+            default_ttl=local.default_ttl,
+            stale_ttl=local.stale_ttl
+        )
+        return TieredCache(local, shared)
+
+    raise ValueError(f"Unknown MARKET_CACHE_BACKEND: {backend}")
+
+
+# One cache shared by every MarketService instance in the process
+quote_cache = MarketDataCache(MemoryCache(
+    default_ttl=Config.QUOTE_CACHE_TTL,
+    max_entries=Config.QUOTE_CACHE_MAX_ENTRIES,
+    max_bytes=Config.QUOTE_CACHE_MAX_BYTES,
+    stale_ttl=Config.QUOTE_STALE_TTL
+))
+
+
+def init_app(app):
+    """Applying the app's cache settings to the shared quote cache."""
+    quote_cache.backend = build_cache(app.config)
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.market_data import CompanyProfile
+from config import Config
+
+# Sectors for common stocks, used without an OVERVIEW call when only the sector is needed
+SEED_SECTORS = {
+    # Technology
+    'AAPL': 'Technology', 'MSFT': 'Technology', 'GOOGL': 'Technology',
+    'GOOG': 'Technology', 'META': 'Technology', 'AMZN': 'Technology',
+    'NFLX': 'Technology', 'NVDA': 'Technology', 'AMD': 'Technology',
+    'INTC': 'Technology', 'CSCO': 'Technology', 'ORCL': 'Technology',
+    'IBM': 'Technology', 'ADBE': 'Technology', 'CRM': 'Technology',
+    'AAME': 'Technology',
+
+    # Healthcare
+    'JNJ': 'Healthcare', 'PFE': 'Healthcare', 'UNH': 'Healthcare',
+    'ABBV': 'Healthcare', 'MRK': 'Healthcare', 'TMO': 'Healthcare',
+    'ABT': 'Healthcare', 'DHR': 'Healthcare', 'BMY': 'Healthcare',
+
+    # Financials
+    'JPM': 'Financials', 'BAC': 'Financials', 'WFC': 'Financials',
+    'C': 'Financials', 'GS': 'Financials', 'MS': 'Financials',
+    'BLK': 'Financials', 'AXP': 'Financials', 'V': 'Financials',
+    'MA': 'Financials',
+
+    # Consumer Defensive
+    'PG': 'Consumer Defensive', 'KO': 'Consumer Defensive', 'PEP': 'Consumer Defensive',
+    'WMT': 'Consumer Defensive', 'COST': 'Consumer Defensive',
+
+    # Energy
+    'XOM': 'Energy', 'CVX': 'Energy', 'COP': 'Energy',
+    'SLB': 'Energy', 'EOG': 'Energy',
+
+    # Communication Services
+    'VZ': 'Communication Services', 'T': 'Communication Services',
+    'CMCSA': 'Communication Services', 'CHTR': 'Communication Services',
+    'DIS': 'Communication Services',
+
+    # Utilities
+    'NEE': 'Utilities', 'DUK': 'Utilities', 'SO': 'Utilities',
+    'D': 'Utilities', 'AEP': 'Utilities',
+
+    # Industrials
+    'HON': 'Industrials', 'UNP': 'Industrials', 'UPS': 'Industrials',
+    'BA': 'Industrials', 'CAT': 'Industrials', 'GE': 'Industrials',
+
+    # Materials
+    'LIN': 'Materials', 'APD': 'Materials', 'ECL': 'Materials',
+    'DD': 'Materials', 'DOW': 'Materials',
+
+    # Real Estate
+    'AMT': 'Real Estate', 'PLD': 'Real Estate', 'CCI': 'Real Estate',
+    'EQIX': 'Real Estate', 'PSA': 'Real Estate'
+}
+
+# OVERVIEW sectors (SIC-based, e.g. 'LIFE SCIENCES', plus the older GICS-style names) -> the app's sectors
+OVERVIEW_SECTORS = {
+    'TECHNOLOGY': 'Technology',
+    'LIFE SCIENCES': 'Healthcare', 'HEALTHCARE': 'Healthcare',
+    'FINANCE': 'Financials', 'FINANCIAL SERVICES': 'Financials',
+    'TRADE & SERVICES': 'Consumer Cyclical', 'CONSUMER CYCLICAL': 'Consumer Cyclical',
+    'CONSUMER DEFENSIVE': 'Consumer Defensive',
+    'MANUFACTURING': 'Industrials', 'INDUSTRIALS': 'Industrials',
+    'ENERGY & TRANSPORTATION': 'Energy', 'ENERGY': 'Energy',
+    'REAL ESTATE & CONSTRUCTION': 'Real Estate', 'REAL ESTATE': 'Real Estate',
+    'COMMUNICATION SERVICES': 'Communication Services',
+    'UTILITIES': 'Utilities',
+    'BASIC MATERIALS': 'Materials',
+}
+
+
+def _sector(symbol, overview_sector):
+    """Getting the app's sector for a symbol: the seed wins, then the mapped OVERVIEW sector."""
+    if symbol in SEED_SECTORS:
+        return SEED_SECTORS[symbol]
+    if not overview_sector or overview_sector == 'None':
+        return None
+    return OVERVIEW_SECTORS.get(overview_sector.upper(), overview_sector.title())
+
+
+def _to_number(value, cast=float):
+    # Alpha Vantage sends 'None' or '-' for missing figures
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class CompanyIndex:
+    """Persisted company metadata (name, sector, industry, market cap, dividend yield).
+
+    Lookups for a whole portfolio are one local query; only symbols that are
+    missing or older than COMPANY_INDEX_TTL are fetched, concurrently, from
+    OVERVIEW and written back.
+    """
+
+    def __init__(self, market_service):
+        self.market_service = market_service
+
+    def get_profiles(self, symbols, complete=True):
+        """Getting profile dicts keyed by symbol; symbols with no data are left out.
+
+        With complete=False, sector-only seed entries are good enough and
+        seeded symbols never cost an OVERVIEW call.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        rows = {row.symbol: row for row in CompanyProfile.query.filter(CompanyProfile.symbol.in_(symbols)).all()}
+        cutoff = datetime.utcnow() - timedelta(seconds=Config.COMPANY_INDEX_TTL)
+
+        stale = [symbol for symbol in symbols if symbol not in rows or rows[symbol].refreshed_at < cutoff or
+                 (complete and rows[symbol].source == 'seed')]
+        if stale:
+            self._update(stale, rows, complete)
+
+        return {symbol: rows[symbol].to_dict() for symbol in symbols if symbol in rows}
+
+    def get_sectors(self, symbols):
+        """Getting a symbol -> sector map, 'Unknown' where no sector is known."""
+        profiles = self.get_profiles(symbols, complete=False)
+        return {symbol: (profiles.get(symbol) or {}).get('sector') or 'Unknown' for symbol in symbols}
+
+    def _update(self, symbols, rows, complete):
+        to_fetch = symbols if complete else [s for s in symbols if s not in SEED_SECTORS]
+
+        overviews = self.market_service.get_company_overview_bulk(to_fetch) if to_fetch else {}
+        for symbol in symbols:
+            data = overviews.get(symbol)
+            if data and 'Symbol' in data:
+                rows[symbol] = self._apply_overview(rows.get(symbol) or CompanyProfile(symbol=symbol), data)
+            elif symbol in SEED_SECTORS and symbol not in rows:
+                rows[symbol] = CompanyProfile(symbol=symbol, sector=SEED_SECTORS[symbol], source='seed',
+                                              refreshed_at=datetime.utcnow())
+            else:
+                continue
+            db.session.add(rows[symbol])
+
+        try:
+            db.session.commit()
+        except SQLAlchemyError as e:
+            # Most likely another worker indexed the same symbol first
+            db.session.rollback()
+            print(f"Error saving company profiles: {e}")
+
+    @staticmethod
+    def _apply_overview(profile, data):
+        profile.name = data.get('Name')
+        # Seeded symbols keep the sectors the allocation targets and similar-stock lists are keyed on
+        profile.sector = _sector(profile.symbol, data.get('Sector'))
+        profile.industry = (data.get('Industry') or '').title() or None
+        profile.market_cap = _to_number(data.get('MarketCapitalization'), int)
+        profile.dividend_yield = _to_number(data.get('DividendYield'))
+        profile.exchange = data.get('Exchange')
+        profile.source = 'overview'
+        profile.refreshed_at = datetime.utcnow()
+        return profile
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Getting the indices kept by largest-triangle-three-buckets downsampling, in order.
+
+    The first and last points are always kept. The points in between are split
+    into threshold - 2 buckets, and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average. Peaks and troughs survive, unlike with plain striding.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # threshold - 1 edges make threshold - 2 non-empty buckets over points 1 .. n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    keep = np.empty(threshold, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
+
+
+def downsample(dates, values, points):
+    """Getting (dates, values) reduced to at most points with LTTB; short series are returned as is."""
+    if points is None or len(values) <= points:
+        return dates, values
+
+    # Positions on the time axis, so gaps (weekends, holidays) weigh in like they do on the chart
+    positions = np.asarray(dates).astype('datetime64[s]').astype(np.int64)
+    keep = lttb_indices(positions, values, points)
+    return np.asarray(dates)[keep], np.asarray(values)[keep]
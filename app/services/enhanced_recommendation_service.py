@@ -1,10 +1,11 @@
 import traceback
 from datetime import datetime
 
-import requests
 from app.models.user import UserSettings
 
 from app.models.recommendation import RecommendationFeedback
+from app.monitoring.tracing import span
+from app.services.company_index import CompanyIndex
 
 
 
@@ -13,7 +14,9 @@ class EnhancedRecommendationService:
         self.market_service = market_service
         self.risk_service = risk_service
         self.ml_service = ml_service
+        self.company_index = CompanyIndex(market_service)
 
+    @span('recommendations')
     def generate_enhanced_recommendations(self, portfolio, user):
         try:
             # Getting user settings
@@ -203,11 +206,9 @@ class EnhancedRecommendationService:
         # For Income-focused investors
         if investment_goal == 'Income':
             # Check if portfolio has enough dividend stocks
-            dividend_count = 0
-            for symbol in symbols:
-                company_info = self._get_company_info(symbol)
-                if company_info and float(company_info.get('DividendYield', 0)) > 0.02:  # 2% yield threshold
-                    dividend_count += 1
+            profiles = self.company_index.get_profiles(symbols)
+            dividend_count = sum(1 for profile in profiles.values()
+                                 if (profile['dividend_yield'] or 0) > 0.02)  # 2% yield threshold
 
             # Recommendations If less than 50% of stocks pay meaningful dividends
             if dividend_count < len(symbols) * 0.5:
@@ -518,114 +519,10 @@ class EnhancedRecommendationService:
 
         return resolved_recommendations
 
-    def _get_company_info(self, symbol):
-        """Getting company information for a stock symbol"""
+    def _get_stock_sectors(self, symbols):
+        """Get sectors for a list of stock symbols from the company index"""
         try:
-            params = {
-                'function': 'OVERVIEW',
-                'symbol': symbol,
-                'apikey': self.market_service.api_key
-            }
-
-            response = requests.get(self.market_service.base_url, params=params)
-            data = response.json()
-
-            if not data or 'Symbol' not in data:
-                print(f"No company info found for {symbol}")
-                return {}
-
-            return data
+            return self.company_index.get_sectors(symbols)
         except Exception as e:
-            print(f"Error getting company info for {symbol}: {e}")
-            return {}
-
-
-    def _get_stock_sectors(self, symbols):
-        """Get sectors for a list of stock symbols"""
-        sector_map = {}
-
-        # pre-defined mapping for common stocks
-        SECTOR_MAPPING = {
-            # Technology
-            'AAPL': 'Technology', 'MSFT': 'Technology', 'GOOGL': 'Technology',
-            'GOOG': 'Technology', 'META': 'Technology', 'AMZN': 'Technology',
-            'NFLX': 'Technology', 'NVDA': 'Technology', 'AMD': 'Technology',
-            'INTC': 'Technology', 'CSCO': 'Technology', 'ORCL': 'Technology',
-            'IBM': 'Technology', 'ADBE': 'Technology', 'CRM': 'Technology',
-            'AAME': 'Technology',
-
-            # Healthcare
-            'JNJ': 'Healthcare', 'PFE': 'Healthcare', 'UNH': 'Healthcare',
-            'ABBV': 'Healthcare', 'MRK': 'Healthcare', 'TMO': 'Healthcare',
-            'ABT': 'Healthcare', 'DHR': 'Healthcare', 'BMY': 'Healthcare',
-
-            # Financials
-            'JPM': 'Financials', 'BAC': 'Financials', 'WFC': 'Financials',
-            'C': 'Financials', 'GS': 'Financials', 'MS': 'Financials',
-            'BLK': 'Financials', 'AXP': 'Financials', 'V': 'Financials',
-            'MA': 'Financials',
-
-            # Consumer Defensive
-            'PG': 'Consumer Defensive', 'KO': 'Consumer Defensive', 'PEP': 'Consumer Defensive',
-            'WMT': 'Consumer Defensive', 'COST': 'Consumer Defensive',
-
-            # Energy
-            'XOM': 'Energy', 'CVX': 'Energy', 'COP': 'Energy',
-            'SLB': 'Energy', 'EOG': 'Energy',
-
-            # Communication Services
-            'VZ': 'Communication Services', 'T': 'Communication Services',
-            'CMCSA': 'Communication Services', 'CHTR': 'Communication Services',
-            'DIS': 'Communication Services',
-
-            # Utilities
-            'NEE': 'Utilities', 'DUK': 'Utilities', 'SO': 'Utilities',
-            'D': 'Utilities', 'AEP': 'Utilities',
-
-            # Industrials
-            'HON': 'Industrials', 'UNP': 'Industrials', 'UPS': 'Industrials',
-            'BA': 'Industrials', 'CAT': 'Industrials', 'GE': 'Industrials',
-
-            # Materials
-            'LIN': 'Materials', 'APD': 'Materials', 'ECL': 'Materials',
-            'DD': 'Materials', 'DOW': 'Materials',
-
-            # Real Estate
-            'AMT': 'Real Estate', 'PLD': 'Real Estate', 'CCI': 'Real Estate',
-            'EQIX': 'Real Estate', 'PSA': 'Real Estate'
-        }
-
-        for symbol in symbols:
-            # First check our predefined mapping
-            if symbol in SECTOR_MAPPING:
-                sector_map[symbol] = SECTOR_MAPPING[symbol]
-                continue
-
-            # try API if not in predefined list
-            try:
-                params = {
-                    'function': 'OVERVIEW',
-                    'symbol': symbol,
-                    'apikey': self.market_service.api_key
-                }
-
-                response = requests.get(self.market_service.base_url, params=params)
-                data = response.json()
-
-                if 'Sector' in data:
-                    sector_map[symbol] = data['Sector']
-                else:
-                    sector_map[symbol] = 'Unknown'
-
-                # Add to Data from Api to my mapping for future reference
-                SECTOR_MAPPING[symbol] = sector_map[symbol]
-            except Exception as e:
-                print(f"Error getting sector for {symbol}: {e}")
-                sector_map[symbol] = 'Unknown'
-
-        # Debugging output
-        # # print(f"Sector mapping for symbols {symbols}:")
-        # for symbol, sector in sector_map.items():
-        #     print(f"  {symbol}: {sector}")
-
-        return sector_map
+            print(f"Error getting sectors for {symbols}: {e}")
+            return {symbol: 'Unknown' for symbol in symbols}
@@ -18,8 +18,10 @@ class HistoryService:
 
         #Calculating current portfolio value
         total_value = 0
-        for holding in portfolio.holdings:
-            stock_data = self.market_service.get_stock_data(holding.symbol)
+        holdings = list(portfolio.holdings)
+        quotes = self.market_service.get_stock_data_bulk([holding.symbol for holding in holdings])
+        for holding in holdings:
+            stock_data = quotes.get(holding.symbol)
             if stock_data:
                 total_value += stock_data['current_price'] * holding.quantity
 
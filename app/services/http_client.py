@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.monitoring.prometheus import registry
+from app.monitoring.tracing import span
+from app.services.rate_limiter import alpha_vantage_limiter
+from config import Config
+
+
+class HTTPClient:
+    """Pooled HTTP client shared by every upstream market data call.
+
+    Connections are kept alive per host, every request gets the same
+    (connect, read) timeout, and connection errors, timeouts and retryable
+    status codes are retried with jittered exponential backoff. Latency is
+    recorded per Alpha Vantage function. When a rate limiter is set, every
+    attempt (including retries) takes a token from it first.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, max_retries=2,
+                 backoff_base=0.5, backoff_max=8, pool_size=20, rate_limiter=None):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._redirects = {}  # url -> url requests are sent to instead
+        self.rate_limiter = rate_limiter
+        self.configure(connect_timeout, read_timeout, max_retries, backoff_base, backoff_max, pool_size)
+
+    def configure(self, connect_timeout=3.05, read_timeout=10, max_retries=2,
+                  backoff_base=0.5, backoff_max=8, pool_size=20):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        self.session = session
+
+    @span('upstream')
+    def get(self, url, params=None, timeout=None):
+        """Sending a GET request, retrying transient failures. Returns the final response."""
+        endpoint = (params or {}).get('function', url)
+        url = self._redirects.get(url, url)
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            start_time = time.time()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, time.time() - start_time, failed=True)
+                if attempt == self.max_retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+
+            retryable = response.status_code in self.RETRY_STATUSES
+            self._record(endpoint, time.time() - start_time, failed=retryable)
+            if retryable and attempt < self.max_retries:
+                self._sleep_before_retry(attempt)
+                continue
+            return response
+
+    def get_json(self, url, params=None, timeout=None):
+        return self.get(url, params=params, timeout=timeout).json()
+
+    @contextmanager
+    def redirect(self, url, to):
+        """Sending requests for url to another URL while the block runs, e.g. to a local stand-in."""
+        with self._lock:
+            self._redirects[url] = to
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._redirects.pop(url, None)
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter: spreading retries from many workers over the backoff window
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))
+
+    def _record(self, endpoint, duration, failed=False):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                'calls': 0, 'failures': 0, 'total_time': 0.0, 'max_time': 0.0
+            })
+            stats['calls'] += 1
+            stats['failures'] += 1 if failed else 0
+            stats['total_time'] += duration
+            stats['max_time'] = max(stats['max_time'], duration)
+        registry.observe('upstream_request_duration_seconds', duration, function=endpoint,
+                         outcome='error' if failed else 'ok')
+
+    def get_stats(self):
+        """Getting per-endpoint call counts and latency (seconds)."""
+        with self._lock:
+            return {
+                endpoint: dict(stats, average_time=stats['total_time'] / stats['calls'])
+                for endpoint, stats in self._stats.items()
+            }
+
+
+http_client = HTTPClient(
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=Config.HTTP_READ_TIMEOUT,
+    max_retries=Config.HTTP_MAX_RETRIES,
+    backoff_base=Config.HTTP_BACKOFF_BASE,
+    pool_size=Config.HTTP_POOL_SIZE,
+    rate_limiter=alpha_vantage_limiter
+)
+
+
+def init_app(app):
+    """Applying the app's HTTP settings to the shared client."""
+    http_client.configure(
+        connect_timeout=app.config.get('HTTP_CONNECT_TIMEOUT', Config.HTTP_CONNECT_TIMEOUT),
+        read_timeout=app.config.get('HTTP_READ_TIMEOUT', Config.HTTP_READ_TIMEOUT),
+        max_retries=app.config.get('HTTP_MAX_RETRIES', Config.HTTP_MAX_RETRIES),
+        backoff_base=app.config.get('HTTP_BACKOFF_BASE', Config.HTTP_BACKOFF_BASE),
+        pool_size=app.config.get('HTTP_POOL_SIZE', Config.HTTP_POOL_SIZE)
+    )
@@ -0,0 +1,123 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from config import Config
+
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Getting the nth weekday (0=Monday) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day):
+    # Saturday holidays are observed on Friday, Sunday holidays on Monday
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def nyse_holidays(year):
+    """Getting the NYSE full-day holidays for a year."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Presidents' Day
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day falling on a Saturday is not moved back into the previous year
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def session_close(day):
+    """Getting the closing time for a trading day, allowing for the scheduled early closes."""
+    early = {
+        _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1),  # Day after Thanksgiving
+        date(day.year, 12, 24),  # Christmas Eve
+        date(day.year, 7, 3),  # Day before Independence Day
+    }
+    return EARLY_CLOSE if day in early else MARKET_CLOSE
+
+
+def _now(now=None):
+    if now is None:
+        return datetime.now(MARKET_TZ)
+    if now.tzinfo is None:
+        return now.replace(tzinfo=MARKET_TZ)
+    return now.astimezone(MARKET_TZ)
+
+
+def is_market_open(now=None):
+    """Checking whether the regular NYSE session is in progress."""
+    now = _now(now)
+    today = now.date()
+    return is_trading_day(today) and MARKET_OPEN <= now.time() < session_close(today)
+
+
+def next_open(now=None):
+    """Getting the start of the next regular session after now (today's, if it hasn't opened yet)."""
+    now = _now(now)
+    day = now.date()
+    if now.time() >= MARKET_OPEN:
+        day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ)
+
+
+def market_ttl(open_ttl, now=None):
+    """Getting a cache TTL (seconds) for data that only changes while the market trades.
+
+    During the session, and for a short settle window after the close while the
+    closing prints come in, open_ttl is used. Otherwise entries stay valid
+    until the next open (or open_ttl, if that is longer).
+    """
+    now = _now(now)
+    today = now.date()
+
+    if is_trading_day(today) and now.time() >= MARKET_OPEN:
+        close_at = datetime.combine(today, session_close(today), tzinfo=MARKET_TZ)
+        if now < close_at + timedelta(seconds=Config.MARKET_CLOSE_SETTLE):
+            return open_ttl
+
+    return max(open_ttl, int((next_open(now) - now).total_seconds()))
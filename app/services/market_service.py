@@ -1,8 +1,9 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import wraps
 from time import sleep
 import time
-from flask import current_app
+from flask import current_app, has_app_context
 from config import Config
 
 from app.monitoring.metrics import (
@@ -13,94 +14,341 @@ from app.monitoring.metrics import (
 
 
 from app import db
+from app.monitoring.tracing import attach, current_trace
+from app.services.cache_service import quote_cache
+from app.services.http_client import http_client
+from app.services.market_calendar import market_ttl
+from app.services.quote_refresher import quote_refresher
+from app.services.single_flight import market_flight
+
+
+def copy_app_context(func):
+    """Wrapping func so it runs inside its own context of the calling app.
+
+    Worker threads don't inherit the Flask app context, and each one needs
+    its own so that metric writes get a separate database session. The
+    calling request's trace comes along so its upstream time is counted.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+    trace = current_trace()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with attach(trace):
+            if app is None:
+                return func(*args, **kwargs)
+            with app.app_context():
+                return func(*args, **kwargs)
+    return wrapper
 
 
 class MarketService:
     def __init__(self):
-        self.cache = {}
-        self.cache_timeout = 300  # 5 minutes
-        self.base_url = 'https://www.alphavantage.co/query'
+        self.cache = quote_cache  # Shared by every instance in the process
+        self.flight = market_flight
+        self.refresher = quote_refresher
+        self.base_url = Config.ALPHA_VANTAGE_BASE_URL
         self.api_key = Config.ALPHA_VANTAGE_API_KEY  # Store API key here
+        self.max_workers = Config.MARKET_DATA_MAX_WORKERS
+
+    def get_stock_data(self, symbol, record_view=True):
+        """Getting current stock data with caching and metrics.
 
-    def get_stock_data(self, symbol):
-        """Getting current stock data with caching and metrics."""
+        An expired entry still inside the stale window is returned straight away,
+        marked with 'stale': True, and refreshed in the background. Lookups count
+        towards the symbol's views unless record_view is False.
+        """
         cache_key = f"stock_data_{symbol}"
         try:
             # Check cache
-            if symbol in self.cache:
-                last_update = self.cache[symbol]['last_update']
-                if datetime.now() - last_update < timedelta(seconds=self.cache_timeout):
-                    track_cache_access(cache_key, True)  # Cache hit
-                    start_time = time.time()
-                    result = self.cache[symbol]['data']
-                    duration = time.time() - start_time
-                    # print(f"CACHED RESPONSE: Symbol={symbol}, Duration={duration}s, Duration in ms={duration * 1000}ms")
-                    track_response_with_cache_status('get_stock_data', duration, True)
-                    return result
+            start_time = time.time()
+            if record_view:
+                self.refresher.record_view(symbol)
+            entry = self.cache.get_entry(cache_key, allow_stale=True)
+            if entry is not None:
+                result, expires_at = entry
+                track_cache_access(cache_key, True)  # Cache hit
+                duration = time.time() - start_time
+                # print(f"CACHED RESPONSE: Symbol={symbol}, Duration={duration}s, Duration in ms={duration * 1000}ms")
+                track_response_with_cache_status('get_stock_data', duration, True)
+
+                if expires_at <= time.time():
+                    self.refresher.submit(cache_key, copy_app_context(self._refresh_stock_data), symbol)
+                    return dict(result, stale=True)
+                return result
+
+            if self._known_missing(cache_key):
+                return None
 
             track_cache_access(cache_key, False)  # Cache miss
 
-            # API parameters for getting quote data
-            start_time = time.time()
-            try:
-                params = {
-                    'function': 'GLOBAL_QUOTE',
-                    'symbol': symbol,
-                    'apikey': self.api_key
+            # Concurrent misses for the same symbol share one upstream call
+            return self.flight.do(cache_key, self._fetch_stock_data, symbol, cache_key)
+        except Exception as e:
+            print(f"Unexpected error in get_stock_data: {str(e)}")
+            return None
+
+
+    def _fetch_stock_data(self, symbol, cache_key, ttl=None):
+        """Fetching a quote from Alpha Vantage and caching it, for ttl seconds if given."""
+        # API parameters for getting quote data
+        start_time = time.time()
+        try:
+            params = {
+                'function': 'GLOBAL_QUOTE',
+                'symbol': symbol,
+                'apikey': self.api_key
+            }
+
+            response = http_client.get(self.base_url, params=params)
+            quote_data = response.json()
+
+            if 'Global Quote' in quote_data and quote_data['Global Quote']:
+                quote = quote_data['Global Quote']
+
+                data = {
+                    'current_price': float(quote.get('05. price', 0)),
+                    'company_name': symbol,
+                    'daily_change': float(quote.get('09. change', 0)),
+                    'daily_change_percent': float(quote.get('10. change percent', '0').rstrip('%')),
+                    'volume': int(quote.get('06. volume', 0)),
+                    'high': float(quote.get('03. high', 0)),
+                    'low': float(quote.get('04. low', 0))
                 }
 
-                response = requests.get(self.base_url, params=params, timeout=10)
-                quote_data = response.json()
-
-                if 'Global Quote' in quote_data and quote_data['Global Quote']:
-                    quote = quote_data['Global Quote']
-
-                    data = {
-                        'current_price': float(quote.get('05. price', 0)),
-                        'company_name': symbol,
-                        'daily_change': float(quote.get('09. change', 0)),
-                        'daily_change_percent': float(quote.get('10. change percent', '0').rstrip('%')),
-                        'volume': int(quote.get('06. volume', 0)),
-                        'high': float(quote.get('03. high', 0)),
-                        'low': float(quote.get('04. low', 0))
-                    }
-
-                    # Update cache
-                    self.cache[symbol] = {
-                        'data': data,
-                        'last_update': datetime.now()
-                    }
-
-                    # Add these two lines to track fresh API responses
-                    duration = time.time() - start_time
-                    track_response_with_cache_status('get_stock_data', duration, False)
-                    track_api_call('alpha_vantage', 'GLOBAL_QUOTE', True)
-
-                    return data
-                else:
-                    print(f"No quote data found for {symbol}")
-                    track_api_call('alpha_vantage', 'GLOBAL_QUOTE', False)
-                    return None
-
-            except Exception as e:
-                print(f"Error fetching data for {symbol}: {str(e)}")
+                # Update cache; quotes can't change until the next open once the market is closed
+                self.cache.set(cache_key, data, ttl=ttl or market_ttl(Config.QUOTE_CACHE_TTL))
+
+                # Add these two lines to track fresh API responses
+                duration = time.time() - start_time
+                track_response_with_cache_status('get_stock_data', duration, False)
+                track_api_call('alpha_vantage', 'GLOBAL_QUOTE', True)
+
+                return data
+            else:
+                print(f"No quote data found for {symbol}")
+                self._remember_missing(cache_key, failed=self._is_upstream_failure(quote_data))
                 track_api_call('alpha_vantage', 'GLOBAL_QUOTE', False)
                 return None
+
         except Exception as e:
-            print(f"Unexpected error in get_stock_data: {str(e)}")
+            print(f"Error fetching data for {symbol}: {str(e)}")
+            self._remember_missing(cache_key, failed=True)
+            track_api_call('alpha_vantage', 'GLOBAL_QUOTE', False)
             return None
 
+    def _known_missing(self, cache_key):
+        """Checking the negative cache; a hit means the lookup recently found nothing."""
+        negative_key = f"negative_{cache_key}"
+        if self.cache.contains(negative_key):
+            track_cache_access(negative_key, True)
+            return True
+        return False
+
+    def _remember_missing(self, cache_key, failed=False):
+        """Negative-caching a lookup; upstream failures are retried sooner than unknown symbols."""
+        ttl = Config.NEGATIVE_CACHE_FAILURE_TTL if failed else Config.NEGATIVE_CACHE_TTL
+        self.cache.set(f"negative_{cache_key}", True, ttl=ttl)
+
+    @staticmethod
+    def _is_upstream_failure(data):
+        # Rate-limit notices and non-JSON answers say nothing about whether the symbol exists
+        return not isinstance(data, dict) or 'Note' in data or 'Information' in data
+
+
+    def _refresh_stock_data(self, symbol, ttl=None):
+        cache_key = f"stock_data_{symbol}"
+        return self.flight.do(cache_key, self._fetch_stock_data, symbol, cache_key, ttl)
+
+    def refresh_stock_data_bulk(self, symbols, ttl=None):
+        """Fetching fresh quotes for symbols concurrently, ignoring what is cached.
+
+        The quotes are cached for ttl seconds when given, instead of the usual market-hours TTL.
+        Refreshes aren't views.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        fetch = copy_app_context(self._refresh_stock_data)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            return dict(zip(symbols, executor.map(fetch, symbols, [ttl] * len(symbols))))
+
+    def get_stock_data_bulk(self, symbols, record_views=True):
+        """Getting current stock data for several symbols at once.
+
+        Symbols are deduplicated, fresh cache entries are served directly and
+        the misses are fetched concurrently on a bounded worker pool.
+        Returns a dict of symbol -> stock data (None when the lookup failed).
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = {}
+        misses = []
+
+        for symbol in unique_symbols:
+            if self.cache.contains(f"stock_data_{symbol}"):
+                results[symbol] = self.get_stock_data(symbol, record_views)
+            else:
+                misses.append(symbol)
+
+        if len(misses) == 1:
+            results[misses[0]] = self.get_stock_data(misses[0], record_views)
+        elif misses:
+            fetch = copy_app_context(self.get_stock_data)
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as executor:
+                for symbol, data in zip(misses, executor.map(fetch, misses, [record_views] * len(misses))):
+                    results[symbol] = data
 
-    def get_historical_data(self, symbol, period='1y'):
+        return results
+
+    def get_company_overview_bulk(self, symbols):
+        """Getting OVERVIEW data for several symbols, fetching the uncached ones concurrently."""
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = {}
+        misses = []
+
+        for symbol in unique_symbols:
+            if self.cache.contains(f"company_overview_{symbol}"):
+                results[symbol] = self.get_company_overview(symbol)
+            else:
+                misses.append(symbol)
+
+        if misses:
+            fetch = copy_app_context(self.get_company_overview)
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as executor:
+                for symbol, data in zip(misses, executor.map(fetch, misses)):
+                    results[symbol] = data
+
+        return results
+
+    def get_company_overview(self, symbol):
+        """Getting the raw OVERVIEW data for a company, cached and coalesced."""
+        cache_key = f"company_overview_{symbol}"
+        data = self.cache.get(cache_key)
+        if data is not None:
+            track_cache_access(cache_key, True)
+            return data
+
+        if self._known_missing(cache_key):
+            return {}
+
+        track_cache_access(cache_key, False)
+        return self.flight.do(cache_key, self._fetch_company_overview, symbol, cache_key)
+
+    def _fetch_company_overview(self, symbol, cache_key):
+        params = {
+            'function': 'OVERVIEW',
+            'symbol': symbol,
+            'apikey': self.api_key
+        }
+
+        try:
+            response = http_client.get(self.base_url, params=params)
+            data = response.json()
+        except Exception:
+            self._remember_missing(cache_key, failed=True)
+            track_api_call('alpha_vantage', 'OVERVIEW', False)
+            raise
+
+        if data and 'Symbol' in data:
+            self.cache.set(cache_key, data, ttl=market_ttl(Config.COMPANY_OVERVIEW_TTL))
+            track_api_call('alpha_vantage', 'OVERVIEW', True)
+        else:
+            # Alpha Vantage answers unknown symbols with an empty object
+            self._remember_missing(cache_key, failed=self._is_upstream_failure(data))
+            track_api_call('alpha_vantage', 'OVERVIEW', False)
+        return data
+
+    def search_symbol(self, keywords):
+        """Getting SYMBOL_SEARCH best matches for keywords, caching both matches and empty results."""
+        cache_key = f"symbol_search_{keywords}"
+        matches = self.cache.get(cache_key)
+        if matches is not None:
+            track_cache_access(cache_key, True)
+            return matches
+        if self._known_missing(cache_key):
+            return []
+
+        track_cache_access(cache_key, False)
+        return self.flight.do(cache_key, self._fetch_symbol_search, keywords, cache_key)
+
+    def _fetch_symbol_search(self, keywords, cache_key):
+        params = {
+            'function': 'SYMBOL_SEARCH',
+            'keywords': keywords,
+            'apikey': self.api_key
+        }
+
+        try:
+            response = http_client.get(self.base_url, params=params)
+            data = response.json()
+        except Exception:
+            self._remember_missing(cache_key, failed=True)
+            track_api_call('alpha_vantage', 'SYMBOL_SEARCH', False)
+            raise
+
+        matches = data.get('bestMatches') if isinstance(data, dict) else None
+        if matches:
+            self.cache.set(cache_key, matches, ttl=Config.COMPANY_OVERVIEW_TTL)
+            track_api_call('alpha_vantage', 'SYMBOL_SEARCH', True)
+            return matches
+
+        self._remember_missing(cache_key, failed=self._is_upstream_failure(data))
+        track_api_call('alpha_vantage', 'SYMBOL_SEARCH', matches is not None)
+        return []
+
+    def get_market_movers(self):
+        """Getting the raw TOP_GAINERS_LOSERS data, cached until the market can move again."""
+        cache_key = 'market_movers'
+        data = self.cache.get(cache_key)
+        if data is not None:
+            track_cache_access(cache_key, True)
+            return data
+
+        track_cache_access(cache_key, False)
+        return self.flight.do(cache_key, self._fetch_market_movers, cache_key)
+
+    def _fetch_market_movers(self, cache_key):
+        params = {
+            'function': 'TOP_GAINERS_LOSERS',
+            'apikey': self.api_key
+        }
+
+        response = http_client.get(self.base_url, params=params)
+        data = response.json()
+
+        if data and 'top_gainers' in data:
+            self.cache.set(cache_key, data, ttl=market_ttl(Config.MARKET_MOVERS_TTL))
+            track_api_call('alpha_vantage', 'TOP_GAINERS_LOSERS', True)
+        else:
+            track_api_call('alpha_vantage', 'TOP_GAINERS_LOSERS', False)
+        return data
+
+    def get_historical_data(self, symbol, period='1y', outputsize='full'):
+        """Getting the raw TIME_SERIES_DAILY response; concurrent requests share one call."""
+        if self._known_missing(f"historical_data_{symbol}"):
+            return {}
+        return self.flight.do(f"historical_data_{symbol}_{outputsize}",
+                              self._fetch_historical_data, symbol, outputsize)
+
+    def _fetch_historical_data(self, symbol, outputsize):
         params = {
             'function': 'TIME_SERIES_DAILY',
             'symbol': symbol,
             'apikey': self.api_key,
-            'outputsize': 'full'
+            'outputsize': outputsize
         }
 
-        response = requests.get(self.base_url, params=params)
-        return response.json()
+        try:
+            response = http_client.get(self.base_url, params=params)
+            data = response.json()
+        except Exception:
+            self._remember_missing(f"historical_data_{symbol}", failed=True)
+            raise
+
+        if not isinstance(data, dict) or 'Time Series (Daily)' not in data:
+            self._remember_missing(f"historical_data_{symbol}", failed=self._is_upstream_failure(data))
+        return data
 
     def check_price_alerts(self, user_id):
         """Checking price alerts for a user and generating notifications if needed"""
@@ -5,10 +5,14 @@ import pandas as pd
 from sklearn.linear_model import LinearRegression
 from datetime import datetime, timedelta
 
+from app.monitoring.tracing import span
+from app.services.price_store import PriceStore
+
 
 class MLService:
     def __init__(self, market_service):
         self.market_service = market_service
+        self.price_store = PriceStore(market_service)
         self.model = {} #cache for trained models
 
     # Predicting stock movement  method
@@ -49,49 +53,23 @@ class MLService:
 
 #Historical data method
     def _get_historical_data(self, symbol, period='200d'):
-        #Getting historical price data for a symbol
+        #Getting historical price data for a symbol from the local price store
         try:
-            params = {
-                'function': 'TIME_SERIES_DAILY',
-                'symbol': symbol,
-                'apikey': self.market_service.api_key,
-                'outputsize': 'full'
-            }
-
-            import requests
-            response = requests.get(self.market_service.base_url, params=params)
-            result = response.json()
-
-            if 'Time Series (Daily)' in result:
-                #Converting Data to Dataframe
-                time_series = result['Time Series (Daily)']
-                data_points = []
-
-                for date_str, values in time_series.items():
-                    data_points.append({
-                        'date': date_str,
-                        'open': float(values['1. open']),
-                        'high': float(values['2. high']),
-                        'low': float(values['3. low']),
-                        'close': float(values['4. close']),
-                        'volume': float(values['5. volume'])
-                    })
-
-                df = pd.DataFrame(data_points)
-                df['date'] = pd.to_datetime(df['date'])
-                df = df.sort_values('date')
-
-                # print(f"Retrieved {len(df)} rows of historical data for {symbol}")
-                return df
-
-            print(f"No Time Series data found for {symbol}")
-            return None
+            df = self.price_store.get_daily_bars(symbol)
+
+            if df.empty:
+                print(f"No Time Series data found for {symbol}")
+                return None
+
+            # print(f"Retrieved {len(df)} rows of historical data for {symbol}")
+            return df
 
         except Exception as e:
             print(f"Error fetching historical data for {symbol}: {e}")
             return None
 
     # Generate Feature method
+    @span('features')
     def _generate_features(self, df):
         """Generating features for prediction model"""
         # print(f"Generating features. DataFrame shape: {df.shape}")
@@ -201,15 +179,16 @@ class MLService:
 
             # Fit the linear regression model
             from sklearn.linear_model import LinearRegression
-            model = LinearRegression()
-            model.fit(X, y)
+            with span('ml_fit'):
+                model = LinearRegression()
+                model.fit(X, y)
 
-            # Get the latest data point for prediction
-            latest_data = df[features].iloc[-1:].values
-            # print(f"Latest data shape for {symbol}: {latest_data.shape}")
+                # Get the latest data point for prediction
+                latest_data = df[features].iloc[-1:].values
+                # print(f"Latest data shape for {symbol}: {latest_data.shape}")
 
-            # Make prediction
-            predicted_return = model.predict(latest_data)[0]
+                # Make prediction
+                predicted_return = model.predict(latest_data)[0]
 
             # Blend with simple prediction for robustness
             blended_return = (predicted_return + recent_return) / 2
@@ -1,46 +1,66 @@
-import requests
 from datetime import datetime, timedelta
 import time
 
+from config import Config
+
+from app.monitoring.metrics import track_api_call, track_cache_access
+from app.services.http_client import http_client
+from app.services.async_market_client import AsyncMarketClient
+
 class NewsService:
     def __init__(self, marketService):
         self.market_service = marketService
         self.api_key = self.market_service.api_key
-        self.base_url = 'https://www.alphavantage.co/query'
+        self.base_url = Config.ALPHA_VANTAGE_BASE_URL
+        self.async_client = AsyncMarketClient(self.market_service, self)
 
     def get_news_for_portfolio(self, holdings, limit=6):
-        news_items = []
         symbols = [holding.symbol for holding in holdings]
 
-        for symbol in symbols:
-            news = self.get_company_news(symbol)
-            if news:
-                news_items.extend(news)
-            time.sleep(1)  # Rate Limiter
+        # Fetching every holding's news concurrently; each symbol's feed is cached on its own
+        feeds = self.async_client.map(self.async_client.news, symbols)
+
+        # The same article often shows up under several holdings, so keeping the first copy per URL
+        articles = {}
+        for news in feeds.values():
+            for item in news or []:
+                articles.setdefault(item['url'] if item['url'] != '#' else item['title'], item)
 
         # Sorting by date
-        news_items.sort(key=lambda x: x.get('published_at', ''), reverse=True)
+        news_items = sorted(articles.values(), key=lambda x: x.get('published_at', ''), reverse=True)
 
-        # Grouping by sentiment
-        positive_news = [item for item in news_items if item['sentiment'] in ['bullish', 'somewhat-bullish']]
-        neutral_news = [item for item in news_items if item['sentiment'] == 'neutral']
-        negative_news = [item for item in news_items if item['sentiment'] in ['bearish', 'somewhat-bearish']]
+        # Grouping by the sentiment already mapped in _format_news_item
+        buckets = {'positive': [], 'neutral': [], 'negative': []}
+        for item in news_items:
+            buckets[item['sentiment']].append(item)
 
         # Selecting a mix of news (prioritizing diverse sentiment)
-        result = []
-        if negative_news: result.append(negative_news[0])
-        if positive_news: result.append(positive_news[0])
-        if neutral_news: result.append(neutral_news[0])
+        result = [buckets[sentiment][0] for sentiment in ('negative', 'positive', 'neutral') if buckets[sentiment]]
 
         # Filling the  remaining slots with most recent news
         remaining_count = limit - len(result)
         if remaining_count > 0:
-            remaining_news = [n for n in news_items if n not in result]
-            result.extend(remaining_news[:remaining_count])
+            chosen = {id(item) for item in result}
+            result.extend([n for n in news_items if id(n) not in chosen][:remaining_count])
 
         return result[:limit]
 
     def get_company_news(self, symbol):
+        """Getting a symbol's formatted news feed, cached for NEWS_CACHE_TTL and coalesced."""
+        cache_key = f"company_news_{symbol}"
+        news = self.market_service.cache.get(cache_key)
+        if news is not None:
+            track_cache_access(cache_key, True)
+            return news
+
+        if self.market_service._known_missing(cache_key):
+            return []
+
+        track_cache_access(cache_key, False)
+        # Concurrent requests for the same symbol share one upstream call
+        return self.market_service.flight.do(cache_key, self._fetch_company_news, symbol, cache_key)
+
+    def _fetch_company_news(self, symbol, cache_key):
         try:
             params = {
                 'function': 'NEWS_SENTIMENT',
@@ -49,23 +69,18 @@ class NewsService:
                 'limit': 5
             }
 
-            response = requests.get(self.base_url, params=params)
+            response = http_client.get(self.base_url, params=params)
             data = response.json()
 
-            # # Debug: Print raw data structure
-            # print(f"Raw response for {symbol}: {data}")
-
             if 'feed' in data:
                 news_items = [self._format_news_item(item, symbol) for item in data['feed']]
-
-                # Debug: Count sentiment distribution
-                sentiment_counts = {}
-                for item in news_items:
-                    sentiment = item['sentiment']
-                    sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
-                # print(f"Sentiment distribution for {symbol}: {sentiment_counts}")
-
+                self.market_service.cache.set(cache_key, news_items, ttl=Config.NEWS_CACHE_TTL)
+                track_api_call('alpha_vantage', 'NEWS_SENTIMENT', True)
                 return news_items
+
+            # Rate-limit notes and errors are retried after the short failure window
+            self.market_service._remember_missing(cache_key, failed=True)
+            track_api_call('alpha_vantage', 'NEWS_SENTIMENT', False)
             return []
         except Exception as e:
             print(f"Error fetching news for {symbol}: {e}")
@@ -115,7 +130,7 @@ class NewsService:
                 'limit': limit
             }
 
-            response = requests.get(self.base_url, params=params)
+            response = http_client.get(self.base_url, params=params)
             data = response.json()
 
             news_items = []
@@ -12,8 +12,11 @@ class PerformanceService:
             total_cost = 0
             performance_data = []
 
-            for holding in portfolio.holdings:
-                current_data = self.market_service.get_stock_data(holding.symbol)
+            holdings = list(portfolio.holdings)
+            quotes = self.market_service.get_stock_data_bulk([holding.symbol for holding in holdings])
+
+            for holding in holdings:
+                current_data = quotes.get(holding.symbol)
                 if current_data:
                     current_price = current_data['current_price']
                     current_value = current_price * holding.quantity
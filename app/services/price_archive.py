@@ -0,0 +1,82 @@
+import glob
+import os
+import threading
+
+import numpy as np
+
+from config import Config
+
+
+class PriceArchive:
+    """On-disk columnar archive of daily OHLCV bars, loaded by memory-mapping.
+
+    Each symbol version is two .npy files: a datetime64[D] date index and a
+    float64 (5, n) block whose rows are the open/high/low/close/volume columns,
+    so every column is a contiguous read-only view. Files are named by version
+    and never rewritten in place, which lets workers keep using an old mapping
+    while a newer version is written next to it.
+    """
+
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, root):
+        self._lock = threading.Lock()
+        self._mapped = {}
+        self.configure(root)
+
+    def configure(self, root):
+        # The directory is created on the first write, not when the module is imported
+        self.root = root
+        with self._lock:
+            self._mapped.clear()
+
+    def _path(self, symbol, version, part):
+        return os.path.join(self.root, f"{symbol}__{version}.{part}.npy")
+
+    def load(self, symbol, version):
+        """Getting (dates, ohlcv) memory-mapped arrays for a symbol version, or None if not archived."""
+        with self._lock:
+            mapped = self._mapped.get(symbol)
+            if mapped and mapped[0] == version:
+                return mapped[1], mapped[2]
+
+        try:
+            dates = np.load(self._path(symbol, version, 'dates'), mmap_mode='r')
+            ohlcv = np.load(self._path(symbol, version, 'ohlcv'), mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+
+        with self._lock:
+            self._mapped[symbol] = (version, dates, ohlcv)
+        return dates, ohlcv
+
+    def write(self, symbol, version, dates, ohlcv):
+        """Archiving a symbol version and dropping older versions. Returns the mapped arrays."""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        ohlcv = np.ascontiguousarray(ohlcv, dtype=np.float64).reshape(len(self.COLUMNS), len(dates))
+
+        os.makedirs(self.root, exist_ok=True)
+        # The date index is written last, so a version only loads once both files are complete
+        for part, array in (('ohlcv', ohlcv), ('dates', dates)):
+            path = self._path(symbol, version, part)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+
+        for path in glob.glob(os.path.join(self.root, f"{glob.escape(symbol)}__*.npy")):
+            if not os.path.basename(path).startswith(f"{symbol}__{version}."):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        return self.load(symbol, version)
+
+
+price_archive = PriceArchive(Config.PRICE_ARCHIVE_DIR)
+
+
+def init_app(app):
+    """Pointing the shared archive at the app's archive directory."""
+    price_archive.configure(app.config.get('PRICE_ARCHIVE_DIR', Config.PRICE_ARCHIVE_DIR))
@@ -0,0 +1,145 @@
+from datetime import datetime, date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.market_data import DailyPrice, PriceSeriesStatus
+from app.services.price_archive import PriceArchive, price_archive
+
+# A compact response covers the last 100 trading days (~140 calendar days)
+COMPACT_WINDOW_DAYS = 130
+
+# Row of the close column in the archived ohlcv block
+CLOSE = PriceArchive.COLUMNS.index('close')
+
+
+class PriceStore:
+    """Local daily OHLCV store shared by every historical price consumer.
+
+    A symbol's full history is downloaded once; afterwards the series is topped
+    up with a compact request at most once per day. Reads go through the
+    memory-mapped price archive, which is rebuilt from the table after each refresh.
+    """
+
+    def __init__(self, market_service, archive=price_archive):
+        self.market_service = market_service
+        self.archive = archive
+
+    def get_daily_bars(self, symbol, start=None, end=None, limit=None):
+        """Getting daily bars (oldest first) as a DataFrame with date/open/high/low/close/volume."""
+        dates, ohlcv = self.get_columns(symbol, start=start, end=end, limit=limit)
+
+        df = pd.DataFrame({'date': pd.to_datetime(dates)})
+        for i, column in enumerate(PriceArchive.COLUMNS):
+            df[column] = ohlcv[i]
+        return df
+
+    def get_close_panel(self, symbols, limit=None):
+        """Getting closing prices as a DataFrame indexed by date with one column per symbol."""
+        closes = {}
+        for symbol in symbols:
+            dates, ohlcv = self.get_columns(symbol, limit=limit)
+            if len(dates):
+                closes[symbol] = pd.Series(ohlcv[CLOSE], index=pd.DatetimeIndex(dates))
+        if not closes:
+            return pd.DataFrame()
+        return pd.concat(closes, axis=1, join='outer')
+
+    def get_columns(self, symbol, start=None, end=None, limit=None):
+        """Getting (dates, ohlcv) read-only NumPy views from the price archive, oldest first.
+
+        ohlcv has one row per column in PriceArchive.COLUMNS, so ohlcv[CLOSE] is the close series.
+        """
+        self.refresh(symbol)
+
+        status = db.session.get(PriceSeriesStatus, symbol)
+        if status is None or status.latest_date is None:
+            return np.empty(0, dtype='datetime64[D]'), np.empty((len(PriceArchive.COLUMNS), 0))
+
+        # The archive is versioned by the status row, so any refresh (from any worker) invalidates it
+        version = status.updated_at.strftime('%Y%m%d%H%M%S%f')
+        columns = self.archive.load(symbol, version) or self._export(symbol, version)
+        dates, ohlcv = columns
+
+        lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end else len(dates)
+        if limit:
+            lo = max(lo, hi - limit)
+        return dates[lo:hi], ohlcv[:, lo:hi]
+
+    def _export(self, symbol, version):
+        """Writing a symbol's stored bars to the price archive."""
+        rows = DailyPrice.query.filter(DailyPrice.symbol == symbol).order_by(DailyPrice.date.asc()).with_entities(
+            DailyPrice.date, DailyPrice.open, DailyPrice.high, DailyPrice.low,
+            DailyPrice.close, DailyPrice.volume).all()
+
+        dates = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        ohlcv = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(PriceArchive.COLUMNS)).T
+        return self.archive.write(symbol, version, dates, ohlcv)
+
+    def refresh(self, symbol):
+        """Bringing a symbol's stored history up to date; concurrent refreshes share one fetch."""
+        return self.market_service.flight.do(f"price_store_{symbol}", self._refresh, symbol)
+
+    def _refresh(self, symbol):
+        status = db.session.get(PriceSeriesStatus, symbol)
+        today = date.today()
+
+        if status and status.refreshed_on == today:
+            return False
+
+        # Gaps longer than a compact response need the full history again
+        needs_full = (status is None or status.backfilled_at is None or status.latest_date is None or
+                      (today - status.latest_date).days > COMPACT_WINDOW_DAYS)
+        outputsize = 'full' if needs_full else 'compact'
+
+        result = self.market_service.get_historical_data(symbol, outputsize=outputsize)
+        time_series = result.get('Time Series (Daily)') if result else None
+        if not time_series:
+            print(f"No Time Series data found for {symbol}")
+            return False
+
+        rows = self._parse_time_series(symbol, time_series)
+        first_date = min(row['date'] for row in rows)
+
+        try:
+            # Replacing the overlapping window also corrects a previously partial latest bar
+            DailyPrice.query.filter(
+                DailyPrice.symbol == symbol,
+                DailyPrice.date >= first_date
+            ).delete(synchronize_session=False)
+            db.session.execute(insert(DailyPrice), rows)
+
+            if status is None:
+                status = PriceSeriesStatus(symbol=symbol)
+                db.session.add(status)
+            if needs_full:
+                status.backfilled_at = datetime.utcnow()
+            status.refreshed_on = today
+            status.latest_date = max(row['date'] for row in rows)
+
+            db.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            # Most likely another worker stored the same bars first
+            db.session.rollback()
+            print(f"Error storing price history for {symbol}: {e}")
+            return False
+
+    @staticmethod
+    def _parse_time_series(symbol, time_series):
+        rows = []
+        for date_str, values in time_series.items():
+            rows.append({
+                'symbol': symbol,
+                'date': datetime.strptime(date_str, '%Y-%m-%d').date(),
+                'open': float(values['1. open']),
+                'high': float(values['2. high']),
+                'low': float(values['3. low']),
+                'close': float(values['4. close']),
+                'volume': float(values['5. volume'])
+            })
+        return rows
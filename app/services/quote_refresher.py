@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from app import db
+from app.models.market_data import SymbolView
+from app.monitoring.metrics import metrics_writer
+from config import Config
+
+
+class QuoteRefresher:
+    """Background refreshes for stale and hot quotes.
+
+    Stale cache hits are served immediately and their refresh is queued here;
+    a key is only queued once until its refresh finishes. Symbol views are
+    stored in the database, through the buffered metrics writer, so the
+    scheduled hot-symbol job sees the views from every worker, not just
+    those of the worker that runs it.
+    """
+
+    def __init__(self, max_workers=4):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = None
+        self.configure(max_workers)
+
+    def configure(self, max_workers=4):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='quote-refresh')
+            self._pending.clear()
+
+    def submit(self, key, func, *args):
+        """Queueing func(*args) unless a refresh for key is already pending. Returns True if queued."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            executor = self._executor
+
+        def run():
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        executor.submit(run)
+        return True
+
+    def record_view(self, symbol):
+        metrics_writer.record(SymbolView, symbol=symbol, weight=1.0)
+
+    def most_viewed(self, limit):
+        """Getting the most viewed symbols, across every worker. Reading doesn't change the counts."""
+        total = func.sum(SymbolView.weight)
+        rows = db.session.query(SymbolView.symbol).group_by(SymbolView.symbol).order_by(
+            total.desc(), SymbolView.symbol).limit(limit).all()
+        return [row.symbol for row in rows]
+
+    def decay_views(self, factor=0.5):
+        """Scaling every symbol's views by factor, folding its rows into one. Returns how many symbols are kept.
+
+        Symbols left with less than one view are forgotten. Views written while
+        this runs are newer than the rows read, so they are left untouched.
+        """
+        last_id = db.session.query(func.max(SymbolView.id)).scalar()
+        if last_id is None:
+            return 0
+
+        totals = db.session.query(SymbolView.symbol, func.sum(SymbolView.weight)).filter(
+            SymbolView.id <= last_id).group_by(SymbolView.symbol).all()
+        SymbolView.query.filter(SymbolView.id <= last_id).delete(synchronize_session=False)
+        kept = [SymbolView(symbol=symbol, weight=weight * factor) for symbol, weight in totals if weight * factor >= 1]
+        db.session.add_all(kept)
+        db.session.commit()
+        return len(kept)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending)
+            }
+
+
+quote_refresher = QuoteRefresher(max_workers=Config.QUOTE_REFRESH_WORKERS)
+
+
+def init_app(app):
+    """Resetting the shared refresher with the app's worker count."""
+    quote_refresher.configure(app.config.get('QUOTE_REFRESH_WORKERS', Config.QUOTE_REFRESH_WORKERS))
@@ -0,0 +1,160 @@
+import itertools
+import threading
+
+from config import Config
+
+# Fields that make up a streamed quote; a symbol is re-sent only when one of these changes
+QUOTE_FIELDS = ('current_price', 'daily_change', 'daily_change_percent', 'volume', 'stale')
+
+
+class Subscription:
+    def __init__(self, subscription_id, symbols):
+        self.id = subscription_id
+        self.symbols = symbols
+        self.seen = {}  # symbol -> version last sent to this client
+
+
+class QuoteStream:
+    """Live quotes for streaming clients, fed by one poller thread per process.
+
+    The poller refreshes the union of every subscriber's symbols through the
+    shared quote cache, so upstream load follows the number of distinct
+    symbols, not the number of open tabs. Each subscriber is handed only the
+    symbols whose quote changed since it last looked. At most max_subscribers
+    clients are served at once, since each one holds a request thread.
+    """
+
+    def __init__(self, interval=15, max_subscribers=8):
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._ids = itertools.count(1)
+        self._subscriptions = {}
+        self._quotes = {}  # symbol -> (version, quote)
+        self._version = 0
+        self._thread = None
+        self._app = None
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+
+    def configure(self, app, interval=15, max_subscribers=8):
+        with self._changed:
+            self._app = app
+            self.interval = interval
+            self.max_subscribers = max_subscribers
+            self._subscriptions.clear()
+            self._quotes.clear()
+
+    def subscribe(self, symbols):
+        """Registering a client for symbols; the first updates() returns every quote already known.
+
+        Returns None when max_subscribers clients are already streaming.
+        """
+        subscription = Subscription(next(self._ids), frozenset(symbols))
+        with self._changed:
+            if len(self._subscriptions) >= self.max_subscribers:
+                return None
+            self._subscriptions[subscription.id] = subscription
+            new_symbols = any(symbol not in self._quotes for symbol in subscription.symbols)
+            self._ensure_poller()
+        if new_symbols:
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Removing a client, and the quotes of symbols nobody is watching any more."""
+        with self._changed:
+            self._subscriptions.pop(subscription.id, None)
+            watched = self._watched()
+            for symbol in subscription.symbols - watched:
+                self._quotes.pop(symbol, None)
+
+    def updates(self, subscription, timeout):
+        """Waiting up to timeout seconds for quotes the subscriber hasn't seen. Returns symbol -> quote."""
+        with self._changed:
+            changed = self._unseen(subscription)
+            if not changed:
+                self._changed.wait(timeout)
+                changed = self._unseen(subscription)
+
+            for symbol in changed:
+                subscription.seen[symbol] = self._quotes[symbol][0]
+            return {symbol: self._quotes[symbol][1] for symbol in changed}
+
+    def publish(self, quotes, subscribed_only=False):
+        """Storing fresh quotes and waking subscribers if any of them changed.
+
+        With subscribed_only, quotes for symbols whose last subscriber left
+        while they were being fetched are dropped rather than kept.
+        """
+        with self._changed:
+            watched = self._watched() if subscribed_only else None
+            changed = False
+            for symbol, data in quotes.items():
+                if not data or (watched is not None and symbol not in watched):
+                    continue
+                quote = {field: data.get(field) for field in QUOTE_FIELDS}
+                current = self._quotes.get(symbol)
+                if current is None or current[1] != quote:
+                    self._version += 1
+                    self._quotes[symbol] = (self._version, quote)
+                    changed = True
+            if changed:
+                self._changed.notify_all()
+
+    def subscribed_symbols(self):
+        with self._changed:
+            return sorted(self._watched())
+
+    def get_stats(self):
+        with self._changed:
+            return {
+                'subscribers': len(self._subscriptions),
+                'max_subscribers': self.max_subscribers,
+                'symbols': len(self._watched()),
+                'quotes': len(self._quotes),
+                'poller_running': bool(self._thread and self._thread.is_alive())
+            }
+
+    def _watched(self):
+        return {symbol for sub in self._subscriptions.values() for symbol in sub.symbols}
+
+    def _unseen(self, subscription):
+        return [symbol for symbol in subscription.symbols
+                if symbol in self._quotes and self._quotes[symbol][0] > subscription.seen.get(symbol, 0)]
+
+    def _ensure_poller(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='quote-stream', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        from app.services.market_service import MarketService
+
+        market_service = None
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+            symbols = self.subscribed_symbols()
+            if not symbols or self._app is None:
+                continue
+
+            try:
+                with self._app.app_context():
+                    market_service = market_service or MarketService()
+                    # Served from the quote cache; only expired symbols reach Alpha Vantage. Polls aren't
+                    # views, or an idle tab would keep its symbols at the top of the most viewed.
+                    quotes = market_service.get_stock_data_bulk(symbols, record_views=False)
+                    self.publish(quotes, subscribed_only=True)
+            except Exception as e:
+                print(f"Error polling streamed quotes: {e}")
+
+
+# One poller per process, shared by every streaming request
+quote_stream = QuoteStream(Config.QUOTE_STREAM_INTERVAL, Config.QUOTE_STREAM_MAX_CLIENTS)
+
+
+def init_app(app):
+    """Binding the poller to the app and applying its polling interval and client cap."""
+    quote_stream.configure(app, app.config.get('QUOTE_STREAM_INTERVAL', Config.QUOTE_STREAM_INTERVAL),
+                           app.config.get('QUOTE_STREAM_MAX_CLIENTS', Config.QUOTE_STREAM_MAX_CLIENTS))
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no token became available within the allowed wait."""
+
+
+class TokenBucket:
+    """In-process token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(self, rate_per_minute, capacity):
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        """Taking tokens if available. Returns 0 on success, else seconds until they will be."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+
+class SQLiteTokenBucket:
+    """Token bucket kept in a local SQLite file, so every worker on the host shares one budget."""
+
+    def __init__(self, path, rate_per_minute, capacity, name='alpha_vantage'):
+        self.path = path
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS token_bucket ('
+            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def try_acquire(self, tokens=1):
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock, serialising workers on the read-modify-write
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute(
+                'SELECT tokens, updated_at FROM token_bucket WHERE name = ?', (self.name,)
+            ).fetchone()
+            available = self.capacity if row is None else min(
+                self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+
+            wait = 0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / self.rate
+
+            conn.execute(
+                'INSERT OR REPLACE INTO token_bucket (name, tokens, updated_at) VALUES (?, ?, ?)',
+                (self.name, available, now)
+            )
+            conn.execute('COMMIT')
+            return wait
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class RateLimiter:
+    """Process-wide handle on the configured bucket; disabled when the rate is 0."""
+
+    def __init__(self, bucket=None, max_wait=30):
+        self.bucket = bucket
+        self.max_wait = max_wait
+
+    def acquire(self, tokens=1):
+        """Blocking until tokens are available, sleeping only while the bucket is empty."""
+        if self.bucket is None:
+            return
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self.bucket.try_acquire(tokens)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(f"No API quota available within {self.max_wait}s")
+            time.sleep(wait)
+
+
+def build_bucket(config):
+    """Creating the bucket described by a config mapping, or None when unlimited."""
+    rate = config.get('ALPHA_VANTAGE_CALLS_PER_MINUTE', Config.ALPHA_VANTAGE_CALLS_PER_MINUTE)
+    if not rate:
+        return None
+
+    capacity = config.get('ALPHA_VANTAGE_BURST', Config.ALPHA_VANTAGE_BURST)
+    if config.get('ALPHA_VANTAGE_RATE_LIMIT_SCOPE', Config.ALPHA_VANTAGE_RATE_LIMIT_SCOPE) == 'host':
+        return SQLiteTokenBucket(
+            config.get('RATE_LIMIT_PATH', Config.RATE_LIMIT_PATH), rate, capacity
+        )
+    return TokenBucket(rate, capacity)
+
+
+alpha_vantage_limiter = RateLimiter(max_wait=Config.ALPHA_VANTAGE_MAX_WAIT)
+
+
+def init_app(app):
+    """Applying the app's Alpha Vantage plan limits to the shared limiter."""
+    alpha_vantage_limiter.bucket = build_bucket(app.config)
+    alpha_vantage_limiter.max_wait = app.config.get('ALPHA_VANTAGE_MAX_WAIT', Config.ALPHA_VANTAGE_MAX_WAIT)
@@ -1,4 +1,3 @@
-import requests
 import numpy as np
 from datetime import datetime, timedelta
 from flask_migrate import current
@@ -6,12 +5,14 @@ from flask_migrate import current
 from app.models.user import UserSettings
 
 from app.models.user import User
+from app.services.company_index import CompanyIndex
 
 
 class RecommendationService:
     def __init__(self, market_service, risk_service):
         self.market_service = market_service
         self.risk_service = risk_service
+        self.company_index = CompanyIndex(market_service)
         self.sector_targets = {
             'Technology': 0.25,
             'Healthcare': 0.15,
@@ -378,94 +379,12 @@ class RecommendationService:
             return recommendations
 
     def _get_stock_sectors(self, symbols):
-        """Getting sectors for a list of stock symbols"""
-        sector_map = {}
-
-        # pre-defined mapping for common stocks
-        SECTOR_MAPPING = {
-            # Technology
-            'AAPL': 'Technology', 'MSFT': 'Technology', 'GOOGL': 'Technology',
-            'GOOG': 'Technology', 'META': 'Technology', 'AMZN': 'Technology',
-            'NFLX': 'Technology', 'NVDA': 'Technology', 'AMD': 'Technology',
-            'INTC': 'Technology', 'CSCO': 'Technology', 'ORCL': 'Technology',
-            'IBM': 'Technology', 'ADBE': 'Technology', 'CRM': 'Technology',
-            'AAME': 'Technology',
-
-            # Healthcare
-            'JNJ': 'Healthcare', 'PFE': 'Healthcare', 'UNH': 'Healthcare',
-            'ABBV': 'Healthcare', 'MRK': 'Healthcare', 'TMO': 'Healthcare',
-            'ABT': 'Healthcare', 'DHR': 'Healthcare', 'BMY': 'Healthcare',
-
-            # Financials
-            'JPM': 'Financials', 'BAC': 'Financials', 'WFC': 'Financials',
-            'C': 'Financials', 'GS': 'Financials', 'MS': 'Financials',
-            'BLK': 'Financials', 'AXP': 'Financials', 'V': 'Financials',
-            'MA': 'Financials',
-
-            # Consumer Defensive
-            'PG': 'Consumer Defensive', 'KO': 'Consumer Defensive', 'PEP': 'Consumer Defensive',
-            'WMT': 'Consumer Defensive', 'COST': 'Consumer Defensive',
-
-            # Energy
-            'XOM': 'Energy', 'CVX': 'Energy', 'COP': 'Energy',
-            'SLB': 'Energy', 'EOG': 'Energy',
-
-            # Communication Services
-            'VZ': 'Communication Services', 'T': 'Communication Services',
-            'CMCSA': 'Communication Services', 'CHTR': 'Communication Services',
-            'DIS': 'Communication Services',
-
-            # Utilities
-            'NEE': 'Utilities', 'DUK': 'Utilities', 'SO': 'Utilities',
-            'D': 'Utilities', 'AEP': 'Utilities',
-
-            # Industrials
-            'HON': 'Industrials', 'UNP': 'Industrials', 'UPS': 'Industrials',
-            'BA': 'Industrials', 'CAT': 'Industrials', 'GE': 'Industrials',
-
-            # Materials
-            'LIN': 'Materials', 'APD': 'Materials', 'ECL': 'Materials',
-            'DD': 'Materials', 'DOW': 'Materials',
-
-            # Real Estate
-            'AMT': 'Real Estate', 'PLD': 'Real Estate', 'CCI': 'Real Estate',
-            'EQIX': 'Real Estate', 'PSA': 'Real Estate'
-        }
-
-        for symbol in symbols:
-            # First check our predefined mapping
-            if symbol in SECTOR_MAPPING:
-                sector_map[symbol] = SECTOR_MAPPING[symbol]
-                continue
-
-            # trying to use  API if not in predefined list
-            try:
-                params = {
-                    'function': 'OVERVIEW',
-                    'symbol': symbol,
-                    'apikey': self.market_service.api_key
-                }
-
-                response = requests.get(self.market_service.base_url, params=params)
-                data = response.json()
-
-                if 'Sector' in data:
-                    sector_map[symbol] = data['Sector']
-                else:
-                    sector_map[symbol] = 'Unknown'
-
-                # Adding to Data from Api to my mapping for future reference
-                SECTOR_MAPPING[symbol] = sector_map[symbol]
-            except Exception as e:
-                # print(f"Error getting sector for {symbol}: {e}")
-                sector_map[symbol] = 'Unknown'
-
-        # # Debugging output
-        # # print(f"Sector mapping for symbols {symbols}:")
-        # for symbol, sector in sector_map.items():
-        #     print(f"  {symbol}: {sector}")
-
-        return sector_map
+        """Getting sectors for a list of stock symbols from the company index"""
+        try:
+            return self.company_index.get_sectors(symbols)
+        except Exception as e:
+            print(f"Error getting sectors for {symbols}: {e}")
+            return {symbol: 'Unknown' for symbol in symbols}
 
 
 
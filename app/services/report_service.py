@@ -2,7 +2,9 @@ from app import db
 from app.models.report import Report
 from app.models.user import User
 from app.models.portfolio import Portfolio, Holding
+from app.monitoring.tracing import span
 from app.services.market_service import MarketService
+from app.services.company_index import CompanyIndex
 from app.services.notification_service import NotificationService
 from datetime import datetime
 import pandas as pd
@@ -23,6 +25,7 @@ from reportlab.lib.pagesizes import letter
 class ReportService:
     def __init__(self):
         self.market_service = MarketService()
+        self.company_index = CompanyIndex(self.market_service)
         self.notification_service = NotificationService()
 
     def create_report(self, user_id, title, description, report_type, format='pdf'):
@@ -154,34 +157,35 @@ class ReportService:
         report_file = os.path.join(report_dir, f"performance_report_{report.id}.pdf")
 
         # Use matplotlib to create visualizations
-        plt.figure(figsize=(10, 8))
-
-        # Plot performance over time for each portfolio
-        plt.subplot(2, 1, 1)
-        for data in all_portfolio_data:
-            plt.plot(data['history_df']['date'], data['history_df']['value'], label=data['portfolio_name'])
-
-        plt.title('Portfolio Value Over Time')
-        plt.xlabel('Date')
-        plt.ylabel('Value ($)')
-        plt.legend()
-        plt.grid(True)
-
-        # Create a bar chart of total returns
-        plt.subplot(2, 1, 2)
-        portfolio_names = [data['portfolio_name'] for data in all_portfolio_data]
-        returns = [data['total_return'] for data in all_portfolio_data]
-
-        plt.bar(portfolio_names, returns)
-        plt.title('Total Return by Portfolio')
-        plt.xlabel('Portfolio')
-        plt.ylabel('Total Return (%)')
-        plt.xticks(rotation=45)
-        plt.grid(True, axis='y')
-
-        plt.tight_layout()
-        plt.savefig(report_file)
-        plt.close()
+        with span('charts'):
+            plt.figure(figsize=(10, 8))
+
+            # Plot performance over time for each portfolio
+            plt.subplot(2, 1, 1)
+            for data in all_portfolio_data:
+                plt.plot(data['history_df']['date'], data['history_df']['value'], label=data['portfolio_name'])
+
+            plt.title('Portfolio Value Over Time')
+            plt.xlabel('Date')
+            plt.ylabel('Value ($)')
+            plt.legend()
+            plt.grid(True)
+
+            # Create a bar chart of total returns
+            plt.subplot(2, 1, 2)
+            portfolio_names = [data['portfolio_name'] for data in all_portfolio_data]
+            returns = [data['total_return'] for data in all_portfolio_data]
+
+            plt.bar(portfolio_names, returns)
+            plt.title('Total Return by Portfolio')
+            plt.xlabel('Portfolio')
+            plt.ylabel('Total Return (%)')
+            plt.xticks(rotation=45)
+            plt.grid(True, axis='y')
+
+            plt.tight_layout()
+            plt.savefig(report_file)
+            plt.close()
 
         # Update the report record with the file path
         report.file_path = report_file
@@ -227,6 +231,8 @@ class ReportService:
 
         # Collect all holdings data
         all_holdings = []
+        sectors = self.company_index.get_sectors(
+            [holding.symbol for portfolio in portfolios for holding in portfolio.holdings])
         for portfolio in portfolios:
             for holding in portfolio.holdings:
                 stock_data = self.market_service.get_stock_data(holding.symbol)
@@ -242,7 +248,7 @@ class ReportService:
                     'quantity': holding.quantity,
                     'current_price': current_price,
                     'current_value': current_value,
-                    'sector': stock_data.get('sector', 'Unknown'),
+                    'sector': sectors.get(holding.symbol, 'Unknown'),
                     'asset_type': stock_data.get('asset_type', 'Stock')
                 }
                 all_holdings.append(holding_data)
@@ -269,23 +275,24 @@ class ReportService:
         report_file = os.path.join(report_dir, f"allocation_report_{report.id}.pdf")
 
         # Use matplotlib to create visualizations
-        plt.figure(figsize=(12, 10))
+        with span('charts'):
+            plt.figure(figsize=(12, 10))
 
-        # Sector allocation pie chart
-        plt.subplot(2, 1, 1)
-        plt.pie(sector_allocation['percentage'], labels=sector_allocation['sector'], autopct='%1.1f%%')
-        plt.title('Portfolio Allocation by Sector')
-        plt.axis('equal')
+            # Sector allocation pie chart
+            plt.subplot(2, 1, 1)
+            plt.pie(sector_allocation['percentage'], labels=sector_allocation['sector'], autopct='%1.1f%%')
+            plt.title('Portfolio Allocation by Sector')
+            plt.axis('equal')
 
-        # Asset type allocation pie chart
-        plt.subplot(2, 1, 2)
-        plt.pie(asset_allocation['percentage'], labels=asset_allocation['asset_type'], autopct='%1.1f%%')
-        plt.title('Portfolio Allocation by Asset Type')
-        plt.axis('equal')
+            # Asset type allocation pie chart
+            plt.subplot(2, 1, 2)
+            plt.pie(asset_allocation['percentage'], labels=asset_allocation['asset_type'], autopct='%1.1f%%')
+            plt.title('Portfolio Allocation by Asset Type')
+            plt.axis('equal')
 
-        plt.tight_layout()
-        plt.savefig(report_file)
-        plt.close()
+            plt.tight_layout()
+            plt.savefig(report_file)
+            plt.close()
 
         # Update the report record with the file path
         report.file_path = report_file
@@ -647,29 +654,30 @@ class ReportService:
         report_file = os.path.join(report_dir, f"tax_report_{report.id}.pdf")
 
         # Use matplotlib to create visualizations
-        plt.figure(figsize=(10, 8))
+        with span('charts'):
+            plt.figure(figsize=(10, 8))
 
-        # Plot realized gains/losses
-        plt.subplot(2, 1, 1)
-        labels = ['Realized Gains/Losses', 'Dividend Income']
-        values = [total_realized_gains, total_dividend_income]
+            # Plot realized gains/losses
+            plt.subplot(2, 1, 1)
+            labels = ['Realized Gains/Losses', 'Dividend Income']
+            values = [total_realized_gains, total_dividend_income]
 
-        plt.bar(labels, values)
-        plt.title(f'Tax Summary for {tax_year}')
-        plt.ylabel('Amount ($)')
-        plt.grid(True, axis='y')
+            plt.bar(labels, values)
+            plt.title(f'Tax Summary for {tax_year}')
+            plt.ylabel('Amount ($)')
+            plt.grid(True, axis='y')
 
-        # Create a pie chart of qualified vs non-qualified dividends
-        plt.subplot(2, 1, 2)
-        qualified = sum([div['amount'] for port in tax_data for div in port['dividend_income'] if div['qualified']])
-        non_qualified = sum([div['amount'] for port in tax_data for div in port['dividend_income'] if not div['qualified']])
+            # Create a pie chart of qualified vs non-qualified dividends
+            plt.subplot(2, 1, 2)
+            qualified = sum([div['amount'] for port in tax_data for div in port['dividend_income'] if div['qualified']])
+            non_qualified = sum([div['amount'] for port in tax_data for div in port['dividend_income'] if not div['qualified']])
 
-        plt.pie([qualified, non_qualified], labels=['Qualified Dividends', 'Non-Qualified Dividends'], autopct='%1.1f%%')
-        plt.title('Dividend Breakdown')
+            plt.pie([qualified, non_qualified], labels=['Qualified Dividends', 'Non-Qualified Dividends'], autopct='%1.1f%%')
+            plt.title('Dividend Breakdown')
 
-        plt.tight_layout()
-        plt.savefig(report_file)
-        plt.close()
+            plt.tight_layout()
+            plt.savefig(report_file)
+            plt.close()
 
         # Update the report record with the file path
         report.file_path = report_file
@@ -790,55 +798,56 @@ class ReportService:
         report_file = os.path.join(report_dir, f"risk_report_{report.id}.pdf")
 
         # Use matplotlib to create visualizations
-        plt.figure(figsize=(12, 10))
-
-        # Plot volatility comparison
-        plt.subplot(2, 2, 1)
-        portfolio_names = [data['portfolio_name'] for data in all_portfolio_data]
-        volatilities = [data['volatility'] for data in all_portfolio_data]
-
-        plt.bar(portfolio_names, volatilities)
-        plt.title('Portfolio Volatility (Annualized)')
-        plt.ylabel('Volatility (%)')
-        plt.xticks(rotation=45)
-        plt.grid(True, axis='y')
-
-        # Plot max drawdown comparison
-        plt.subplot(2, 2, 2)
-        max_drawdowns = [data['max_drawdown'] for data in all_portfolio_data]
-
-        plt.bar(portfolio_names, max_drawdowns)
-        plt.title('Maximum Drawdown')
-        plt.ylabel('Drawdown (%)')
-        plt.xticks(rotation=45)
-        plt.grid(True, axis='y')
-
-        # Plot Value at Risk (VaR) for first portfolio
-        plt.subplot(2, 2, 3)
-        var_data = [[data['var_95'], data['var_99']] for data in all_portfolio_data]
-        var_labels = ['95% VaR', '99% VaR']
-
-        if var_data:
-            plt.bar(var_labels, var_data[0])
-            plt.title(f'Daily Value at Risk ({all_portfolio_data[0]["portfolio_name"]})')
-            plt.ylabel('Loss (%)')
+        with span('charts'):
+            plt.figure(figsize=(12, 10))
+
+            # Plot volatility comparison
+            plt.subplot(2, 2, 1)
+            portfolio_names = [data['portfolio_name'] for data in all_portfolio_data]
+            volatilities = [data['volatility'] for data in all_portfolio_data]
+
+            plt.bar(portfolio_names, volatilities)
+            plt.title('Portfolio Volatility (Annualized)')
+            plt.ylabel('Volatility (%)')
+            plt.xticks(rotation=45)
+            plt.grid(True, axis='y')
+
+            # Plot max drawdown comparison
+            plt.subplot(2, 2, 2)
+            max_drawdowns = [data['max_drawdown'] for data in all_portfolio_data]
+
+            plt.bar(portfolio_names, max_drawdowns)
+            plt.title('Maximum Drawdown')
+            plt.ylabel('Drawdown (%)')
+            plt.xticks(rotation=45)
             plt.grid(True, axis='y')
 
-        # Plot stress test scenarios for first portfolio
-        plt.subplot(2, 2, 4)
-        if all_portfolio_data:
-            first_portfolio = all_portfolio_data[0]
-            scenario_names = [test['scenario'] for test in first_portfolio['stress_tests']]
-            impacts = [test['impact'] for test in first_portfolio['stress_tests']]
-
-            plt.barh(scenario_names, impacts)
-            plt.title(f'Stress Test Scenarios ({first_portfolio["portfolio_name"]})')
-            plt.xlabel('Potential Loss (%)')
-            plt.grid(True, axis='x')
-
-        plt.tight_layout()
-        plt.savefig(report_file)
-        plt.close()
+            # Plot Value at Risk (VaR) for first portfolio
+            plt.subplot(2, 2, 3)
+            var_data = [[data['var_95'], data['var_99']] for data in all_portfolio_data]
+            var_labels = ['95% VaR', '99% VaR']
+
+            if var_data:
+                plt.bar(var_labels, var_data[0])
+                plt.title(f'Daily Value at Risk ({all_portfolio_data[0]["portfolio_name"]})')
+                plt.ylabel('Loss (%)')
+                plt.grid(True, axis='y')
+
+            # Plot stress test scenarios for first portfolio
+            plt.subplot(2, 2, 4)
+            if all_portfolio_data:
+                first_portfolio = all_portfolio_data[0]
+                scenario_names = [test['scenario'] for test in first_portfolio['stress_tests']]
+                impacts = [test['impact'] for test in first_portfolio['stress_tests']]
+
+                plt.barh(scenario_names, impacts)
+                plt.title(f'Stress Test Scenarios ({first_portfolio["portfolio_name"]})')
+                plt.xlabel('Potential Loss (%)')
+                plt.grid(True, axis='x')
+
+            plt.tight_layout()
+            plt.savefig(report_file)
+            plt.close()
 
         # Update the report record with the file path
         report.file_path = report_file
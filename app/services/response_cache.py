@@ -0,0 +1,132 @@
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, request
+
+from app.services.cache_service import MemoryCache
+from app.services.market_calendar import market_ttl
+from app.services.single_flight import SingleFlight
+from config import Config
+
+
+class ResponseCache:
+    """Shared cache of rendered responses for endpoints whose output is the same for every user.
+
+    Views are wrapped with cached(ttl). The key is the endpoint plus its sorted
+    query string, only 200 responses not marked with no_store are stored, and
+    concurrent misses for one key render the view once, so each window costs a
+    single upstream round.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self._lock = threading.Lock()
+        self._cache = MemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._flight = SingleFlight()
+        self._keys = {}  # endpoint -> cache keys stored for it
+        self._endpoints = {}  # endpoint -> hit/miss counters
+
+    def configure(self, max_entries=256, max_bytes=None):
+        with self._lock:
+            self._cache.configure(max_entries=max_entries, max_bytes=max_bytes)
+            self._keys.clear()
+            self._endpoints.clear()
+
+    def cached(self, ttl, market_hours=True):
+        """Decorating a view so its response is reused for ttl seconds.
+
+        With market_hours, the TTL stretches to the next open while the market
+        is closed, as quotes don't move until then.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+                    return view(*args, **kwargs)
+
+                endpoint = request.endpoint
+                key = self._key(endpoint)
+                entry = self._cache.get(key)
+                self._count(endpoint, entry is not None)
+
+                if entry is None:
+                    expires_in = market_ttl(ttl) if market_hours else ttl
+                    entry = self._flight.do(key, self._render, endpoint, key, expires_in, view, args, kwargs)
+                    return self._build(entry, 'MISS')
+                return self._build(entry, 'HIT')
+            return wrapper
+        return decorator
+
+    def invalidate(self, endpoint=None):
+        """Dropping cached responses for one endpoint, or for all of them."""
+        with self._lock:
+            endpoints = [endpoint] if endpoint else list(self._keys)
+            keys = [key for name in endpoints for key in self._keys.pop(name, ())]
+        for key in keys:
+            self._cache.delete(key)
+
+    def get_stats(self):
+        stats = self._cache.get_stats()
+        with self._lock:
+            endpoints = {}
+            for endpoint, counts in self._endpoints.items():
+                lookups = counts['hits'] + counts['misses']
+                endpoints[endpoint] = dict(counts, hit_rate=(counts['hits'] / lookups * 100) if lookups else 0.0)
+        return {
+            'entries': stats['entries'],
+            'bytes': stats['bytes'],
+            'max_entries': stats['max_entries'],
+            'evictions': stats['evictions'],
+            'endpoints': endpoints
+        }
+
+    def _render(self, endpoint, key, ttl, view, args, kwargs):
+        response = current_app.make_response(view(*args, **kwargs))
+        entry = (response.get_data(), response.status_code, response.mimetype, response.cache_control.no_store)
+
+        # Fallback content (placeholders after an upstream failure) is served once, not until the next open
+        if response.status_code == 200 and not response.cache_control.no_store:
+            self._cache.set(key, entry, ttl)
+            with self._lock:
+                self._keys.setdefault(endpoint, set()).add(key)
+        return entry
+
+    @staticmethod
+    def _build(entry, status):
+        body, status_code, mimetype, no_store = entry
+        response = current_app.response_class(body, status=status_code, mimetype=mimetype)
+        response.cache_control.no_store = no_store
+        response.headers['X-Cache'] = status
+        return response
+
+    @staticmethod
+    def _key(endpoint):
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f"{endpoint}?{query}"
+
+    def _count(self, endpoint, hit):
+        with self._lock:
+            counts = self._endpoints.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+
+def no_store(response):
+    """Marking a degraded response so neither the response cache nor the browser keeps it."""
+    response = current_app.make_response(response)
+    response.cache_control.no_store = True
+    return response
+
+
+# Shared by every market-wide endpoint in the process
+response_cache = ResponseCache(
+    max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES
+)
+
+
+def init_app(app):
+    """Applying the app's size limits to the shared response cache."""
+    response_cache.configure(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', Config.RESPONSE_CACHE_MAX_ENTRIES),
+        max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', Config.RESPONSE_CACHE_MAX_BYTES)
+    )
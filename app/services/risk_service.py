@@ -3,16 +3,19 @@ from http.client import responses
 import numpy as np
 from datetime import datetime, timedelta
 import pandas as pd
-import requests
 from config import Config
+from app.monitoring.tracing import span
+from app.services.price_store import PriceStore
 
 class RiskService:
     def __init__(self, market_service):
         self.market_service = market_service
+        self.price_store = PriceStore(market_service)
         self.risk_free_rate = 0.04 #(setting this at 4% risk_free rate)
         self.api_key = Config.ALPHA_VANTAGE_API_KEY
-        self.base_url = 'https://www.alphavantage.co/query'
+        self.base_url = Config.ALPHA_VANTAGE_BASE_URL
 
+    @span('risk')
     def calculate_portfolio_risk(self, portfolio):
         try:
             # Getting Historical data for all Stocks
@@ -43,15 +46,16 @@ class RiskService:
                 }
 
             # Calculating Porfolio weights
+            quotes = self.market_service.get_stock_data_bulk(symbols)
             total_value = 0
             for holding in portfolio.holdings:
-                stock_data = self.market_service.get_stock_data(holding.symbol)
+                stock_data = quotes.get(holding.symbol)
                 if stock_data:
                     total_value += (holding.quantity * stock_data['current_price'])
 
             weights = []
             for holding in portfolio.holdings:
-                stock_data = self.market_service.get_stock_data(holding.symbol)
+                stock_data = quotes.get(holding.symbol)
                 if stock_data:
                     weights.append(holding.quantity * stock_data['current_price'] / total_value if total_value > 0 else 0)
 
@@ -80,51 +84,12 @@ class RiskService:
             }
 
     def _get_historical_prices(self, symbols, period='1y'):
-        data = pd.DataFrame()
-
-        for symbol in symbols:
-            #Api configuration for daily time series
-            params = {
-                'function': 'TIME_SERIES_DAILY',
-                'symbol': symbol,
-                'apikey': self.api_key,
-                'outputsize': 'compact' #Just the last 100 data points
-            }
-
-            try:
-                # print(f"Fetching historical data for {symbol}...")
-                response = requests.get(self.base_url, params=params)
-                result = response.json()
-
-                if 'Time Series (Daily)' in result:
-                    time_series = result['Time Series (Daily)']
-
-
-                    #Converting the time Series to DataFrame
-                    dates = []
-                    prices = []
-                    for date, values in time_series.items():
-                        dates.append(date)
-                        prices.append(float(values['4. close']))
-
-                    # #Adding Data to main DataFrame
-                    symbol_df = pd.DataFrame({symbol: prices}, index=pd.DatetimeIndex(dates))
-
-
-                    #Appending to main dataframe
-                    if data.empty:
-                        data = symbol_df
-                    else:
-                        data = data.join(symbol_df, how='outer')
-
-            except Exception as e:
-                print(f"Error fetching historical data for {symbol}: {e}")
-
-            #Delay to avoid rate limiting
-            import time
-            time.sleep(1)
-
-        return data
+        try:
+            #Just the last 100 data points, read from the local price store
+            return self.price_store.get_close_panel(symbols, limit=100)
+        except Exception as e:
+            print(f"Error fetching historical data for {symbols}: {e}")
+            return pd.DataFrame()
 
     def _calculate_portfolio_volatility(self, returns, weights):
         if returns.empty or not weights:
@@ -0,0 +1,46 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no gunicorn workers to coordinate
+    fcntl = None
+
+
+class SchedulerLock:
+    """Electing the one process per host that runs the scheduled jobs.
+
+    Every gunicorn worker builds the app, but only the first to take an
+    exclusive lock on the lock file starts the scheduler; the lock is held
+    until that process exits, when the worker replacing it takes over. The
+    other workers skip scheduling, so each job runs once per host rather
+    than once per worker.
+    """
+
+    def __init__(self):
+        self._file = None
+
+    def acquire(self, path):
+        """Taking the lock without waiting. Returns True if this process holds it."""
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            return True
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+scheduler_lock = SchedulerLock()
@@ -0,0 +1,206 @@
+import bisect
+import csv
+import io
+import os
+import re
+import threading
+
+from app.services.http_client import http_client
+from config import Config
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Ranking tiers, best first
+EXACT, SYMBOL_PREFIX, NAME_PREFIX, FUZZY = range(4)
+
+
+def _tokens(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a, b):
+    """Checking for at most one substitution, insertion, deletion or adjacent transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diffs) == 1 or (len(diffs) == 2 and diffs[1] == diffs[0] + 1 and
+                                   a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class SymbolIndex:
+    """In-memory search over the listed symbols and company names in a local LISTING_STATUS file.
+
+    Lookups never call Alpha Vantage. Results are ranked exact symbol, symbol
+    prefix, company-name word prefix, then one-typo matches. The file is
+    refreshed by a scheduled job; every worker reloads it when it changes.
+    """
+
+    FUZZY_MIN_LENGTH = 3  # Shorter terms are one typo away from too many others
+    SCAN_LIMIT = 200  # Prefix candidates considered per lookup
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.configure(path)
+
+    def configure(self, path):
+        with self._lock:
+            self.path = path
+            self._loaded_mtime = None
+            self._build([])
+
+    def search(self, query, limit=10):
+        """Getting up to limit ranked matches as dicts with symbol, name, exchange and asset_type."""
+        self._reload_if_changed()
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        # Taking one consistent snapshot; a reload swaps these attributes together
+        entries, symbols, words, deletes, term_entries = self._snapshot
+
+        ranks = {}
+
+        def add(idx, rank):
+            if idx not in ranks or rank < ranks[idx]:
+                ranks[idx] = rank
+
+        # Symbol prefix (covers the exact symbol)
+        compact = query.replace(' ', '')
+        for symbol, idx in self._prefix_range(symbols, compact):
+            add(idx, (EXACT if symbol == compact else SYMBOL_PREFIX, len(symbol)))
+
+        # Company name: every query word must start one of the name's words
+        query_words = _tokens(query)
+        if query_words:
+            for word, idx in self._prefix_range(words, query_words[-1]):
+                name_words = entries[idx][4]
+                if all(any(w.startswith(q) for w in name_words) for q in query_words[:-1]):
+                    add(idx, (NAME_PREFIX, len(entries[idx][1])))
+
+        # One typo in the symbol or in any query word
+        if len(ranks) < limit:
+            for term in {compact, *query_words}:
+                if len(term) < self.FUZZY_MIN_LENGTH:
+                    continue
+                # Terms one character longer, one shorter, or with one character changed
+                candidates = set(deletes.get(term, ()))
+                for variant in _deletes(term):
+                    if variant in term_entries:
+                        candidates.add(variant)
+                    candidates.update(deletes.get(variant, ()))
+                for candidate in candidates:
+                    if _within_one_edit(term, candidate):
+                        for idx in term_entries.get(candidate, ()):
+                            add(idx, (FUZZY, len(entries[idx][0])))
+
+        best = sorted(ranks, key=lambda idx: (ranks[idx], entries[idx][0]))[:limit]
+        return [{'symbol': entries[idx][0], 'name': entries[idx][1], 'exchange': entries[idx][2],
+                 'asset_type': entries[idx][3]} for idx in best]
+
+    def get(self, symbol):
+        """Getting the listing for an exact symbol, or None."""
+        matches = self.search(symbol, limit=1)
+        return matches[0] if matches and matches[0]['symbol'] == symbol.strip().upper() else None
+
+    def is_loaded(self):
+        self._reload_if_changed()
+        return bool(self._snapshot[0])
+
+    def refresh(self, api_key=None):
+        """Downloading the active listings from LISTING_STATUS and swapping the file in. Returns the row count."""
+        response = http_client.get(Config.ALPHA_VANTAGE_BASE_URL, params={
+            'function': 'LISTING_STATUS',
+            'apikey': api_key or Config.ALPHA_VANTAGE_API_KEY
+        })
+        rows = self._parse(response.text)
+        if not rows:
+            raise ValueError(f"LISTING_STATUS returned no listings: {response.text[:200]}")
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        os.replace(tmp_path, self.path)
+
+        self._reload_if_changed()
+        return len(rows)
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+
+        with self._lock:
+            if mtime == self._loaded_mtime:
+                return
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._build(self._parse(f.read()))
+                self._loaded_mtime = mtime
+            except (OSError, csv.Error) as e:
+                print(f"Error loading symbol listing {self.path}: {e}")
+
+    @staticmethod
+    def _parse(text):
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or 'symbol' not in reader.fieldnames:
+            return []
+        return [row for row in reader if row.get('symbol') and row.get('status', 'Active') == 'Active']
+
+    def _build(self, rows):
+        entries = []
+        symbols = []
+        words = []
+        term_entries = {}
+
+        for idx, row in enumerate(rows):
+            symbol = row['symbol'].strip().upper()
+            name = (row.get('name') or '').strip()
+            name_words = _tokens(name)
+            entries.append((symbol, name, row.get('exchange', ''), row.get('assetType', ''), name_words))
+
+            symbols.append((symbol.lower(), idx))
+            words.extend((word, idx) for word in set(name_words))
+            for term in {symbol.lower(), *name_words}:
+                if len(term) >= self.FUZZY_MIN_LENGTH:
+                    term_entries.setdefault(term, []).append(idx)
+
+        # Symmetric-delete index: each term's one-character deletions point back to it
+        deletes = {}
+        for term in term_entries:
+            for variant in _deletes(term):
+                deletes.setdefault(variant, set()).add(term)
+
+        symbols.sort()
+        words.sort()
+        self._snapshot = (entries, symbols, words, deletes, term_entries)
+
+    def _prefix_range(self, pairs, prefix):
+        start = bisect.bisect_left(pairs, (prefix,))
+        end = bisect.bisect_left(pairs, (prefix + '\uffff',), start, min(len(pairs), start + self.SCAN_LIMIT))
+        return pairs[start:end]
+
+
+# Shared by every request in the process
+symbol_index = SymbolIndex(Config.SYMBOL_LISTING_PATH)
+
+
+def init_app(app):
+    """Pointing the shared index at the app's listing file."""
+    symbol_index.configure(app.config.get('SYMBOL_LISTING_PATH', Config.SYMBOL_LISTING_PATH))
@@ -64,4 +64,35 @@ function updateElementContent(id, content) {
     if (element) {
         element.innerHTML = content;
     }
-}
\ No newline at end of file
+}
+// Live quote helper: calls onQuotes({SYMBOL: {current_price, daily_change, ...}}) whenever quotes change.
+// The browser reconnects on its own when the server closes the stream. If the server refuses the stream
+// (503 when its streams are full) the browser gives up, so quotes are polled from /market/quotes instead.
+const QUOTE_POLL_INTERVAL = 15000;
+
+function subscribeQuotes(symbols, onQuotes) {
+    if (!window.EventSource || !symbols || symbols.length === 0) return null;
+
+    const query = encodeURIComponent(symbols.join(','));
+    const source = new EventSource(`/market/stream?symbols=${query}`);
+    source.addEventListener('quotes', event => onQuotes(JSON.parse(event.data)));
+    source.addEventListener('error', () => {
+        if (source.readyState !== EventSource.CLOSED || source.pollTimer) return;
+        source.pollTimer = setInterval(async () => {
+            try {
+                const response = await fetch(`/market/quotes?symbols=${query}`);
+                if (response.ok) onQuotes(await response.json());
+            } catch (error) {
+                console.error('Error polling quotes:', error);
+            }
+        }, QUOTE_POLL_INTERVAL);
+    });
+    return source;
+}
+
+// Stopping a subscription from subscribeQuotes, whether it is streaming or polling
+function unsubscribeQuotes(source) {
+    if (!source) return;
+    source.close();
+    clearInterval(source.pollTimer);
+}
@@ -327,8 +327,8 @@ async function updatePerformance() {
                 <td>${holding.symbol}</td>
                 <td>${holding.quantity}</td>
                 <td>$${holding.purchase_price.toFixed(2)}</td>
-                <td>$${holding.current_price.toFixed(2)}</td>
-                <td>$${holding.current_value.toFixed(2)}</td>
+                <td data-quote-price="${holding.symbol}">$${holding.current_price.toFixed(2)}</td>
+                <td data-quote-value="${holding.symbol}" data-quantity="${holding.quantity}">$${holding.current_value.toFixed(2)}</td>
                 <td class="${returnClass}">$${holding.gain_loss.toFixed(2)}</td>
                 <td class="${returnClass}">${holding.gain_loss_percentage.toFixed(2)}%</td>
                 <td>
@@ -352,12 +352,36 @@ async function updatePerformance() {
         });
 
         updateCharts(data);
+        streamHoldingQuotes(data.holdings.map(holding => holding.symbol));
 
     } catch (error) {
         console.error('Error updating performance:', error);
     }
 }
 
+// Live prices for the holdings table; resubscribing only when the set of symbols changes
+let holdingQuoteStream = null;
+let holdingQuoteSymbols = '';
+
+function streamHoldingQuotes(symbols) {
+    const key = [...new Set(symbols)].sort().join(',');
+    if (key === holdingQuoteSymbols) return;
+
+    unsubscribeQuotes(holdingQuoteStream);
+    holdingQuoteSymbols = key;
+    holdingQuoteStream = subscribeQuotes(key ? key.split(',') : [], quotes => {
+        Object.entries(quotes).forEach(([symbol, quote]) => {
+            if (quote.current_price == null) return;
+            document.querySelectorAll(`[data-quote-price="${symbol}"]`).forEach(cell => {
+                cell.textContent = `$${quote.current_price.toFixed(2)}`;
+            });
+            document.querySelectorAll(`[data-quote-value="${symbol}"]`).forEach(cell => {
+                cell.textContent = `$${(quote.current_price * parseFloat(cell.dataset.quantity)).toFixed(2)}`;
+            });
+        });
+    });
+}
+
 //Update Charts Function
 function updateCharts(data) {
     // Update line charts (portfolioValueChart and returnsChart)
@@ -8,8 +8,9 @@ document.addEventListener('DOMContentLoaded', function() {
     if (marketOverview && marketOverview.textContent.includes('Market Overview')) {
         console.log('Market Overview page detected, initializing...');
 
-        // Load all market data
+        // Load all market data, then keep the index tiles live
         loadMarketIndices();
+        subscribeQuotes(Object.keys(INDEX_TILES), updateIndexTiles);
         loadMarketMovers();
         loadMarketNews();
 
@@ -23,10 +24,32 @@ document.addEventListener('DOMContentLoaded', function() {
                     searchStock(symbol);
                 }
             });
+
+            // Suggesting symbols while typing; these come from the server's local listing
+            let suggestTimer = null;
+            document.getElementById('stock-symbol').addEventListener('input', function(e) {
+                clearTimeout(suggestTimer);
+                suggestTimer = setTimeout(() => loadSymbolSuggestions(e.target.value.trim()), 150);
+            });
         }
     }
 });
 
+// Index ETF -> id prefix of its tile
+const INDEX_TILES = {SPY: 'sp500', QQQ: 'nasdaq', DIA: 'dow'};
+
+function updateIndexTiles(quotes) {
+    Object.entries(quotes).forEach(([symbol, quote]) => {
+        const price = document.getElementById(`${INDEX_TILES[symbol]}-price`);
+        const change = document.getElementById(`${INDEX_TILES[symbol]}-change`);
+        if (!price || !change || quote.current_price == null) return;
+
+        price.textContent = quote.current_price.toFixed(2);
+        change.textContent = `${quote.daily_change.toFixed(2)} (${quote.daily_change_percent.toFixed(2)}%)`;
+        change.className = quote.daily_change >= 0 ? 'text-success card-text' : 'text-danger card-text';
+    });
+}
+
 async function loadMarketIndices() {
     try {
         console.log('Loading market indices...');
@@ -215,6 +238,31 @@ async function loadMarketNews() {
     }
 }
 
+async function loadSymbolSuggestions(query) {
+    const datalist = document.getElementById('symbol-suggestions');
+    if (!datalist) return;
+
+    if (!query) {
+        datalist.innerHTML = '';
+        return;
+    }
+
+    try {
+        const response = await fetch(`/market/search/suggest?q=${encodeURIComponent(query)}`);
+        const data = await response.json();
+
+        datalist.innerHTML = '';
+        (data.matches || []).forEach(match => {
+            const option = document.createElement('option');
+            option.value = match.symbol;
+            option.label = `${match.name} (${match.exchange})`;
+            datalist.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Error loading symbol suggestions:', error);
+    }
+}
+
 async function searchStock(symbol) {
     try {
         console.log(`Searching for stock: ${symbol}`);
@@ -18,6 +18,17 @@ document.addEventListener('DOMContentLoaded', function () {
     //Setting up Price Chart
     setupPriceChart(symbol);
 
+    //Keeping the headline price live
+    subscribeQuotes([symbol], quotes => {
+        const quote = quotes[symbol.toUpperCase()];
+        if (!quote || quote.current_price == null) return;
+
+        document.getElementById('current-price').textContent = quote.current_price;
+        const change = document.getElementById('price-change');
+        change.textContent = `${quote.daily_change} (${quote.daily_change_percent}%)`;
+        change.className = quote.daily_change > 0 ? 'text-success' : 'text-danger';
+    });
+
 
     //Setting up tab change listeners
     document.querySelectorAll('.nav-link').forEach(tab => {
@@ -124,7 +135,7 @@ async function setupPriceChart(symbol) {
         const period = activePeriodBtn ? activePeriodBtn.getAttribute('data-period') : '1m';
 
         // Fetch historical data
-        const response = await fetch(`/market/stock_history/${symbol}?period=${period}`);
+        const response = await fetch(`/market/stock_history/${symbol}?period=${period}&points=${chartPoints()}`);
         const data = await response.json();
 
         if (data.error) {
@@ -193,6 +204,12 @@ async function periodButtonHandler() {
     await updateChartPeriod(symbol, newPeriod);
 }
 
+// Helper function to size history requests to the chart: about one point per pixel
+function chartPoints() {
+    const canvas = document.getElementById('stock-chart');
+    return canvas ? Math.max(100, Math.round(canvas.clientWidth)) : 400;
+}
+
 // Helper function to get symbol from URL
 function getSymbolFromURL() {
     const pathParts = window.location.pathname.split('/');
@@ -201,7 +218,7 @@ function getSymbolFromURL() {
 
 async function updateChartPeriod(symbol, period) {
     try {
-        const response = await fetch(`/market/stock_history/${symbol}?period=${period}`);
+        const response = await fetch(`/market/stock_history/${symbol}?period=${period}&points=${chartPoints()}`);
         const data = await response.json();
 
         if (data.error) {
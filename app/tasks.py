@@ -1,8 +1,17 @@
+import time
 from datetime import datetime
 
-from app import db
-from app.models.portfolio import Portfolio, PortfolioHistory
+from flask import current_app
+from sqlalchemy import func
+
+from app import db, scheduler
+from app.models.portfolio import Portfolio, PortfolioHistory, Holding
+from app.monitoring.metrics import track_job_run
+from app.monitoring.rollup import rollup_events, compact_rollups, prune_metrics
+from app.services.market_calendar import MARKET_TZ, next_open
 from app.services.market_service import MarketService
+from app.services.response_cache import response_cache
+from app.services.symbol_index import symbol_index
 
 
 
@@ -15,12 +24,16 @@ def record_portfolio_values():
     #Getting all Portfolios
     portfolios = Portfolio.query.all()
 
+    #Fetching every held symbol once, across all portfolios
+    symbols = [holding.symbol for portfolio in portfolios for holding in portfolio.holdings]
+    quotes = market_service.get_stock_data_bulk(symbols)
+
     for portfolio in portfolios:
         total_value = 0
 
         #Calculating Portfolio Value
         for holding in portfolio.holdings:
-            stock_data = market_service.get_stock_data(holding.symbol)
+            stock_data = quotes.get(holding.symbol)
             if stock_data:
                 total_value += stock_data['current_price'] * holding.quantity
 
@@ -34,3 +47,106 @@ def record_portfolio_values():
         db.session.add(history_entry)
 
     db.session.commit()
+
+
+#Refreshing the most held and most viewed quotes before they expire
+def refresh_hot_quotes():
+    with scheduler.app.app_context():
+        market_service = MarketService()
+        limit = current_app.config['HOT_SYMBOLS_LIMIT']
+
+        held = db.session.query(Holding.symbol).group_by(Holding.symbol).order_by(
+            func.count(Holding.id).desc()).limit(limit).all()
+        symbols = list(dict.fromkeys([row.symbol for row in held] + market_service.refresher.most_viewed(limit)))
+
+        refresh_before = time.time() + current_app.config['HOT_SYMBOLS_REFRESH_AHEAD']
+        due = []
+        for symbol in symbols:
+            expires_at = market_service.cache.peek_expiry(f"stock_data_{symbol}")
+            if expires_at is None or expires_at <= refresh_before:
+                due.append(symbol)
+
+        market_service.refresh_stock_data_bulk(due)
+
+
+#Halving every symbol's view count, so the most viewed follow recent interest
+def decay_symbol_views():
+    with scheduler.app.app_context():
+        try:
+            kept = MarketService().refresher.decay_views()
+            print(f"Decayed symbol views, {kept} symbols still tracked")
+        except Exception as e:
+            print(f"Error decaying symbol views: {e}")
+            db.session.rollback()
+
+
+#Warming quote and company caches before the market opens
+def warm_market_caches():
+    with scheduler.app.app_context():
+        market_service = MarketService()
+        start_time = time.time()
+
+        held = [row.symbol for row in db.session.query(Holding.symbol).distinct()]
+        symbols = list(dict.fromkeys(
+            held + [s.strip().upper() for s in current_app.config['WARMUP_SYMBOLS'] if s.strip()] +
+            market_service.refresher.most_viewed(current_app.config['HOT_SYMBOLS_LIMIT'])
+        ))
+
+        # Counting what actually has to come from Alpha Vantage: every quote, and the uncached overviews
+        fetched = len(symbols)
+        fetched += sum(1 for symbol in symbols if not market_service.cache.contains(f"company_overview_{symbol}"))
+
+        # Quotes cached now would otherwise all expire at the open, just as users arrive; these last
+        # a normal quote TTL into the session, by which time the hot refresher has taken them over
+        quote_ttl = int((next_open() - datetime.now(MARKET_TZ)).total_seconds()) + current_app.config['QUOTE_CACHE_TTL']
+
+        success = True
+        try:
+            # Bulk calls go through the shared rate limiter, so this spreads over the plan's quota.
+            # Quotes are refetched even when cached, since last night's entries expire at the open.
+            market_service.refresh_stock_data_bulk(symbols, ttl=quote_ttl)
+            market_service.get_company_overview_bulk(symbols)
+            # The index tiles were rendered from last night's quotes
+            response_cache.invalidate('market.get_indices')
+        except Exception as e:
+            print(f"Error warming market caches: {e}")
+            success = False
+
+        duration = time.time() - start_time
+        track_job_run('warm_market_caches', len(symbols), fetched, duration, success)
+        print(f"Warmed {len(symbols)} symbols ({fetched} upstream fetches) in {duration:.1f}s")
+
+
+#Downloading the listed symbols behind the local search index
+def refresh_symbol_listing():
+    with scheduler.app.app_context():
+        start_time = time.time()
+        count = 0
+        try:
+            count = symbol_index.refresh()
+        except Exception as e:
+            print(f"Error refreshing symbol listing: {e}")
+
+        duration = time.time() - start_time
+        track_job_run('refresh_symbol_listing', count, 1, duration, count > 0)
+        print(f"Indexed {count} listed symbols in {duration:.1f}s")
+
+
+#Rolling raw metric rows up into minute and hour summaries and pruning old rows
+def rollup_metrics():
+    with scheduler.app.app_context():
+        start_time = time.time()
+        rolled = pruned = 0
+        success = True
+        try:
+            rolled = rollup_events()
+            compact_rollups()
+            pruned = prune_metrics()
+        except Exception as e:
+            print(f"Error rolling up metrics: {e}")
+            db.session.rollback()
+            success = False
+
+        duration = time.time() - start_time
+        track_job_run('rollup_metrics', rolled, pruned, duration, success)
+        print(f"Rolled up {rolled} metric events and pruned {pruned} rows in {duration:.1f}s")
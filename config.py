@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,6 +16,111 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     ALPHA_VANTAGE_API_KEY =os.getenv("ALPHA_VANTAGE_API_KEY")
+    # Point at app/monitoring/alpha_vantage_stub.py to benchmark without the live API
+    ALPHA_VANTAGE_BASE_URL = os.getenv("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+    MARKET_DATA_MAX_WORKERS = int(os.getenv("MARKET_DATA_MAX_WORKERS", 8))  # Concurrent upstream fetches per bulk call
+    ASYNC_MARKET_CONCURRENCY = int(os.getenv("ASYNC_MARKET_CONCURRENCY", 8))  # Concurrent calls per fan-out batch
+
+    # Shared HTTP client for upstream APIs
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+    HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))  # seconds, doubled on each retry
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
+    # Alpha Vantage plan quota (0 disables limiting); the free plan allows 5 calls per minute
+    ALPHA_VANTAGE_CALLS_PER_MINUTE = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", 75))
+    ALPHA_VANTAGE_BURST = int(os.getenv("ALPHA_VANTAGE_BURST", 5))  # Calls allowed back to back
+    ALPHA_VANTAGE_MAX_WAIT = float(os.getenv("ALPHA_VANTAGE_MAX_WAIT", 30))  # Seconds a caller may wait for quota
+    # 'host' shares one budget between all gunicorn workers, 'process' gives each worker its own
+    ALPHA_VANTAGE_RATE_LIMIT_SCOPE = os.getenv("ALPHA_VANTAGE_RATE_LIMIT_SCOPE", "host")
+    RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", os.path.join(basedir, 'instance', 'cache', 'rate_limit.sqlite3'))
+
+    # Shared in-process quote cache
+    QUOTE_CACHE_TTL = int(os.getenv("QUOTE_CACHE_TTL", 300))  # 5 minutes
+    QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", 2000))
+    QUOTE_CACHE_MAX_BYTES = int(os.getenv("QUOTE_CACHE_MAX_BYTES", 8 * 1024 * 1024))  # 8 MB
+    COMPANY_OVERVIEW_TTL = int(os.getenv("COMPANY_OVERVIEW_TTL", 24 * 3600))  # Company fundamentals change daily at most
+    COMPANY_INDEX_TTL = int(os.getenv("COMPANY_INDEX_TTL", 30 * 24 * 3600))  # Sector/industry rarely change; refresh monthly
+    MARKET_MOVERS_TTL = int(os.getenv("MARKET_MOVERS_TTL", 900))  # 15 minutes
+    NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", 900))  # Per-symbol news feeds, 15 minutes
+    # Stock history charts are downsampled (LTTB) to about this many points
+    HISTORY_CHART_POINTS = int(os.getenv("HISTORY_CHART_POINTS", 400))
+    HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", 2000))
+    # Rendered responses of market-wide endpoints (the same for every user)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 4 * 1024 * 1024))  # 4 MB
+    INDICES_RESPONSE_TTL = int(os.getenv("INDICES_RESPONSE_TTL", 60))  # 1 minute
+    MARKET_NEWS_RESPONSE_TTL = int(os.getenv("MARKET_NEWS_RESPONSE_TTL", 600))  # 10 minutes
+    # Lookups that found nothing are remembered so bad symbols cost one upstream call per window
+    NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 3600))  # Unknown or delisted symbols
+    NEGATIVE_CACHE_FAILURE_TTL = int(os.getenv("NEGATIVE_CACHE_FAILURE_TTL", 60))  # Errors and rate-limit notices
+    QUOTE_STALE_TTL = int(os.getenv("QUOTE_STALE_TTL", 3600))  # How long past expiry a quote may be served while refreshing
+    QUOTE_REFRESH_WORKERS = int(os.getenv("QUOTE_REFRESH_WORKERS", 4))  # Background refresh threads per worker
+    # Hot symbols (most held and most viewed) are refreshed before they expire
+    HOT_SYMBOLS_LIMIT = int(os.getenv("HOT_SYMBOLS_LIMIT", 25))
+    HOT_SYMBOLS_REFRESH_INTERVAL = int(os.getenv("HOT_SYMBOLS_REFRESH_INTERVAL", 60))  # seconds
+    HOT_SYMBOLS_REFRESH_AHEAD = int(os.getenv("HOT_SYMBOLS_REFRESH_AHEAD", 90))  # Refresh when expiring within this many seconds
+    HOT_SYMBOLS_DECAY_INTERVAL = int(os.getenv("HOT_SYMBOLS_DECAY_INTERVAL", 600))  # seconds between halvings of view counts
+
+    # Live quote stream (/market/stream): one poller per worker for every subscribed symbol
+    QUOTE_STREAM_INTERVAL = int(os.getenv("QUOTE_STREAM_INTERVAL", 15))  # seconds between polls
+    QUOTE_STREAM_HEARTBEAT = int(os.getenv("QUOTE_STREAM_HEARTBEAT", 15))  # keep-alive comment when nothing changed
+    QUOTE_STREAM_MAX_SECONDS = int(os.getenv("QUOTE_STREAM_MAX_SECONDS", 300))  # clients reconnect after this, freeing the thread
+    QUOTE_STREAM_MAX_SYMBOLS = int(os.getenv("QUOTE_STREAM_MAX_SYMBOLS", 50))
+    # Each open stream holds one gthread worker thread for up to QUOTE_STREAM_MAX_SECONDS. Keep this
+    # below the Procfile's --threads (16) so ordinary requests always have threads left; clients past
+    # the cap get a 503 and poll /market/quotes every QUOTE_STREAM_INTERVAL seconds instead.
+    QUOTE_STREAM_MAX_CLIENTS = int(os.getenv("QUOTE_STREAM_MAX_CLIENTS", 8))  # per worker process
+
+    # Pre-market warmup of quotes and company data (US/Eastern, weekdays)
+    WARMUP_HOUR = int(os.getenv("WARMUP_HOUR", 8))
+    WARMUP_MINUTE = int(os.getenv("WARMUP_MINUTE", 45))
+    # Always warmed alongside held symbols: the index ETFs and the dashboard's default tickers
+    WARMUP_SYMBOLS = os.getenv("WARMUP_SYMBOLS", "SPY,QQQ,DIA,AAPL,MSFT,GOOGL,AMZN,NVDA").split(',')
+    # TTLs above apply while the market is open; closed-market entries stay valid until the next open.
+    # The settle window keeps short TTLs just after the close so closing prices are picked up.
+    MARKET_CLOSE_SETTLE = int(os.getenv("MARKET_CLOSE_SETTLE", 900))
+
+    # 'sqlite' shares entries between gunicorn workers and survives restarts, 'memory' is per process
+    MARKET_CACHE_BACKEND = os.getenv("MARKET_CACHE_BACKEND", "sqlite")
+    MARKET_CACHE_PATH = os.getenv("MARKET_CACHE_PATH", os.path.join(basedir, 'instance', 'cache', 'market_data.sqlite3'))
+
+    # Metric rows are buffered and bulk-inserted by a background thread
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 2.0))  # seconds; 0 writes every row immediately
+    METRICS_FLUSH_BATCH = int(os.getenv("METRICS_FLUSH_BATCH", 500))  # flush early once this many rows are queued
+    METRICS_MAX_BUFFER = int(os.getenv("METRICS_MAX_BUFFER", 10000))  # rows beyond this are dropped and counted
+    LATENCY_SKETCH_SECONDS = int(os.getenv("LATENCY_SKETCH_SECONDS", 60))  # time bucket of each persisted latency histogram
+
+    # Raw metric rows are rolled up into per-minute, then per-hour summaries and pruned
+    METRICS_ROLLUP_INTERVAL = int(os.getenv("METRICS_ROLLUP_INTERVAL", 300))  # seconds between rollup runs
+    METRICS_ROLLUP_LAG = int(os.getenv("METRICS_ROLLUP_LAG", 120))  # seconds left for buffered rows to land first
+    METRICS_RAW_RETENTION_DAYS = int(os.getenv("METRICS_RAW_RETENTION_DAYS", 3))
+    METRICS_MINUTE_RETENTION_HOURS = int(os.getenv("METRICS_MINUTE_RETENTION_HOURS", 48))  # then merged into hours
+    METRICS_ROLLUP_RETENTION_DAYS = int(os.getenv("METRICS_ROLLUP_RETENTION_DAYS", 400))
+
+    # Prometheus /metrics: each worker snapshots its counters here so any worker can answer a scrape.
+    # Counters of exited workers are kept, so clear the directory when deploying.
+    METRICS_EXPORT_DIR = os.getenv("METRICS_EXPORT_DIR", os.path.join(basedir, 'instance', 'metrics'))
+    METRICS_EXPORT_INTERVAL = int(os.getenv("METRICS_EXPORT_INTERVAL", 5))  # seconds
+    # /metrics exposes route names, error rates and upstream usage. With a token set, scrapes must send it
+    # as a bearer token. Without one the endpoint is open, which is only allowed in development: production
+    # (MYSQLHOST set) requires the token by default and refuses every scrape until METRICS_SCRAPE_TOKEN is set.
+    METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN")
+    METRICS_REQUIRE_TOKEN = os.getenv("METRICS_REQUIRE_TOKEN", "true" if os.getenv("MYSQLHOST") else "false").lower() == "true"
+    # Requests at least this slow are stored with their upstream/db/compute breakdown
+    TRACE_SLOW_REQUEST_SECONDS = float(os.getenv("TRACE_SLOW_REQUEST_SECONDS", 1.0))
+
+    # Scheduled jobs run only in the worker holding this lock (one per host)
+    SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", os.path.join(basedir, 'instance', 'scheduler.lock'))
+
+    # Memory-mapped daily price archive built from the daily_price table
+    PRICE_ARCHIVE_DIR = os.getenv("PRICE_ARCHIVE_DIR", os.path.join(basedir, 'instance', 'price_archive'))
+
+    # LISTING_STATUS download behind the local symbol search, refreshed before each trading day
+    SYMBOL_LISTING_PATH = os.getenv("SYMBOL_LISTING_PATH", os.path.join(basedir, 'instance', 'listing_status.csv'))
+    SYMBOL_LISTING_REFRESH_HOUR = int(os.getenv("SYMBOL_LISTING_REFRESH_HOUR", 7))  # US/Eastern
+
     MAIL_SERVER = 'smtp.gmail.com'
     MAIL_PORT = 587
     MAIL_USE_TLS = True
@@ -31,3 +137,12 @@ class TestConfig(Config):
     ALPHA_VANTAGE_API_KEY = 'test_key'  # Mock API key for testing
     SCHEDULER_API_ENABLED = False
     SCHEDULER_ENABLED = False
+    MARKET_CACHE_BACKEND = 'memory'
+    HTTP_MAX_RETRIES = 0
+    ALPHA_VANTAGE_CALLS_PER_MINUTE = 0
+    ASYNC_MARKET_CONCURRENCY = 1  # The in-memory database shares one connection between threads
+    PRICE_ARCHIVE_DIR = os.path.join(tempfile.gettempdir(), 'financial_assistant_test_archive')
+    SYMBOL_LISTING_PATH = os.path.join(tempfile.gettempdir(), 'financial_assistant_test_listing.csv')
+    METRICS_FLUSH_INTERVAL = 0  # Tests read metrics straight after recording them
+    METRICS_EXPORT_DIR = None  # One process, nothing to aggregate
+    METRICS_REQUIRE_TOKEN = False
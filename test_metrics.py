@@ -1,17 +1,21 @@
+import os
 import requests
 import time
 from random import choice
 
-BASE_URL = "http://localhost:5000"
+# For repeatable runs, start the app against the local Alpha Vantage stand-in:
+#   python -m app.monitoring.alpha_vantage_stub --port 5055 --latency-ms 150
+#   ALPHA_VANTAGE_BASE_URL=http://127.0.0.1:5055/query flask run
+BASE_URL = os.getenv("LOAD_TEST_BASE_URL", "http://localhost:5000")
 symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
-portfolio_ids = [1, 2, 3]  # Replace with actual IDs
-user_id = 1  # Replace with actual user ID
+portfolio_ids = [int(i) for i in os.getenv("LOAD_TEST_PORTFOLIO_IDS", "1,2,3").split(',')]
+user_id = int(os.getenv("LOAD_TEST_USER_ID", 1))
 
 # Login first to get a session
 session = requests.Session()
-session.post(f"{BASE_URL}/login", data={
-    "email": "your_test_user@example.com",
-    "password": "your_password"
+session.post(f"{BASE_URL}/auth/login", data={
+    "email": os.getenv("LOAD_TEST_EMAIL", "your_test_user@example.com"),
+    "password": os.getenv("LOAD_TEST_PASSWORD", "your_password")
 })
 
 # Generate stock data requests (some will hit cache, some won't)
@@ -177,4 +177,16 @@ class AdminTestCase(unittest.TestCase):
         response = self.client.get('/admin/admin-status')
         self.assertEqual(response.status_code, 200)
         self.assertTrue(b'Admin Status Check' in response.data)
-        self.assertTrue(b'Is Admin: True' in response.data)
\ No newline at end of file
+        self.assertTrue(b'Is Admin: True' in response.data)
+
+    def test_request_timings(self):
+        """Test the slow request breakdown page aggregates stored breakdowns per route"""
+        from app.monitoring.metrics import RequestTiming
+        db.session.add(RequestTiming(route='portfolio.get_enhanced_recommendations', duration=40.0,
+                                     spans=json.dumps({'upstream': 30.0, 'ml_fit': 6.0, 'db': 3.0, 'other': 1.0})))
+        db.session.commit()
+
+        response = self.client.get('/admin/request-timings')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b'portfolio.get_enhanced_recommendations' in response.data)
+        self.assertTrue(b'upstream 30.0 (75%)' in response.data)
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.monitoring.alpha_vantage_stub import StubServer, StubSettings, create_stub_app
+from app.services.http_client import HTTPClient, http_client
+from app.services.symbol_index import SymbolIndex
+from config import Config
+
+
+class AlphaVantageStubTestCase(unittest.TestCase):
+    def test_synthetic_responses_are_deterministic(self):
+        """Test the stand-in serves the same synthetic data for the same query"""
+        client = create_stub_app(StubSettings(seed=7)).test_client()
+
+        quote = client.get('/query?function=GLOBAL_QUOTE&symbol=AAPL').get_json()
+        self.assertEqual(quote, client.get('/query?function=GLOBAL_QUOTE&symbol=AAPL').get_json())
+
+        daily = client.get('/query?function=TIME_SERIES_DAILY&symbol=AAPL').get_json()['Time Series (Daily)']
+        latest = max(daily)
+        self.assertEqual(len(daily), 100)
+        self.assertEqual(daily[latest]['4. close'], quote['Global Quote']['05. price'])
+
+        for function in ('OVERVIEW', 'INCOME_STATEMENT', 'NEWS_SENTIMENT', 'TOP_GAINERS_LOSERS'):
+            data = client.get(f'/query?function={function}&symbol=AAPL&tickers=AAPL').get_json()
+            self.assertNotIn('Error Message', data)
+
+    def test_listing_search_and_intraday(self):
+        """Test the stand-in serves the listing, symbol search and newest-first intraday bars"""
+        client = create_stub_app(StubSettings(seed=7)).test_client()
+
+        listing = client.get('/query?function=LISTING_STATUS')
+        self.assertEqual(listing.mimetype, 'text/csv')
+        self.assertIn('SPY', [row['symbol'] for row in SymbolIndex._parse(listing.get_data(as_text=True))])
+
+        matches = client.get('/query?function=SYMBOL_SEARCH&keywords=spdr').get_json()['bestMatches']
+        self.assertEqual([match['1. symbol'] for match in matches], ['SPY', 'DIA'])
+
+        quote = client.get('/query?function=GLOBAL_QUOTE&symbol=AAPL').get_json()['Global Quote']
+        bars = client.get('/query?function=TIME_SERIES_INTRADAY&symbol=AAPL&interval=60min').get_json()
+        bars = list(bars['Time Series (60min)'].items())
+        self.assertEqual(len(bars), 100)
+        self.assertGreater(bars[0][0], bars[1][0])
+        self.assertEqual(bars[0][1]['4. close'], quote['05. price'])
+
+    def test_rate_limit_and_errors(self):
+        """Test the stand-in answers with rate-limit notes and injected errors"""
+        client = create_stub_app(StubSettings(calls_per_minute=2)).test_client()
+        responses = [client.get('/query?function=GLOBAL_QUOTE&symbol=AAPL') for _ in range(3)]
+        self.assertIn('Global Quote', responses[1].get_json())
+        self.assertIn('Information', responses[2].get_json())
+
+        client = create_stub_app(StubSettings(error_rate=1.0)).test_client()
+        self.assertEqual(client.get('/query?function=OVERVIEW&symbol=AAPL').status_code, 503)
+        self.assertEqual(json.loads(client.get('/stats').data)['errors'], 1)
+
+    def test_served_over_http(self):
+        """Test the stand-in serves quotes over real HTTP through the shared client"""
+        with StubServer(StubSettings(latency_ms=5)) as stub:
+            client = HTTPClient(max_retries=0)
+            response = client.get(stub.url, params={'function': 'GLOBAL_QUOTE', 'symbol': 'MSFT'})
+            quote = response.json()['Global Quote']
+            self.assertGreater(float(quote['05. price']), 0)
+            self.assertEqual(stub.get_stats()['GLOBAL_QUOTE'], 1)
+
+    def test_redirected_through_shared_client(self):
+        """Test calls to the Alpha Vantage URL reach the stand-in while redirected"""
+        with tempfile.TemporaryDirectory() as tmp, StubServer() as stub:
+            index = SymbolIndex(os.path.join(tmp, 'listing_status.csv'))
+            with http_client.redirect(Config.ALPHA_VANTAGE_BASE_URL, stub.url):
+                self.assertGreater(index.refresh(api_key='test_key'), 20)
+            self.assertEqual(index.get('MSFT')['name'], 'MSFT Holdings Inc')
+            self.assertEqual(stub.get_stats()['LISTING_STATUS'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
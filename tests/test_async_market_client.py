@@ -0,0 +1,47 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from app import create_app
+from app.services.async_market_client import AsyncMarketClient
+
+
+class AsyncMarketClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.market_service = MagicMock()
+        self.client = AsyncMarketClient(self.market_service, concurrency=4)
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_fan_out_runs_concurrently(self):
+        """Test a batch of calls takes about as long as the slowest one"""
+        def get_stock_data(symbol):
+            time.sleep(0.2)
+            return {'current_price': len(symbol)}
+
+        self.market_service.get_stock_data.side_effect = get_stock_data
+
+        start_time = time.time()
+        quotes = self.client.map(self.client.quote, ['AAPL', 'MSFT', 'GE', 'AAPL'])
+
+        self.assertLess(time.time() - start_time, 0.5)
+        self.assertEqual(quotes, {'AAPL': {'current_price': 4}, 'MSFT': {'current_price': 4}, 'GE': {'current_price': 2}})
+
+    def test_failed_calls_return_none(self):
+        """Test one failing call doesn't fail the batch"""
+        self.market_service.get_company_overview.side_effect = lambda symbol: {'Symbol': symbol}
+        self.market_service.get_stock_data.side_effect = ValueError('upstream error')
+
+        overview, quote = self.client.run(self.client.overview('AAPL'), self.client.quote('AAPL'))
+
+        self.assertEqual(overview, {'Symbol': 'AAPL'})
+        self.assertIsNone(quote)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.services.cache_service import MemoryCache, SQLiteCache, TieredCache
+
+
+class MemoryCacheTestCase(unittest.TestCase):
+    def test_get_and_set(self):
+        """Test values are returned until they expire"""
+        cache = MemoryCache(default_ttl=60, max_entries=10)
+        cache.set('stock_data_AAPL', {'current_price': 150.0})
+
+        self.assertEqual(cache.get('stock_data_AAPL'), {'current_price': 150.0})
+        self.assertIsNone(cache.get('stock_data_MSFT'))
+
+        with patch('app.services.cache_service.time.time', return_value=10 ** 12):
+            self.assertIsNone(cache.get('stock_data_AAPL'))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['expirations'], 1)
+
+    def test_stale_entries_only_served_when_allowed(self):
+        """Test expired entries inside the stale window are kept for stale reads"""
+        cache = MemoryCache(default_ttl=60, max_entries=10, stale_ttl=600)
+        cache.set('stock_data_AAPL', {'current_price': 150.0}, ttl=-1)
+
+        self.assertIsNone(cache.get('stock_data_AAPL'))
+        value, expires_at = cache.get_entry('stock_data_AAPL', allow_stale=True)
+        self.assertEqual(value, {'current_price': 150.0})
+        self.assertEqual(cache.get_stats()['stale_hits'], 1)
+
+        with patch('app.services.cache_service.time.time', return_value=expires_at + 601):
+            self.assertIsNone(cache.get_entry('stock_data_AAPL', allow_stale=True))
+
+    def test_lru_eviction_by_entry_count(self):
+        """Test the least recently used entry is evicted first"""
+        cache = MemoryCache(default_ttl=60, max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertTrue(cache.contains('a'))
+        self.assertFalse(cache.contains('b'))
+        self.assertTrue(cache.contains('c'))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_eviction_by_byte_budget(self):
+        """Test entries are evicted to stay within the byte budget"""
+        cache = MemoryCache(default_ttl=60, max_entries=100, max_bytes=1000)
+        for i in range(10):
+            cache.set(f'key_{i}', 'x' * 200)
+
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['bytes'], 1000)
+        self.assertTrue(cache.contains('key_9'))
+        self.assertFalse(cache.contains('key_0'))
+
+
+class SQLiteCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'cache', 'market_data.sqlite3')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_entries_survive_new_instance(self):
+        """Test a new cache instance (e.g. a restarted worker) sees existing entries"""
+        SQLiteCache(self.path, default_ttl=60).set('stock_data_AAPL', {'current_price': 150.0})
+
+        restarted = SQLiteCache(self.path, default_ttl=60)
+        self.assertEqual(restarted.get('stock_data_AAPL'), {'current_price': 150.0})
+        self.assertTrue(restarted.contains('stock_data_AAPL'))
+
+    def test_expired_entries_are_misses(self):
+        """Test TTL expiry is kept across instances"""
+        cache = SQLiteCache(self.path, default_ttl=60)
+        cache.set('stock_data_AAPL', {'current_price': 150.0}, ttl=-1)
+
+        self.assertIsNone(cache.get('stock_data_AAPL'))
+        self.assertEqual(cache.get_stats()['expirations'], 1)
+
+    def test_tiered_cache_fills_local_tier(self):
+        """Test shared hits are copied into the in-memory tier"""
+        shared = SQLiteCache(self.path, default_ttl=60)
+        shared.set('stock_data_MSFT', {'current_price': 300.0})
+
+        tiered = TieredCache(MemoryCache(default_ttl=60), shared)
+        self.assertEqual(tiered.get('stock_data_MSFT'), {'current_price': 300.0})
+        self.assertTrue(tiered.local.contains('stock_data_MSFT'))
@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from app import create_app, db
+from app.models.market_data import CompanyProfile
+from app.services.company_index import CompanyIndex
+
+
+def _overview(symbol, sector='TECHNOLOGY', dividend_yield='0.0300'):
+    return {'Symbol': symbol, 'Name': f'{symbol} Inc', 'Sector': sector, 'Industry': 'SOFTWARE',
+            'MarketCapitalization': '1000000', 'DividendYield': dividend_yield, 'Exchange': 'NASDAQ'}
+
+
+class CompanyIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.market_service = MagicMock()
+        self.index = CompanyIndex(self.market_service)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_profiles_are_fetched_once_then_read_locally(self):
+        """Test missing profiles are fetched in one bulk call and persisted"""
+        self.market_service.get_company_overview_bulk.return_value = {
+            'ZZZA': _overview('ZZZA'), 'ZZZB': _overview('ZZZB', 'LIFE SCIENCES', 'None')
+        }
+
+        profiles = self.index.get_profiles(['ZZZA', 'ZZZB'])
+        self.assertEqual(profiles['ZZZA']['sector'], 'Technology')
+        self.assertEqual(profiles['ZZZA']['dividend_yield'], 0.03)
+        self.assertIsNone(profiles['ZZZB']['dividend_yield'])
+        self.market_service.get_company_overview_bulk.assert_called_once_with(['ZZZA', 'ZZZB'])
+
+        self.market_service.get_company_overview_bulk.reset_mock()
+        self.assertEqual(self.index.get_sectors(['ZZZA', 'ZZZB']),
+                         {'ZZZA': 'Technology', 'ZZZB': 'Healthcare'})
+        self.market_service.get_company_overview_bulk.assert_not_called()
+
+    def test_sectors_use_seed_and_mark_unknown(self):
+        """Test seeded symbols cost no API call and unresolved symbols come back Unknown"""
+        self.market_service.get_company_overview_bulk.return_value = {'ZZZC': {}}
+
+        sectors = self.index.get_sectors(['AAPL', 'ZZZC'])
+        self.assertEqual(sectors, {'AAPL': 'Technology', 'ZZZC': 'Unknown'})
+        self.market_service.get_company_overview_bulk.assert_called_once_with(['ZZZC'])
+        self.assertEqual(CompanyProfile.query.get('AAPL').source, 'seed')
+
+    def test_seed_sector_wins_over_overview(self):
+        """Test a full profile keeps a seeded symbol's sector whatever OVERVIEW calls it"""
+        self.market_service.get_company_overview_bulk.return_value = {
+            'JNJ': _overview('JNJ', 'LIFE SCIENCES'), 'JPM': _overview('JPM', 'MANUFACTURING'),
+            'ZZZE': _overview('ZZZE', 'TRADE & SERVICES')
+        }
+
+        profiles = self.index.get_profiles(['JNJ', 'JPM', 'ZZZE'])
+        self.assertEqual(profiles['JNJ']['sector'], 'Healthcare')
+        self.assertEqual(profiles['JPM']['sector'], 'Financials')
+        self.assertEqual(profiles['ZZZE']['sector'], 'Consumer Cyclical')
+        self.assertEqual(CompanyProfile.query.get('JPM').source, 'overview')
+
+    def test_stale_profiles_are_refreshed(self):
+        """Test profiles older than the index TTL are refetched"""
+        db.session.add(CompanyProfile(symbol='ZZZD', sector='Energy', source='overview',
+                                      refreshed_at=datetime.utcnow() - timedelta(days=365)))
+        db.session.commit()
+        self.market_service.get_company_overview_bulk.return_value = {'ZZZD': _overview('ZZZD', 'UTILITIES')}
+
+        self.assertEqual(self.index.get_sectors(['ZZZD']), {'ZZZD': 'Utilities'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+
+from app.services.downsampling import lttb_indices, downsample
+
+
+class DownsamplingTestCase(unittest.TestCase):
+    def test_lttb_keeps_endpoints_and_extremes(self):
+        """Test LTTB keeps the first and last points and a lone spike"""
+        x = np.arange(1000)
+        y = np.zeros(1000)
+        y[537] = 10.0
+
+        keep = lttb_indices(x, y, 20)
+        self.assertEqual(len(keep), 20)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], 999)
+        self.assertIn(537, keep)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_short_series_are_untouched(self):
+        """Test series already under the point budget are returned as is"""
+        dates = np.array(['2024-01-01', '2024-01-02'], dtype='datetime64[D]')
+        values = np.array([1.0, 2.0])
+
+        out_dates, out_values = downsample(dates, values, 100)
+        self.assertIs(out_values, values)
+        self.assertEqual(list(lttb_indices(np.arange(5), np.arange(5), 2)), [0, 1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
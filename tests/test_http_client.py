@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from app.services.http_client import HTTPClient
+
+
+class HTTPClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = HTTPClient(max_retries=2, backoff_base=0.01)
+
+    @patch('app.services.http_client.time.sleep')
+    def test_retries_connection_errors(self, mock_sleep):
+        """Test transient connection errors are retried with backoff"""
+        ok_response = MagicMock(status_code=200)
+        with patch.object(self.client.session, 'get',
+                          side_effect=[requests.ConnectionError('reset'), ok_response]) as mock_get:
+            response = self.client.get('https://example.com/query', params={'function': 'GLOBAL_QUOTE'})
+
+        self.assertIs(response, ok_response)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], self.client.timeout)
+
+        stats = self.client.get_stats()['GLOBAL_QUOTE']
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['failures'], 1)
+
+    @patch('app.services.http_client.time.sleep')
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        """Test retryable status codes are returned once retries are exhausted"""
+        busy_response = MagicMock(status_code=503)
+        with patch.object(self.client.session, 'get', return_value=busy_response) as mock_get:
+            response = self.client.get('https://example.com/query')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_does_not_retry_client_errors(self):
+        """Test non-retryable responses are returned immediately"""
+        not_found = MagicMock(status_code=404)
+        with patch.object(self.client.session, 'get', return_value=not_found) as mock_get:
+            self.client.get('https://example.com/query')
+
+        self.assertEqual(mock_get.call_count, 1)
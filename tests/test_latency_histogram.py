@@ -0,0 +1,99 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from app import create_app, db
+from app.monitoring.histogram import LogHistogram
+from app.monitoring.metrics import (
+    metrics_writer, LatencySketch, ResponseMetric,
+    get_average_response_time, get_response_time_percentiles
+)
+
+
+class LogHistogramTestCase(unittest.TestCase):
+    def test_quantiles_within_relative_error(self):
+        """Test quantiles stay within the bucket's relative error of the exact values"""
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(-3, 1) for _ in range(5000))
+        histogram = LogHistogram()
+        for value in values:
+            histogram.add(value)
+
+        for q in (0.5, 0.95, 0.99, 1):
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(histogram.quantile(q) / exact, 1, delta=0.03)
+        self.assertLessEqual(histogram.quantile(1), values[-1])
+
+    def test_error_bound_against_numpy(self):
+        """Test quantiles of a skewed sample stay within the documented (GROWTH - 1)/2 bound"""
+        values = np.random.default_rng(11).lognormal(-4, 1.5, 20000)
+        histogram = LogHistogram()
+        for value in values:
+            histogram.add(value)
+
+        bound = math.sqrt(LogHistogram.GROWTH) - 1
+        self.assertAlmostEqual(bound, (LogHistogram.GROWTH - 1) / 2, places=3)
+        for q in (0.01, 0.25, 0.5, 0.9, 0.99, 0.999):
+            # The histogram ranks with ceil(q * n), which is numpy's inverted_cdf method
+            exact = np.quantile(values, q, method='inverted_cdf')
+            self.assertLessEqual(abs(histogram.quantile(q) - exact) / exact, bound + 1e-9)
+
+    def test_merge_matches_single_histogram(self):
+        """Test merged histograms answer like one histogram fed every value"""
+        combined, first, second = LogHistogram(), LogHistogram(), LogHistogram()
+        for i in range(1, 1001):
+            combined.add(i / 1000)
+            (first if i % 2 else second).add(i / 1000)
+
+        restored = LogHistogram.from_row(second.to_json(), second.count, second.total, second.maximum)
+        merged = first.merge(restored)
+
+        self.assertEqual(merged.count, 1000)
+        self.assertAlmostEqual(merged.mean(), combined.mean())
+        self.assertEqual(merged.quantile(0.95), combined.quantile(0.95))
+
+
+class LatencySketchQueryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        metrics_writer.configure(self.app, flush_interval=3600)
+
+    def tearDown(self):
+        metrics_writer.configure(self.app, flush_interval=0)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_percentiles_read_from_sketches(self):
+        """Test percentiles come from written and still open sketches, not raw rows"""
+        for i in range(1, 101):
+            metrics_writer.observe('route:portfolio.get_holdings', i / 100)
+        before_flush = get_response_time_percentiles('portfolio.get_holdings')
+
+        metrics_writer.flush(close_sketches=True)
+        self.assertEqual(LatencySketch.query.count(), 1)
+
+        percentiles = get_response_time_percentiles('portfolio.get_holdings')
+        self.assertAlmostEqual(percentiles[50], 0.50, delta=0.02)
+        self.assertAlmostEqual(percentiles[99], 0.99, delta=0.03)
+        self.assertEqual(percentiles, before_flush)
+        self.assertAlmostEqual(get_average_response_time('portfolio.get_holdings'), 0.505)
+
+    def test_falls_back_to_raw_rows(self):
+        """Test routes without sketches still report from older raw rows"""
+        for i in range(1, 11):
+            db.session.add(ResponseMetric(route='portfolio.get_risk_analysis', response_time=i / 10))
+        db.session.commit()
+
+        self.assertAlmostEqual(get_average_response_time('portfolio.get_risk_analysis'), 0.55)
+        self.assertEqual(get_response_time_percentiles('portfolio.get_risk_analysis', (50, 95))[95], 1.0)
+        self.assertEqual(get_response_time_percentiles('portfolio.unknown'), {50: 0, 95: 0, 99: 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,8 @@ from app import create_app, db
 from app.models.user import User
 from unittest.mock import patch, MagicMock
 import json
+from datetime import timedelta
+import threading
 
 
 class MarketDataTestCase(unittest.TestCase):
@@ -56,7 +58,7 @@ class MarketDataTestCase(unittest.TestCase):
         self.assertTrue(b'Apple Inc.' in response.data)
         self.assertTrue(b'Technology' in response.data)
 
-    @patch('app.routes.market_routes.requests.get')
+    @patch('app.services.http_client.http_client.get')
     def test_search_stock(self, mock_get):
         """Test stock search functionality"""
         mock_response = MagicMock()
@@ -77,7 +79,79 @@ class MarketDataTestCase(unittest.TestCase):
         self.assertEqual(data['price'], '150.25')
         self.assertEqual(data['change'], '2.50')
 
-    @patch('app.routes.market_routes.requests.get')
+    @patch('app.services.http_client.http_client.get')
+    def test_search_uses_local_listing(self, mock_get):
+        """Test suggestions and unknown symbols are answered from the local listing without API calls"""
+        import os
+        path = self.app.config['SYMBOL_LISTING_PATH']
+        with open(path, 'w') as f:
+            f.write("symbol,name,exchange,assetType,ipoDate,delistingDate,status\n"
+                    "MSFT,Microsoft Corporation,NASDAQ,Stock,1986-03-13,null,Active\n")
+        try:
+            data = json.loads(self.client.get('/market/search/suggest?q=micro').data)
+            self.assertEqual(data['matches'][0]['symbol'], 'MSFT')
+
+            data = json.loads(self.client.get('/market/search?symbol=NOTREAL').data)
+            self.assertIn('error', data)
+
+            # A partial or mistyped symbol is offered as a suggestion, not quoted in its place
+            data = json.loads(self.client.get('/market/search?symbol=MSF').data)
+            self.assertIn('Did you mean MSFT?', data['error'])
+            self.assertEqual(data['suggestions'][0]['symbol'], 'MSFT')
+            mock_get.assert_not_called()
+        finally:
+            os.remove(path)
+
+    @patch('app.services.market_service.MarketService._fetch_stock_data')
+    def test_stream_polls_are_not_views(self, mock_fetch):
+        """Test opening a stream counts as a view but the poller's refreshes don't"""
+        from app.services.market_service import MarketService
+        from app.services.quote_refresher import quote_refresher
+
+        mock_fetch.return_value = {'current_price': 150.0}
+
+        MarketService().get_stock_data_bulk(['GE', 'F'], record_views=False)
+        self.assertEqual(quote_refresher.most_viewed(10), [])
+
+        self.client.get('/market/stream?symbols=ge').close()
+        self.assertEqual(quote_refresher.most_viewed(10), ['GE'])
+
+    def test_quote_stream_sends_events(self):
+        """Test the quote stream sends known quotes as a server-sent event"""
+        from app.services.quote_stream import quote_stream
+
+        quote_stream.publish({'AAPL': {'current_price': 150.0, 'daily_change': 1.0}})
+        response = self.client.get('/market/stream?symbols=aapl')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+
+        chunks = response.response
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        event = next(chunks).decode()
+        self.assertTrue(event.startswith('event: quotes'))
+        self.assertEqual(json.loads(event.split('data: ')[1])['AAPL']['current_price'], 150.0)
+        response.close()
+        self.assertEqual(quote_stream.get_stats()['subscribers'], 0)
+
+    @patch('app.services.market_service.MarketService.get_stock_data_bulk')
+    def test_full_streams_fall_back_to_polling(self, mock_bulk):
+        """Test streams past the cap get a 503 and the same quotes are served by /quotes"""
+        from app.services.quote_stream import quote_stream
+
+        mock_bulk.return_value = {'AAPL': {'current_price': 150.0, 'daily_change': 1.0}, 'NOPE': None}
+        quote_stream.max_subscribers = 0
+        try:
+            response = self.client.get('/market/stream?symbols=aapl')
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response.headers)
+        finally:
+            quote_stream.max_subscribers = self.app.config['QUOTE_STREAM_MAX_CLIENTS']
+
+        data = json.loads(self.client.get('/market/quotes?symbols=aapl,nope').data)
+        self.assertEqual(data, {'AAPL': {'current_price': 150.0, 'daily_change': 1.0, 'daily_change_percent': None,
+                                         'volume': None, 'stale': None}})
+        mock_bulk.assert_called_once_with(['AAPL', 'NOPE'], record_views=False)
+
+    @patch('app.services.http_client.http_client.get')
     def test_get_market_news(self, mock_get):
         """Test fetching market news"""
         mock_response = MagicMock()
@@ -111,7 +185,7 @@ class MarketDataTestCase(unittest.TestCase):
         self.assertEqual(len(data['news']), 2)
         self.assertEqual(data['news'][0]['title'], 'Market rallies on tech earnings')
 
-    @patch('app.routes.market_routes.requests.get')
+    @patch('app.services.http_client.http_client.get')
     def test_get_stock_history(self, mock_get):
         """Test getting stock price history"""
         mock_response = MagicMock()
@@ -144,7 +218,56 @@ class MarketDataTestCase(unittest.TestCase):
         self.assertEqual(len(data['dates']), 2)
         self.assertEqual(len(data['prices']), 2)
 
-    @patch('app.routes.market_routes.requests.get')
+    @patch('app.services.http_client.http_client.get')
+    def test_get_stock_history_range_is_downsampled(self, mock_get):
+        """Test a date range is sliced from the store and downsampled to the requested points"""
+        from datetime import date
+
+        days = [date(2020, 1, 1) + timedelta(days=i) for i in range(1000)]
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'Time Series (Daily)': {
+            day.strftime('%Y-%m-%d'): {'1. open': '1', '2. high': '1', '3. low': '1',
+                                       '4. close': str(100 + i % 50), '5. volume': '1'}
+            for i, day in enumerate(days)
+        }}
+        mock_get.return_value = mock_response
+
+        response = self.client.get('/market/stock_history/ZZZH?start=2020-03-01&end=2021-12-31&points=50')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+
+        self.assertEqual(len(data['dates']), 50)
+        self.assertEqual(data['dates'][0], '2020-03-01')
+        self.assertEqual(data['dates'][-1], '2021-12-31')
+        self.assertEqual(data['dates'], sorted(data['dates']))
+
+        response = self.client.get('/market/stock_history/ZZZH?start=not-a-date')
+        self.assertEqual(response.status_code, 400)
+
+        # Failures while building the response are server errors, not bad ranges
+        with patch('app.routes.market_routes.downsample', side_effect=ValueError('bad series')):
+            response = self.client.get('/market/stock_history/ZZZH?start=2020-03-01&end=2021-12-31')
+        self.assertEqual(response.status_code, 500)
+
+    @patch('app.services.http_client.http_client.get')
+    def test_get_stock_history_intraday_dates(self, mock_get):
+        """Test intraday labels keep one format whether or not the series is downsampled"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'Time Series (60min)': {
+            f'2023-04-0{day} {hour:02d}:00:00': {'4. close': str(100 + hour)}
+            for day in (5, 4, 3) for hour in range(19, 3, -1)
+        }}
+        mock_get.return_value = mock_response
+
+        full = json.loads(self.client.get('/market/stock_history/AAPL?period=5d&points=100').data)
+        reduced = json.loads(self.client.get('/market/stock_history/AAPL?period=5d&points=10').data)
+        self.assertEqual(len(full['dates']), 48)
+        self.assertEqual(len(reduced['dates']), 10)
+        self.assertEqual(full['dates'][0], '2023-04-03 04:00:00')
+        self.assertEqual(reduced['dates'][0], '2023-04-03 04:00:00')
+        self.assertEqual(reduced['dates'][-1], '2023-04-05 19:00:00')
+
+    @patch('app.services.http_client.http_client.get')
     def test_get_market_movers(self, mock_get):
         """Test getting market movers (top gainers, losers)"""
         mock_response = MagicMock()
@@ -191,7 +314,7 @@ class MarketDataTestCase(unittest.TestCase):
         self.assertEqual(data['losers'][0]['symbol'], 'MSFT')
         self.assertEqual(data['mostActive'][0]['symbol'], 'TSLA')
 
-    @patch('app.routes.market_routes.requests.get')
+    @patch('app.services.http_client.http_client.get')
     def test_get_indices(self, mock_get):
         """Test getting market indices"""
 
@@ -222,7 +345,98 @@ class MarketDataTestCase(unittest.TestCase):
         self.assertEqual(data['nasdaq']['price'], '380.00')
         self.assertEqual(data['dow']['price'], '350.00')
 
+    @patch('app.services.http_client.http_client.get')
+    def test_market_news_response_is_cached(self, mock_get):
+        """Test market-wide responses are shared until invalidated"""
+        from app.services.response_cache import response_cache
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'feed': [{'title': 'Markets open higher', 'time_published': '20210820T100000'}]}
+        mock_get.return_value = mock_response
+
+        first = self.client.get('/market/news')
+        second = self.client.get('/market/news')
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(mock_get.call_count, 1)
+
+        # Query strings are part of the key
+        self.client.get('/market/news?symbol=AAPL')
+        self.assertEqual(mock_get.call_count, 2)
+
+        response_cache.invalidate('market.get_market_news')
+        self.assertEqual(self.client.get('/market/news').headers['X-Cache'], 'MISS')
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(response_cache.get_stats()['endpoints']['market.get_market_news'],
+                         {'hits': 1, 'misses': 3, 'hit_rate': 25.0})
+
+    @patch('app.services.market_service.MarketService.get_stock_data')
+    def test_fallback_response_is_not_cached(self, mock_get_stock_data):
+        """Test placeholder indices served during an outage are replaced once upstream recovers"""
+        mock_get_stock_data.side_effect = Exception('upstream down')
+        outage = self.client.get('/market/indices')
+        self.assertEqual(outage.status_code, 200)
+        self.assertEqual(json.loads(outage.data)['sp500']['price'], 'N/A')
+        self.assertIn('no-store', outage.headers['Cache-Control'])
+
+        mock_get_stock_data.side_effect = None
+        mock_get_stock_data.return_value = {'current_price': 450.0, 'daily_change': 1.0, 'daily_change_percent': 0.2}
+        recovered = self.client.get('/market/indices')
+        self.assertEqual(recovered.headers['X-Cache'], 'MISS')
+        self.assertEqual(json.loads(recovered.data)['sp500']['price'], '450.00')
+        self.assertEqual(self.client.get('/market/indices').headers['X-Cache'], 'HIT')
+
+    @patch('app.services.market_service.MarketService.get_stock_data')
+    def test_get_stock_data_bulk(self, mock_get_stock_data):
+        """Test bulk quotes are deduplicated and keyed by symbol"""
+        from app.services.market_service import MarketService
+
+        mock_get_stock_data.side_effect = lambda symbol, record_view=True: {'current_price': len(symbol) * 10.0}
+
+        quotes = MarketService().get_stock_data_bulk(['AAPL', 'MSFT', 'AAPL', 'GE'])
+
+        self.assertEqual(set(quotes.keys()), {'AAPL', 'MSFT', 'GE'})
+        self.assertEqual(quotes['GE']['current_price'], 20.0)
+        self.assertEqual(mock_get_stock_data.call_count, 3)
+
+    @patch('app.services.market_service.MarketService._fetch_stock_data')
+    def test_stale_quote_served_and_refreshed(self, mock_fetch):
+        """Test an expired quote is returned marked stale and refreshed in the background"""
+        from app.services.cache_service import quote_cache
+        from app.services.market_service import MarketService
+
+        refreshed = threading.Event()
+
+        def fetch(symbol, cache_key, ttl=None):
+            quote_cache.set(cache_key, {'current_price': 155.0})
+            refreshed.set()
+            return {'current_price': 155.0}
+
+        mock_fetch.side_effect = fetch
+        quote_cache.set('stock_data_AAPL', {'current_price': 150.0}, ttl=-1)
+
+        market_service = MarketService()
+        self.assertEqual(market_service.get_stock_data('AAPL'), {'current_price': 150.0, 'stale': True})
+        self.assertTrue(refreshed.wait(5))
+        self.assertEqual(market_service.get_stock_data('AAPL'), {'current_price': 155.0})
+
+    @patch('app.services.http_client.http_client.get')
+    def test_unknown_symbol_is_negative_cached(self, mock_get):
+        """Test an unknown symbol costs one upstream call per negative cache window"""
+        from app.services.market_service import MarketService
+        from app.monitoring.metrics import get_negative_cache_hits
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'Global Quote': {}}
+        mock_get.return_value = mock_response
+
+        market_service = MarketService()
+        self.assertIsNone(market_service.get_stock_data('NOTASYMBOL'))
+        self.assertIsNone(market_service.get_stock_data('NOTASYMBOL'))
 
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(get_negative_cache_hits(), 1)
 
     def test_basic_market_access(self):
         """Test that we can access a basic route"""
@@ -0,0 +1,42 @@
+import unittest
+from datetime import date, datetime
+
+from app.services.market_calendar import (
+    MARKET_TZ, is_market_open, market_ttl, next_open, nyse_holidays
+)
+
+
+def _et(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+class MarketCalendarTestCase(unittest.TestCase):
+    def test_holidays(self):
+        """Test the computed NYSE holidays for a known year"""
+        holidays = nyse_holidays(2024)
+        self.assertIn(date(2024, 3, 29), holidays)  # Good Friday
+        self.assertIn(date(2024, 6, 19), holidays)  # Juneteenth
+        self.assertIn(date(2024, 11, 28), holidays)  # Thanksgiving
+        self.assertEqual(len(holidays), 10)
+        self.assertIn(date(2021, 12, 24), nyse_holidays(2021))  # Saturday Christmas observed on Friday
+        self.assertNotIn(date(2021, 12, 31), nyse_holidays(2021))  # Saturday New Year's Day isn't moved back
+
+    def test_session_hours(self):
+        """Test the regular session, weekends and early closes"""
+        self.assertTrue(is_market_open(_et(2024, 7, 1, 10, 0)))
+        self.assertFalse(is_market_open(_et(2024, 7, 1, 9, 0)))
+        self.assertFalse(is_market_open(_et(2024, 7, 6, 12, 0)))  # Saturday
+        self.assertFalse(is_market_open(_et(2024, 7, 3, 14, 0)))  # Early close
+        self.assertEqual(next_open(_et(2024, 7, 3, 17, 0)), _et(2024, 7, 5, 9, 30))
+
+    def test_market_ttl(self):
+        """Test short TTLs in the session and until-next-open TTLs when closed"""
+        self.assertEqual(market_ttl(300, _et(2024, 7, 1, 11, 0)), 300)
+        # Friday evening: valid until Monday's open
+        self.assertEqual(market_ttl(300, _et(2024, 7, 5, 20, 0)), int(61.5 * 3600))
+        # Longer TTLs are never shortened
+        self.assertEqual(market_ttl(86400, _et(2024, 7, 1, 20, 0)), 86400)
+
+
+if __name__ == '__main__':
+    unittest.main()
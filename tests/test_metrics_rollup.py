@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app import create_app, db
+from app.monitoring.histogram import LogHistogram
+from app.monitoring.metrics import (
+    APIMetric, CacheMetric, LatencySketch, MetricRollup,
+    get_api_success_rate, get_cache_hit_rate, get_negative_cache_hits, get_response_time_percentiles
+)
+from app.monitoring.rollup import rollup_events, compact_rollups, prune_metrics
+
+
+class MetricsRollupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.now = datetime.now().replace(second=30, microsecond=0)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_events(self, minutes_ago, api_ok, api_failed, hits, misses, negative_hits=0):
+        timestamp = self.now - timedelta(minutes=minutes_ago)
+        for i in range(api_ok + api_failed):
+            db.session.add(APIMetric(provider='alpha_vantage', endpoint='GLOBAL_QUOTE',
+                                     success=i < api_ok, timestamp=timestamp))
+        for i in range(hits + misses):
+            db.session.add(CacheMetric(cache_key='stock_data_AAPL', hit=i < hits, timestamp=timestamp))
+        for _ in range(negative_hits):
+            db.session.add(CacheMetric(cache_key='negative_stock_data_XX', hit=True, timestamp=timestamp))
+        db.session.commit()
+
+    def test_rates_match_before_and_after_rollup(self):
+        """Test the admin rates read the same from rollups plus recent raw rows"""
+        self._add_events(30, api_ok=3, api_failed=1, hits=6, misses=2, negative_hits=2)
+        self._add_events(10, api_ok=1, api_failed=0, hits=1, misses=1)
+        self._add_events(0, api_ok=0, api_failed=1, hits=0, misses=2)
+        before = (get_api_success_rate('alpha_vantage'), get_cache_hit_rate(), get_negative_cache_hits())
+
+        # Events from the current minute are inside the lag and are left for the next run
+        self.assertEqual(rollup_events(self.now), 5 + 12)
+        self.assertEqual(rollup_events(self.now), 0)
+
+        after = (get_api_success_rate('alpha_vantage'), get_cache_hit_rate(), get_negative_cache_hits())
+        self.assertEqual(before, after)
+        self.assertAlmostEqual(after[0], 4 / 6 * 100)
+        self.assertEqual(after[2], 2)
+
+    def test_compaction_and_retention(self):
+        """Test old minute rows become hourly rows and expired raw rows are pruned"""
+        self._add_events(3 * 24 * 60 + 90, api_ok=2, api_failed=0, hits=1, misses=1)
+        self._add_events(3 * 24 * 60 + 80, api_ok=1, api_failed=1, hits=0, misses=0)
+        rollup_events(self.now)
+
+        old_bucket = self.now - timedelta(days=3, minutes=85)
+        for value in (0.1, 0.2):
+            db.session.add(LatencySketch(series='route:portfolio.get_holdings', bucket_start=old_bucket,
+                                         bucket_seconds=60, count=1, total=value, maximum=value,
+                                         counts=self._single_value_counts(value)))
+        db.session.commit()
+
+        compact_rollups(self.now)
+        self.assertEqual(MetricRollup.query.filter(MetricRollup.bucket_seconds == 60).count(), 0)
+        hourly = MetricRollup.query.filter_by(kind='api', bucket_seconds=3600).all()
+        self.assertEqual(sum(row.count for row in hourly), 4)
+        self.assertEqual(sum(row.hits for row in hourly), 3)
+        self.assertEqual(LatencySketch.query.count(), 1)
+        self.assertEqual(LatencySketch.query.first().count, 2)
+
+        self.assertEqual(prune_metrics(self.now), 6)
+        self.assertEqual(APIMetric.query.count() + CacheMetric.query.count(), 0)
+        self.assertAlmostEqual(get_api_success_rate('alpha_vantage', time_window=24 * 4), 75.0)
+        self.assertAlmostEqual(get_response_time_percentiles('portfolio.get_holdings', (50,), 24 * 4)[50], 0.1,
+                               delta=0.005)
+
+    def test_overlapping_runs_do_not_double_count(self):
+        """Test a run that read the same starting point as another adds no rollups"""
+        self._add_events(30, api_ok=3, api_failed=1, hits=2, misses=2)
+        self.assertEqual(rollup_events(self.now), 8)
+
+        with patch('app.monitoring.rollup.rolled_up_until', return_value=None):
+            self.assertEqual(rollup_events(self.now), 0)
+        self.assertEqual(db.session.query(db.func.sum(MetricRollup.count)).scalar(), 8)
+        self.assertAlmostEqual(get_api_success_rate('alpha_vantage'), 75.0)
+
+    @staticmethod
+    def _single_value_counts(value):
+        sketch = LogHistogram()
+        sketch.add(value)
+        return sketch.to_json()
+
+
+if __name__ == '__main__':
+    unittest.main()
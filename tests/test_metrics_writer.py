@@ -0,0 +1,45 @@
+import unittest
+
+from app import create_app, db
+from app.monitoring.metrics import metrics_writer, track_cache_access, CacheMetric
+
+
+class MetricsWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        # Buffering with a flush interval long enough that only explicit flushes write
+        metrics_writer.configure(self.app, flush_interval=3600, flush_batch=1000, max_buffer=5)
+
+    def tearDown(self):
+        metrics_writer.configure(self.app, flush_interval=0)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_metrics_are_buffered_then_bulk_written(self):
+        """Test recorded metrics wait in the buffer and are written in one flush"""
+        for i in range(3):
+            track_cache_access(f"stock_data_S{i}", i % 2 == 0)
+
+        self.assertEqual(CacheMetric.query.count(), 0)
+        self.assertEqual(metrics_writer.get_stats()['queued'], 3)
+
+        self.assertEqual(metrics_writer.flush(), 3)
+        self.assertEqual(CacheMetric.query.count(), 3)
+        self.assertEqual(metrics_writer.get_stats()['written'], 3)
+
+    def test_full_buffer_drops_and_counts(self):
+        """Test rows beyond the buffer limit are dropped instead of queued"""
+        for i in range(8):
+            track_cache_access(f"stock_data_S{i}", True)
+
+        stats = metrics_writer.get_stats()
+        self.assertEqual(stats['queued'], 5)
+        self.assertEqual(stats['dropped'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
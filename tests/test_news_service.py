@@ -0,0 +1,59 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from app import create_app, db
+from app.services.market_service import MarketService
+from app.services.news_service import NewsService
+
+
+def _article(url, label, published, ticker):
+    return {'title': url, 'url': url, 'time_published': published, 'overall_sentiment_label': label,
+            'ticker_sentiment': [{'ticker': ticker, 'ticker_sentiment_label': label}]}
+
+
+FEEDS = {
+    'AAPL': [_article('https://example.com/shared', 'Bullish', '20240102T100000', 'AAPL'),
+             _article('https://example.com/aapl', 'Neutral', '20240101T100000', 'AAPL')],
+    'MSFT': [_article('https://example.com/shared', 'Bullish', '20240102T100000', 'MSFT'),
+             _article('https://example.com/msft', 'Bearish', '20240103T100000', 'MSFT')]
+}
+
+
+class NewsServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.news_service = NewsService(MarketService())
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @patch('app.services.http_client.http_client.get')
+    def test_portfolio_news_is_deduplicated_and_cached(self, mock_get):
+        """Test articles shared by holdings appear once and feeds are cached per symbol"""
+        def side_effect(url, params):
+            response = MagicMock()
+            response.json.return_value = {'feed': FEEDS[params['tickers']]}
+            return response
+
+        mock_get.side_effect = side_effect
+        holdings = [SimpleNamespace(symbol='AAPL'), SimpleNamespace(symbol='MSFT')]
+
+        news = self.news_service.get_news_for_portfolio(holdings)
+        self.assertEqual(sorted(item['url'] for item in news),
+                         ['https://example.com/aapl', 'https://example.com/msft', 'https://example.com/shared'])
+        # One of each sentiment leads, negative first
+        self.assertEqual([item['sentiment'] for item in news], ['negative', 'positive', 'neutral'])
+        self.assertEqual(mock_get.call_count, 2)
+
+        self.news_service.get_news_for_portfolio(holdings)
+        self.assertEqual(mock_get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from app import create_app, db
+from app.models.market_data import DailyPrice, PriceSeriesStatus
+from app.services.price_archive import PriceArchive
+from app.services.price_store import PriceStore, CLOSE
+from app.services.single_flight import SingleFlight
+
+
+def _series(days):
+    today = date.today()
+    return {'Time Series (Daily)': {
+        (today - timedelta(days=i)).strftime('%Y-%m-%d'): {
+            '1. open': '100.0', '2. high': '101.0', '3. low': '99.0',
+            '4. close': str(100.0 + i), '5. volume': '1000'
+        } for i in range(days)
+    }}
+
+
+class PriceStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.market_service = MagicMock()
+        self.market_service.flight = SingleFlight()
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.store = PriceStore(self.market_service, archive=PriceArchive(self.archive_dir.name))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.archive_dir.cleanup()
+
+    def test_backfill_then_read_from_store(self):
+        """Test the first read backfills full history and later reads the same day hit the store"""
+        self.market_service.get_historical_data.return_value = _series(10)
+
+        bars = self.store.get_daily_bars('AAPL')
+        self.assertEqual(len(bars), 10)
+        self.assertTrue(bars['date'].is_monotonic_increasing)
+        self.market_service.get_historical_data.assert_called_once_with('AAPL', outputsize='full')
+
+        latest = self.store.get_daily_bars('AAPL', limit=3)
+        self.assertEqual(latest['close'].tolist(), [102.0, 101.0, 100.0])
+        self.assertEqual(self.market_service.get_historical_data.call_count, 1)
+
+    def test_next_day_tops_up_with_compact(self):
+        """Test a stale series is topped up with a compact request and overlapping bars replaced"""
+        self.market_service.get_historical_data.return_value = _series(10)
+        self.store.get_daily_bars('AAPL')
+
+        status = db.session.get(PriceSeriesStatus, 'AAPL')
+        status.refreshed_on = date.today() - timedelta(days=1)
+        db.session.commit()
+
+        self.market_service.get_historical_data.return_value = _series(3)
+        bars = self.store.get_daily_bars('AAPL')
+
+        self.market_service.get_historical_data.assert_called_with('AAPL', outputsize='compact')
+        self.assertEqual(len(bars), 10)
+        self.assertEqual(DailyPrice.query.filter_by(symbol='AAPL').count(), 10)
+
+    def test_columns_are_memory_mapped_views(self):
+        """Test history is served as read-only memory-mapped arrays sliced by date"""
+        self.market_service.get_historical_data.return_value = _series(10)
+
+        dates, ohlcv = self.store.get_columns('AAPL', start=date.today() - timedelta(days=4))
+        self.assertEqual(len(dates), 5)
+        self.assertIsInstance(ohlcv.base, np.memmap)
+        self.assertFalse(ohlcv.flags.writeable)
+        self.assertEqual(ohlcv[CLOSE].tolist(), [104.0, 103.0, 102.0, 101.0, 100.0])
+
+    def test_refresh_replaces_archived_version(self):
+        """Test a refresh writes a new archive version and removes the old one"""
+        self.market_service.get_historical_data.return_value = _series(10)
+        self.store.get_columns('AAPL')
+
+        status = db.session.get(PriceSeriesStatus, 'AAPL')
+        status.refreshed_on = date.today() - timedelta(days=1)
+        db.session.commit()
+
+        self.market_service.get_historical_data.return_value = {'Time Series (Daily)': {
+            date.today().strftime('%Y-%m-%d'): {
+                '1. open': '1', '2. high': '1', '3. low': '1', '4. close': '250.0', '5. volume': '1'
+            }
+        }}
+        dates, ohlcv = self.store.get_columns('AAPL', limit=1)
+
+        self.assertEqual(ohlcv[CLOSE].tolist(), [250.0])
+        self.assertEqual(len(os.listdir(self.archive_dir.name)), 2)
+
+    def test_archive_directory_created_on_first_write(self):
+        """Test configuring the archive leaves the disk alone until there is something to write"""
+        root = os.path.join(self.archive_dir.name, 'lazy')
+        archive = PriceArchive(root)
+        self.assertFalse(os.path.exists(root))
+        self.assertIsNone(archive.load('AAPL', 'v1'))
+
+        archive.write('AAPL', 'v1', [date.today()], [[1.0], [1.0], [1.0], [1.0], [1.0]])
+        self.assertEqual(len(os.listdir(root)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from app import create_app, db
+from app.monitoring.prometheus import MetricsRegistry
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _worker(self, pid):
+        worker = MetricsRegistry(self.tmp.name, export_interval=3600)
+        worker.pid = pid
+        return worker
+
+    def test_histogram_exposition(self):
+        """Test histograms render cumulative buckets, sum and count"""
+        worker = MetricsRegistry()
+        for value in (0.003, 0.2, 42):
+            worker.observe('http_request_duration_seconds', value, endpoint='market.get_indices', status=200)
+
+        lines = worker.render().splitlines()
+        labels = 'endpoint="market.get_indices",status="200"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 3', lines)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', lines)
+
+    def test_workers_are_added_up(self):
+        """Test a scrape adds every worker's counters but drops gauges of exited workers"""
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+
+        current, other, gone = self._worker(os.getpid()), self._worker(os.getppid()), self._worker(exited.pid)
+        for worker in (current, other, gone):
+            worker.inc('upstream_calls_total', provider='alpha_vantage', endpoint='GLOBAL_QUOTE', outcome='success')
+            worker.set('cache_entries', 10, cache='quote')
+            worker.observe('job_duration_seconds', 2, job='rollup_metrics', outcome='success')
+        other.export()
+        gone.export()
+
+        lines = current.render().splitlines()
+        self.assertIn('upstream_calls_total{provider="alpha_vantage",endpoint="GLOBAL_QUOTE",outcome="success"} 3',
+                      lines)
+        self.assertIn('job_duration_seconds_count{job="rollup_metrics",outcome="success"} 3', lines)
+        self.assertIn('cache_entries{cache="quote"} 20', lines)
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+    def tearDown(self):
+        self.app.config['METRICS_SCRAPE_TOKEN'] = None
+        self.app.config['METRICS_REQUIRE_TOKEN'] = False
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_metrics_endpoint(self):
+        """Test /metrics serves request latency and cache stats as text"""
+        self.client.get('/')
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_count{endpoint="main.home",status="200"}', body)
+        self.assertIn('cache_hits_total{cache="quote"}', body)
+
+    def test_metrics_token(self):
+        """Test scrapes need the bearer token once one is configured"""
+        self.app.config['METRICS_SCRAPE_TOKEN'] = 'secret'
+
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_closed_without_token_when_required(self):
+        """Test a deployment that requires the token refuses scrapes until one is configured"""
+        self.app.config['METRICS_REQUIRE_TOKEN'] = True
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.app.config['METRICS_SCRAPE_TOKEN'] = 'secret'
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from app.services.quote_stream import QuoteStream
+
+
+class QuoteStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stream = QuoteStream(interval=3600)
+
+    def test_subscribers_get_only_changed_symbols(self):
+        """Test each subscriber is sent a symbol once per change, and only for its own symbols"""
+        self.stream.publish({'AAPL': {'current_price': 150.0}, 'MSFT': {'current_price': 300.0}})
+        apple = self.stream.subscribe(['AAPL'])
+        both = self.stream.subscribe(['AAPL', 'MSFT'])
+
+        self.assertEqual(set(self.stream.updates(apple, timeout=0)), {'AAPL'})
+        self.assertEqual(set(self.stream.updates(both, timeout=0)), {'AAPL', 'MSFT'})
+        self.assertEqual(self.stream.updates(both, timeout=0), {})
+
+        # Republishing an unchanged quote is not an update
+        self.stream.publish({'AAPL': {'current_price': 150.0}, 'MSFT': {'current_price': 301.0}})
+        self.assertEqual(self.stream.updates(apple, timeout=0), {})
+        self.assertEqual(self.stream.updates(both, timeout=0)['MSFT']['current_price'], 301.0)
+
+    def test_poller_covers_union_of_subscriptions(self):
+        """Test the poller refreshes each distinct symbol once however many clients watch it"""
+        first = self.stream.subscribe(['AAPL', 'MSFT'])
+        self.stream.subscribe(['MSFT', 'GE'])
+        self.assertEqual(self.stream.subscribed_symbols(), ['AAPL', 'GE', 'MSFT'])
+
+        self.stream.unsubscribe(first)
+        self.assertEqual(self.stream.subscribed_symbols(), ['GE', 'MSFT'])
+        self.assertEqual(self.stream.get_stats()['subscribers'], 1)
+
+    def test_quotes_dropped_with_last_subscriber(self):
+        """Test a symbol's quote is forgotten once nobody watches it"""
+        first = self.stream.subscribe(['AAPL', 'MSFT'])
+        second = self.stream.subscribe(['MSFT'])
+        self.stream.publish({'AAPL': {'current_price': 150.0}, 'MSFT': {'current_price': 300.0}})
+
+        self.stream.unsubscribe(first)
+        self.assertEqual(self.stream.get_stats()['quotes'], 1)
+
+        # A poll finishing after the last subscriber left doesn't bring the quotes back
+        self.stream.unsubscribe(second)
+        self.stream.publish({'MSFT': {'current_price': 301.0}}, subscribed_only=True)
+        self.assertEqual(self.stream.get_stats()['quotes'], 0)
+
+    def test_subscribers_capped(self):
+        """Test clients past the cap are refused until a slot frees up"""
+        self.stream.max_subscribers = 2
+        first = self.stream.subscribe(['AAPL'])
+        self.stream.subscribe(['MSFT'])
+        self.assertIsNone(self.stream.subscribe(['GE']))
+
+        self.stream.unsubscribe(first)
+        self.assertIsNotNone(self.stream.subscribe(['GE']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.services.rate_limiter import TokenBucket, SQLiteTokenBucket, RateLimiter, RateLimitExceeded
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_burst_then_wait(self):
+        """Test calls only wait once the burst capacity is used up"""
+        bucket = TokenBucket(rate_per_minute=60, capacity=3)
+
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.try_acquire(), 1.0, places=1)
+
+    @patch('app.services.rate_limiter.time.sleep')
+    def test_acquire_sleeps_only_when_empty(self, mock_sleep):
+        """Test the limiter sleeps for the refill time when the bucket is empty"""
+        limiter = RateLimiter(TokenBucket(rate_per_minute=600, capacity=1), max_wait=5)
+        with patch.object(limiter.bucket, 'try_acquire', side_effect=[0, 0.1, 0]):
+            limiter.acquire()
+            mock_sleep.assert_not_called()
+            limiter.acquire()
+            mock_sleep.assert_called_once_with(0.1)
+
+    def test_gives_up_after_max_wait(self):
+        """Test callers are not blocked longer than max_wait"""
+        limiter = RateLimiter(TokenBucket(rate_per_minute=1, capacity=1), max_wait=1)
+        limiter.acquire()
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire()
+
+    def test_host_bucket_is_shared(self):
+        """Test two buckets on the same file draw from one budget"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'rate_limit.sqlite3')
+            worker_a = SQLiteTokenBucket(path, rate_per_minute=1, capacity=2)
+            worker_b = SQLiteTokenBucket(path, rate_per_minute=1, capacity=2)
+
+            self.assertEqual(worker_a.try_acquire(), 0)
+            self.assertEqual(worker_b.try_acquire(), 0)
+            self.assertGreater(worker_a.try_acquire(), 0)
@@ -0,0 +1,42 @@
+import threading
+import time
+import unittest
+
+from app.services.single_flight import SingleFlight
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        """Test concurrent callers for one key wait for the first call's result"""
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'current_price': 150.0}
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do('stock_data_AAPL', fetch)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'current_price': 150.0}] * 5)
+        self.assertEqual(flight.get_stats()['coalesced'], 4)
+
+    def test_errors_are_shared_and_key_is_released(self):
+        """Test waiting callers see the error and later calls run again"""
+        flight = SingleFlight()
+
+        def failing():
+            raise ValueError('upstream error')
+
+        with self.assertRaises(ValueError):
+            flight.do('stock_data_BAD', failing)
+
+        self.assertEqual(flight.do('stock_data_BAD', lambda: 'ok'), 'ok')
+        self.assertEqual(flight.get_stats()['in_flight'], 0)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from app.services.symbol_index import SymbolIndex
+
+LISTING = """symbol,name,exchange,assetType,ipoDate,delistingDate,status
+AAPL,Apple Inc,NASDAQ,Stock,1980-12-12,null,Active
+APLE,Apple Hospitality REIT Inc,NYSE,Stock,2015-05-18,null,Active
+AA,Alcoa Corp,NYSE,Stock,2016-10-18,null,Active
+MSFT,Microsoft Corporation,NASDAQ,Stock,1986-03-13,null,Active
+NVDA,NVIDIA Corp,NASDAQ,Stock,1999-01-22,null,Active
+BRK-B,Berkshire Hathaway Inc,NYSE,Stock,1996-05-09,null,Active
+OLD,Old Delisted Co,NYSE,Stock,1990-01-01,2020-01-01,Delisted
+"""
+
+
+class SymbolIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'listing_status.csv')
+        with open(self.path, 'w') as f:
+            f.write(LISTING)
+        self.index = SymbolIndex(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _symbols(self, query, limit=10):
+        return [match['symbol'] for match in self.index.search(query, limit=limit)]
+
+    def test_ranking(self):
+        """Test exact symbols rank first, then symbol prefixes, then company names"""
+        self.assertEqual(self._symbols('aa'), ['AA', 'AAPL'])
+        self.assertEqual(self._symbols('apple')[:2], ['AAPL', 'APLE'])
+        self.assertEqual(self._symbols('apple hosp')[0], 'APLE')
+        self.assertEqual(self._symbols('berk'), ['BRK-B'])
+        self.assertEqual(self._symbols('old'), [])
+
+    def test_typo_tolerance(self):
+        """Test one typo in a symbol or company name still matches"""
+        self.assertIn('MSFT', self._symbols('micrsoft'))
+        self.assertIn('NVDA', self._symbols('nvdia'))
+        self.assertIn('MSFT', self._symbols('msfg'))
+
+    def test_reloads_when_file_changes(self):
+        """Test a refreshed listing file is picked up on the next lookup"""
+        self.assertEqual(self.index.get('tsla'), None)
+
+        with open(self.path, 'a') as f:
+            f.write("TSLA,Tesla Inc,NASDAQ,Stock,2010-06-29,null,Active\n")
+        os.utime(self.path, (time.time() + 5, time.time() + 5))
+
+        self.assertEqual(self.index.get('tsla')['name'], 'Tesla Inc')
+
+    @patch('app.services.symbol_index.http_client.get')
+    def test_refresh_rejects_bad_download(self, mock_get):
+        """Test a rate-limit answer does not replace the listing file"""
+        mock_get.return_value = MagicMock(text='{"Note": "API call frequency exceeded"}')
+
+        with self.assertRaises(ValueError):
+            self.index.refresh()
+        self.assertEqual(self._symbols('msft'), ['MSFT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from app import create_app, db
+from app.models.market_data import SymbolView
+from app.models.portfolio import Portfolio, Holding
+from app.models.user import User
+from app.monitoring.metrics import JobMetric
+from app.services.market_calendar import MARKET_TZ
+from app.services.scheduler_lock import SchedulerLock
+
+
+class WarmupTaskTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(username='testuser', email='test@example.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+
+        for name, symbols in (('Growth', ['AAPL', 'MSFT']), ('Income', ['AAPL', 'JNJ'])):
+            portfolio = Portfolio(user_id=user.id, name=name)
+            db.session.add(portfolio)
+            db.session.commit()
+            for symbol in symbols:
+                db.session.add(Holding(portfolio_id=portfolio.id, symbol=symbol, quantity=1, purchase_price=100))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    # The in-memory test database shares one connection, so fetches run one at a time
+    @patch('app.services.market_service.Config.MARKET_DATA_MAX_WORKERS', 1)
+    @patch('app.services.market_service.MarketService._fetch_company_overview')
+    @patch('app.services.market_service.MarketService._fetch_stock_data')
+    def test_warm_market_caches(self, mock_quote, mock_overview):
+        """Test every held symbol is refetched once, past the open, and the run is recorded"""
+        from app.services.market_calendar import next_open
+        from app.services.market_service import MarketService
+        from app.tasks import warm_market_caches
+
+        mock_quote.return_value = {'current_price': 100.0}
+        mock_overview.return_value = {'Symbol': 'X'}
+        self.app.config['WARMUP_SYMBOLS'] = ['SPY']
+        # Last night's quote is cached but runs out at the open, so it is fetched again
+        MarketService().cache.set('stock_data_AAPL', {'current_price': 90.0}, ttl=60)
+
+        with patch('app.services.quote_refresher.quote_refresher.record_view') as mock_view:
+            warm_market_caches()
+        mock_view.assert_not_called()
+
+        self.assertEqual(sorted(call.args[0] for call in mock_quote.call_args_list), ['AAPL', 'JNJ', 'MSFT', 'SPY'])
+        self.assertEqual(mock_overview.call_count, 4)
+        to_open = (next_open() - datetime.now(MARKET_TZ)).total_seconds()
+        for call in mock_quote.call_args_list:
+            self.assertGreater(call.args[2], to_open)
+
+        run = JobMetric.query.filter_by(job='warm_market_caches').one()
+        self.assertEqual(run.item_count, 4)
+        self.assertEqual(run.fetched_count, 8)
+        self.assertTrue(run.success)
+
+
+    def test_symbol_views_shared_and_decayed(self):
+        """Test views are read back without changing them and only the decay job halves them"""
+        from app.services.quote_refresher import quote_refresher
+        from app.tasks import decay_symbol_views
+
+        for symbol in ['MSFT'] * 4 + ['AAPL'] * 3 + ['GE']:
+            quote_refresher.record_view(symbol)
+        self.assertEqual(quote_refresher.most_viewed(10), ['MSFT', 'AAPL', 'GE'])
+        self.assertEqual(quote_refresher.most_viewed(2), ['MSFT', 'AAPL'])
+
+        decay_symbol_views()
+        self.assertEqual(quote_refresher.most_viewed(10), ['MSFT', 'AAPL'])
+        self.assertEqual(SymbolView.query.count(), 2)
+
+        # Views since the decay count in full on top of the halved ones
+        for _ in range(2):
+            quote_refresher.record_view('AAPL')
+        self.assertEqual(quote_refresher.most_viewed(10), ['AAPL', 'MSFT'])
+
+
+class SchedulerLockTestCase(unittest.TestCase):
+    def test_one_holder_at_a_time(self):
+        """Test only one worker gets to run the scheduled jobs until it lets go"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'scheduler.lock')
+            first, second = SchedulerLock(), SchedulerLock()
+
+            self.assertTrue(first.acquire(path))
+            self.assertFalse(second.acquire(path))
+            self.assertTrue(first.acquire(path))
+
+            first.release()
+            self.assertTrue(second.acquire(path))
+            second.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
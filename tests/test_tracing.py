@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+
+from app import create_app, db
+from app.monitoring.metrics import RequestTiming, get_request_time_breakdown
+from app.monitoring.tracing import start_trace, end_trace, span, record
+from app.services.market_service import copy_app_context
+
+
+class RequestTraceTestCase(unittest.TestCase):
+    def test_spans_keep_their_own_time(self):
+        """Test nested spans are not counted twice and the rest is reported as other"""
+        token = start_trace('portfolio.get_enhanced_recommendations')
+        with span('recommendations'):
+            time.sleep(0.02)
+            with span('risk'):
+                record('db', 0.01)
+                time.sleep(0.02)
+        trace = end_trace(token)
+
+        breakdown = trace.breakdown()
+        self.assertEqual(breakdown['db'], 0.01)
+        self.assertGreaterEqual(breakdown['risk'], 0.01)
+        self.assertGreaterEqual(breakdown['recommendations'], 0.02)
+        self.assertLess(breakdown['recommendations'], 0.02 + breakdown['risk'])
+        self.assertAlmostEqual(sum(breakdown.values()), trace.duration, places=6)
+
+    def test_worker_threads_record_into_request(self):
+        """Test upstream time spent on a bulk-fetch worker thread counts for the request"""
+        token = start_trace('market.get_indices')
+        fetch = copy_app_context(lambda: record('upstream', 0.5))
+        worker = threading.Thread(target=fetch)
+        worker.start()
+        worker.join()
+        trace = end_trace(token)
+
+        self.assertEqual(trace.breakdown()['upstream'], 0.5)
+        # Nothing is recorded once the request has finished
+        record('upstream', 1.0)
+        self.assertEqual(trace.breakdown()['upstream'], 0.5)
+
+    def test_spans_outside_requests_are_ignored(self):
+        """Test instrumented code runs normally when no request is being traced"""
+        with span('risk'):
+            record('db', 0.01)
+
+
+class SlowRequestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_slow_requests_are_stored(self):
+        """Test requests over the threshold are stored and aggregated per route"""
+        self.client.get('/')
+        self.assertEqual(RequestTiming.query.count(), 0)
+
+        self.app.config['TRACE_SLOW_REQUEST_SECONDS'] = 0
+        self.client.get('/')
+        self.client.get('/')
+
+        routes = get_request_time_breakdown()
+        self.assertEqual(len(routes), 1)
+        self.assertEqual(routes[0]['route'], 'main.home')
+        self.assertEqual(routes[0]['count'], 2)
+        self.assertIn('other', [span['name'] for span in routes[0]['spans']])
+        self.assertAlmostEqual(sum(span['share'] for span in routes[0]['spans']), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()